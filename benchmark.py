@@ -0,0 +1,463 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional
+
+from converter import (
+    AUDIO_FORMATS, VIDEO_FORMATS, ENCODER_SETTINGS_VERSION, MediaConverter, build_conversion_jobs,
+    run_conversion_batch, check_and_convert_codec, get_subprocess_kwargs, get_conversion_worker_count,
+    probe_file
+)
+from chunked import get_segment_count
+from probe import get_duration
+from threadbudget import get_thread_budget
+from progressbus import ProgressBus, PROGRESS_FRAME_INTERVAL
+
+# Benchmarks comparing conversion strategies on the user's own files, plus an
+# offline suite on generated fixtures for catching speed regressions between versions.
+# Headless like cli.py: no GUI imports.
+
+# Deterministic fixtures made from ffmpeg's lavfi sources (no network, no sample files).
+# "quick" fixtures are the ones used by --quick runs.
+BENCH_FIXTURES = [
+    {'name': 'sine_10s', 'kind': 'audio', 'source': 'sine=frequency=440:sample_rate=44100',
+     'duration': 10, 'quick': True},
+    {'name': 'noise_60s', 'kind': 'audio', 'source': 'anoisesrc=color=pink:seed=42:sample_rate=44100:amplitude=0.3',
+     'duration': 60, 'quick': False},
+    {'name': 'testsrc2_360p_5s', 'kind': 'video', 'size': '640x360', 'duration': 5, 'quick': True},
+    {'name': 'testsrc2_720p_10s', 'kind': 'video', 'size': '1280x720', 'duration': 10, 'quick': False},
+    {'name': 'testsrc2_1080p_5s', 'kind': 'video', 'size': '1920x1080', 'duration': 5, 'quick': False},
+]
+# Keep fixture generation itself quick; the defaults of the slow encoders take minutes at 1080p
+FIXTURE_ENCODE_ARGS = {
+    "webm": ["-deadline", "realtime", "-cpu-used", "8"],
+    "mp4": ["-preset", "veryfast"],
+    "mov": ["-preset", "veryfast"],
+    "mkv": ["-preset", "veryfast"],
+}
+# Same content stored as VP9 in mp4: exercises the H.264 pass of check_and_convert_codec
+CODEC_CHECK_ARGS = ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-cpu-used", "8", "-c:a", "aac"]
+BITEXACT_ARGS = ["-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact"]
+BENCH_RESULTS_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.15  # 15% slower than the baseline
+REGRESSION_MIN_SECONDS = 0.05  # ignore differences below timer/process-start noise
+
+
+def valid_jobs(converter: MediaConverter, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop jobs the converter would refuse (audio to video)"""
+    return [job for job in jobs if converter.validate_conversion(job['input_format'], job['output_format'])[0]]
+
+
+def time_batch(converter: MediaConverter, jobs: List[Dict[str, Any]], use_gpu: bool, max_workers: int) -> float:
+    """Wall time of one batch; raises if any job failed so broken runs are not reported"""
+    start_time = time.time()
+    results = run_conversion_batch(converter, jobs, use_gpu, max_workers)
+    elapsed = time.time() - start_time
+    failed = [r for r in results if not r['success']]
+    if failed:
+        raise RuntimeError(f"{len(failed)} conversions failed, first: {failed[0]['error']}")
+    return elapsed
+
+
+def benchmark_fanout(converter: MediaConverter, input_paths: List[str], output_formats: List[str],
+                     use_gpu: bool = False, max_workers: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Sequential runs (one batch per format, the input decoded once per format) against
+    one fan-out batch (one decode per input, every format encoded from it).
+    The best of `repeat` runs is reported for each strategy.
+    """
+    sequential_times = []
+    fanout_times = []
+
+    for run in range(max(repeat, 1)):
+        with tempfile.TemporaryDirectory(prefix="laces_bench_") as output_folder:
+            elapsed = 0.0
+            for fmt in output_formats:
+                jobs = valid_jobs(converter, build_conversion_jobs(input_paths, output_folder, fmt))
+                elapsed += time_batch(converter, jobs, use_gpu, max_workers)
+            sequential_times.append(elapsed)
+
+        with tempfile.TemporaryDirectory(prefix="laces_bench_") as output_folder:
+            jobs = valid_jobs(converter, build_conversion_jobs(input_paths, output_folder, output_formats))
+            fanout_times.append(time_batch(converter, jobs, use_gpu, max_workers))
+
+        logging.info(f"Run {run + 1}: sequential {sequential_times[-1]:.2f}s, fan-out {fanout_times[-1]:.2f}s")
+
+    best_sequential = min(sequential_times)
+    best_fanout = min(fanout_times)
+    return {
+        'inputs': len(input_paths),
+        'output_formats': output_formats,
+        'repeat': len(fanout_times),
+        'sequential_seconds': [round(t, 3) for t in sequential_times],
+        'fanout_seconds': [round(t, 3) for t in fanout_times],
+        'best_sequential': round(best_sequential, 3),
+        'best_fanout': round(best_fanout, 3),
+        'speedup': round(best_sequential / best_fanout, 3) if best_fanout > 0 else None
+    }
+
+
+def benchmark_chunked(converter: MediaConverter, input_paths: List[str], output_format: str,
+                      segments: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """
+    One encoder process per file against keyframe-segmented parallel encoding,
+    files converted one at a time so only the per-file strategy differs. No speedup
+    is reported when a file was not actually split (not a CPU encode, too few keyframes).
+    """
+    single = MediaConverter(converter.ffmpeg_path, converter.ffprobe_path, chunked_min_duration=0)
+    chunked = MediaConverter(converter.ffmpeg_path, converter.ffprobe_path,
+                             chunked_min_duration=0.001, chunked_segments=segments)
+    single_times = []
+    chunked_times = []
+    fallbacks = []
+    try_chunked_encode = chunked.try_chunked_encode
+
+    def counting_try_chunked_encode(input_path, *args, **kwargs):
+        used = try_chunked_encode(input_path, *args, **kwargs)
+        if not used:
+            fallbacks.append(input_path)
+        return used
+
+    chunked.try_chunked_encode = counting_try_chunked_encode
+
+    for run in range(max(repeat, 1)):
+        for strategy, times in ((single, single_times), (chunked, chunked_times)):
+            with tempfile.TemporaryDirectory(prefix="laces_bench_") as output_folder:
+                jobs = valid_jobs(strategy, build_conversion_jobs(input_paths, output_folder, output_format))
+                times.append(time_batch(strategy, jobs, False, 1))
+        logging.info(f"Run {run + 1}: single process {single_times[-1]:.2f}s, chunked {chunked_times[-1]:.2f}s")
+
+    best_single = min(single_times)
+    best_chunked = min(chunked_times)
+    fell_back = sorted(set(fallbacks))
+    if fell_back:
+        logging.warning(f"{len(fell_back)} of {len(input_paths)} files were encoded in one piece "
+                        f"by the chunked run, not reporting a speedup")
+    return {
+        'inputs': len(input_paths),
+        'output_format': output_format,
+        'segments': get_segment_count(segments),
+        'repeat': len(chunked_times),
+        'single_seconds': [round(t, 3) for t in single_times],
+        'chunked_seconds': [round(t, 3) for t in chunked_times],
+        'best_single': round(best_single, 3),
+        'best_chunked': round(best_chunked, 3),
+        'not_chunked': fell_back,
+        'speedup': round(best_single / best_chunked, 3) if best_chunked > 0 and not fell_back else None
+    }
+
+
+def benchmark_threads(converter: MediaConverter, input_paths: List[str], output_format: str,
+                      max_workers: int = 0, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Parallel batch with ffmpeg's default threading (every process sized to all cores)
+    against the shared thread budget (the cores divided between running processes).
+    Aggregate throughput is seconds of media converted per wall-clock second.
+    """
+    budget = get_thread_budget()
+    converter = MediaConverter(converter.ffmpeg_path, converter.ffprobe_path, chunked_min_duration=0)
+    media_seconds = sum(get_duration(probe_file(path, converter.ffprobe_path)) for path in input_paths)
+    naive_times = []
+    budgeted_times = []
+
+    try:
+        for run in range(max(repeat, 1)):
+            for enabled, times in ((False, naive_times), (True, budgeted_times)):
+                budget.enabled = enabled
+                with tempfile.TemporaryDirectory(prefix="laces_bench_") as output_folder:
+                    jobs = valid_jobs(converter, build_conversion_jobs(input_paths, output_folder, output_format))
+                    times.append(time_batch(converter, jobs, False, max_workers))
+            logging.info(f"Run {run + 1}: unbudgeted {naive_times[-1]:.2f}s, budgeted {budgeted_times[-1]:.2f}s")
+    finally:
+        budget.enabled = True
+
+    best_naive = min(naive_times)
+    best_budgeted = min(budgeted_times)
+    return {
+        'inputs': len(input_paths),
+        'output_format': output_format,
+        'workers': min(get_conversion_worker_count(max_workers), len(input_paths)),
+        'cores': budget.total_threads,
+        'repeat': len(budgeted_times),
+        'media_seconds': round(media_seconds, 3),
+        'naive_seconds': [round(t, 3) for t in naive_times],
+        'budgeted_seconds': [round(t, 3) for t in budgeted_times],
+        'naive_realtime_multiple': round(media_seconds / best_naive, 3) if best_naive > 0 else None,
+        'budgeted_realtime_multiple': round(media_seconds / best_budgeted, 3) if best_budgeted > 0 else None,
+        'speedup': round(best_naive / best_budgeted, 3) if best_budgeted > 0 else None
+    }
+
+
+def benchmark_progress_bus(rate: int = 10000, seconds: float = 3.0, publishers: int = 4) -> Dict[str, Any]:
+    """
+    Synthetic progress flood: `publishers` threads (think parallel downloads) publish
+    `rate` events per second in total while one consumer drains at the UI frame rate,
+    as the Tk loop does. UI work is bounded if redraws stay at the frame rate and
+    states per redraw at the number of jobs, whatever the event rate.
+    """
+    bus = ProgressBus()
+    stop = threading.Event()
+    publish_seconds = [0.0] * publishers
+
+    def publish(worker: int):
+        per_tick = max(int(rate / publishers / 100), 1)  # events per 10 ms
+        sent = 0
+        start = time.perf_counter()
+        while not stop.is_set():
+            begin = time.perf_counter()
+            for _ in range(per_tick):
+                sent += 1
+                bus.publish(('download', worker), 'downloading', {'downloaded_bytes': sent, 'total_bytes': 10 ** 9})
+            publish_seconds[worker] += time.perf_counter() - begin
+            # Pace to the requested rate
+            delay = start + sent / (rate / publishers) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    threads = [threading.Thread(target=publish, args=(worker,), daemon=True) for worker in range(publishers)]
+    redraws = 0
+    max_states = 0
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() - start < seconds:
+        time.sleep(PROGRESS_FRAME_INTERVAL)
+        latest = bus.drain()
+        if latest:
+            redraws += 1
+            max_states = max(max_states, len(latest))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = bus.stats()
+    return {
+        'publishers': publishers,
+        'target_events_per_second': rate,
+        'events_per_second': round(stats['published'] / elapsed, 1),
+        'events_published': stats['published'],
+        'states_delivered': stats['delivered'],
+        'redraws': redraws,
+        'redraws_per_second': round(redraws / elapsed, 2),
+        'max_states_per_redraw': max_states,
+        'redraws_without_bus': stats['published'],
+        'publish_cost_us': round(sum(publish_seconds) / stats['published'] * 1e6, 3) if stats['published'] else None
+    }
+
+
+def fixture_inputs(fixture: Dict[str, Any]) -> List[str]:
+    """lavfi input arguments of a fixture"""
+    duration = fixture['duration']
+    if fixture['kind'] == 'audio':
+        return ["-f", "lavfi", "-i", f"{fixture['source']}:duration={duration}"]
+    return ["-f", "lavfi", "-i", f"testsrc2=size={fixture['size']}:rate=30:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}"]
+
+
+def generate_fixture(ffmpeg_path: str, fixture: Dict[str, Any], fmt: str, fixtures_dir: str,
+                     suffix: str = "", extra_args: Optional[List[str]] = None) -> str:
+    """Create (or reuse) one fixture file; written under a temp name so a killed run leaves no stub behind"""
+    path = os.path.join(fixtures_dir, f"{fixture['name']}{suffix}.{fmt}")
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        return path
+    temp_path = os.path.join(fixtures_dir, f".{fixture['name']}{suffix}.tmp.{fmt}")
+    cmd = ([ffmpeg_path, "-hide_banner", "-loglevel", "error"] + fixture_inputs(fixture)
+           + (extra_args if extra_args is not None else FIXTURE_ENCODE_ARGS.get(fmt, []))
+           + BITEXACT_ARGS + ["-shortest", "-y", temp_path])
+    subprocess.run(cmd, capture_output=True, text=True, check=True, **get_subprocess_kwargs())
+    os.replace(temp_path, path)
+    return path
+
+
+def get_ffmpeg_version(ffmpeg_path: str) -> str:
+    """First line of `ffmpeg -version`"""
+    try:
+        result = subprocess.run([ffmpeg_path, "-version"], capture_output=True, text=True, check=False,
+                                **get_subprocess_kwargs())
+        return (result.stdout.splitlines() or ["unknown"])[0]
+    except OSError:
+        return "unknown"
+
+
+def best_of(repeat: int, run) -> float:
+    """Fastest wall time of `repeat` calls of run()"""
+    times = []
+    for _ in range(max(repeat, 1)):
+        start_time = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def benchmark_suite(converter: MediaConverter, fixtures_dir: Optional[str] = None,
+                    input_formats: Optional[List[str]] = None, output_formats: Optional[List[str]] = None,
+                    quick: bool = False, repeat: int = 1) -> Dict[str, Any]:
+    """
+    Time every input -> output format pair on generated fixtures (CPU only, offline).
+    Each fixture is rendered once per input format; every valid pair is then converted
+    with convert_single_file and the best of `repeat` runs is recorded.
+    """
+    # Time the single-process path only; chunked encoding has its own benchmark
+    converter = MediaConverter(converter.ffmpeg_path, converter.ffprobe_path, chunked_min_duration=0)
+    input_formats = input_formats or AUDIO_FORMATS + VIDEO_FORMATS
+    output_formats = output_formats or AUDIO_FORMATS + VIDEO_FORMATS
+    fixtures = [fixture for fixture in BENCH_FIXTURES if fixture['quick'] or not quick]
+    own_fixtures_dir = fixtures_dir is None
+    fixtures_dir = fixtures_dir or tempfile.mkdtemp(prefix="laces_fixtures_")
+    os.makedirs(fixtures_dir, exist_ok=True)
+    results = []
+    suite_start = time.time()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="laces_bench_") as output_folder:
+            for fixture in fixtures:
+                fixture_formats = AUDIO_FORMATS if fixture['kind'] == 'audio' else VIDEO_FORMATS
+                for input_format in [fmt for fmt in input_formats if fmt in fixture_formats]:
+                    try:
+                        input_path = generate_fixture(converter.ffmpeg_path, fixture, input_format, fixtures_dir)
+                    except (subprocess.CalledProcessError, OSError) as e:
+                        logging.error(f"Could not generate fixture {fixture['name']}.{input_format}: {e}")
+                        continue
+
+                    for output_format in output_formats:
+                        if not converter.validate_conversion(input_format, output_format)[0]:
+                            continue
+                        output_path = os.path.join(output_folder, f"{fixture['name']}_{input_format}.{output_format}")
+                        result = {
+                            'key': f"{fixture['name']}:{input_format}->{output_format}",
+                            'fixture': fixture['name'],
+                            'input_format': input_format,
+                            'output_format': output_format,
+                            'duration': fixture['duration'],
+                            'strategy': None,
+                            'success': False,
+                            'error': None,
+                            'seconds': None,
+                            'realtime_multiple': None,
+                            'output_bytes': 0
+                        }
+
+                        def convert():
+                            plan = converter.plan_commands(input_path, output_path, input_format, output_format, False)
+                            result['strategy'] = plan[0][0]
+                            converter.convert_single_file(input_path, output_path, input_format, output_format,
+                                                          False, plan=plan)
+
+                        try:
+                            seconds = best_of(repeat, convert)
+                            result.update(success=True, seconds=round(seconds, 4),
+                                          realtime_multiple=round(fixture['duration'] / seconds, 2) if seconds else None,
+                                          output_bytes=os.path.getsize(output_path))
+                        except Exception as e:
+                            result['error'] = str(e)[-300:]
+                        logging.info(f"{result['key']}: "
+                                     f"{'%.3fs' % result['seconds'] if result['success'] else 'FAILED'}")
+                        results.append(result)
+                        if os.path.exists(output_path):
+                            os.remove(output_path)
+
+                if fixture['kind'] == 'video' and 'mp4' in input_formats:
+                    results.append(benchmark_codec_check(converter, fixture, fixtures_dir, output_folder, repeat))
+    finally:
+        if own_fixtures_dir:
+            shutil.rmtree(fixtures_dir, ignore_errors=True)
+
+    return {
+        'version': BENCH_RESULTS_VERSION,
+        'created': time.time(),
+        'environment': {
+            'ffmpeg': get_ffmpeg_version(converter.ffmpeg_path),
+            'platform': platform.platform(),
+            'python': sys.version.split()[0],
+            'cpu_count': os.cpu_count(),
+            'encoder_settings_version': ENCODER_SETTINGS_VERSION
+        },
+        'quick': quick,
+        'repeat': max(repeat, 1),
+        'total_seconds': round(time.time() - suite_start, 3),
+        'pairs': len(results),
+        'failed': sum(1 for result in results if not result['success']),
+        'results': results
+    }
+
+
+def benchmark_codec_check(converter: MediaConverter, fixture: Dict[str, Any], fixtures_dir: str,
+                          output_folder: str, repeat: int) -> Dict[str, Any]:
+    """Time the VP9 -> H.264 compatibility pass on a fresh copy of a VP9 mp4 fixture"""
+    result = {'key': f"{fixture['name']}:codec_check", 'fixture': fixture['name'], 'input_format': 'mp4',
+              'output_format': 'mp4', 'duration': fixture['duration'], 'strategy': 'codec_check',
+              'success': False, 'error': None, 'seconds': None, 'realtime_multiple': None, 'output_bytes': 0}
+    target = os.path.join(output_folder, f"{fixture['name']}_codec_check.mp4")
+    try:
+        source = generate_fixture(converter.ffmpeg_path, fixture, "mp4", fixtures_dir, "_vp9", CODEC_CHECK_ARGS)
+        times = []
+        for _ in range(max(repeat, 1)):
+            shutil.copyfile(source, target)
+            start_time = time.perf_counter()
+            converted = check_and_convert_codec(target, converter.ffmpeg_path, converter.ffprobe_path)
+            times.append(time.perf_counter() - start_time)
+            if not converted:
+                raise RuntimeError("VP9 fixture was not converted to H.264")
+        seconds = min(times)
+        result.update(success=True, seconds=round(seconds, 4), output_bytes=os.path.getsize(target),
+                      realtime_multiple=round(fixture['duration'] / seconds, 2) if seconds else None)
+    except Exception as e:
+        result['error'] = str(e)[-300:]
+    finally:
+        if os.path.exists(target):
+            os.remove(target)
+    logging.info(f"{result['key']}: {'%.3fs' % result['seconds'] if result['success'] else 'FAILED'}")
+    return result
+
+
+def load_bench_results(path: str) -> Dict[str, Any]:
+    """Read a results file written by save_bench_results"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_bench_results(results: Dict[str, Any], path: str) -> None:
+    """Write suite results as JSON (usable as a later baseline)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def compare_bench_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                          threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                          min_seconds: float = REGRESSION_MIN_SECONDS) -> Dict[str, Any]:
+    """
+    Pairs that got slower than the baseline by more than `threshold` (a fraction) and by
+    at least `min_seconds`, pairs that got that much faster, and pairs only one side has.
+    """
+    base = {r['key']: r for r in baseline.get('results', []) if r.get('success')}
+    base_env, current_env = baseline.get('environment', {}), current.get('environment', {})
+    now = {r['key']: r for r in current.get('results', []) if r.get('success')}
+    regressions, improvements = [], []
+
+    for key in sorted(base.keys() & now.keys()):
+        before, after = base[key]['seconds'], now[key]['seconds']
+        entry = {'key': key, 'baseline': before, 'current': after,
+                 'change_pct': round((after - before) / before * 100, 1) if before else None}
+        if after > before * (1 + threshold) and after - before >= min_seconds:
+            regressions.append(entry)
+        elif after < before * (1 - threshold) and before - after >= min_seconds:
+            improvements.append(entry)
+
+    return {
+        'threshold': threshold,
+        'compared': len(base.keys() & now.keys()),
+        'regressions': regressions,
+        'improvements': improvements,
+        'new': sorted(now.keys() - base.keys()),
+        'missing': sorted(base.keys() - now.keys()),
+        # Timings from a different ffmpeg build or machine are not really comparable
+        'environment_changed': any(current_env.get(field) != base_env.get(field) for field in ('ffmpeg', 'cpu_count'))
+    }
@@ -0,0 +1,189 @@
+import os
+import csv
+import sys
+import time
+import logging
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from ffmpeg_progress import run_ffmpeg_with_progress
+from threadbudget import get_thread_budget, apply_thread_args
+from staging import staging_work_dir, move_into_place
+
+# Keyframe-segmented parallel encoding of one long video.
+# The video stream is split at keyframes with the segment muxer (stream copy),
+# every segment is encoded by its own ffmpeg process, the audio is encoded once
+# on the side, and the pieces are joined with the concat demuxer without
+# re-encoding. Intermediates live in the staging area when there is room.
+# Stdlib only so converter.py can import it freely.
+
+CHUNKED_ENCODE_MIN_SECONDS = 600  # inputs at least this long are encoded in segments
+MAX_CHUNKED_SEGMENTS = 8
+CHUNK_CONTAINER = "mkv"
+
+
+def _subprocess_kwargs() -> Dict[str, Any]:
+    return {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+
+
+def get_segment_count(requested: Optional[int] = None) -> int:
+    """Number of segments to encode in parallel (0 or None = half the CPU cores, at most 8)"""
+    if requested and requested > 0:
+        return requested
+    return min((os.cpu_count() or 1) // 2, MAX_CHUNKED_SEGMENTS)
+
+
+def split_encode_args(cmd: List[str]) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Split a single-process encode command ([ffmpeg, -i, input, ..., output]) into
+    video encoder args, audio encoder args and muxer args (-f).
+    """
+    video_args, audio_args, muxer_args = [], [], []
+    args = [arg for arg in cmd[3:-1] if arg != "-y"]
+    index = 0
+    while index < len(args):
+        option = args[index]
+        value = args[index + 1:index + 2]
+        if option in ("-c:a", "-b:a", "-q:a", "-acodec"):
+            audio_args += [option] + value
+        elif option == "-f":
+            muxer_args += [option] + value
+        elif option.startswith("-") and value and not value[0].startswith("-"):
+            video_args += [option] + value
+        else:
+            video_args.append(option)
+            index += 1
+            continue
+        index += 2
+    return video_args, audio_args, muxer_args
+
+
+def plan_segment_times(duration: float, segments: int) -> List[float]:
+    """Evenly spaced split points; the segment muxer moves each to the next keyframe"""
+    return [round(duration * i / segments, 3) for i in range(1, segments)]
+
+
+def split_at_keyframes(ffmpeg_path: str, input_path: str, work_dir: str,
+                       split_times: List[float]) -> List[Tuple[str, float]]:
+    """Stream-copy the first video stream into keyframe-aligned segments; returns (path, duration)"""
+    list_path = os.path.join(work_dir, "segments.csv")
+    split_cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", input_path,
+                 "-map", "0:v:0", "-c", "copy",
+                 "-f", "segment", "-segment_times", ",".join(str(t) for t in split_times),
+                 "-segment_list", list_path, "-segment_list_type", "csv",
+                 "-reset_timestamps", "1",
+                 "-y", os.path.join(work_dir, f"source_%04d.{CHUNK_CONTAINER}")]
+    subprocess.run(split_cmd, capture_output=True, text=True, check=True, **_subprocess_kwargs())
+
+    segments = []
+    with open(list_path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) >= 3:
+                segments.append((os.path.join(work_dir, row[0]), max(float(row[2]) - float(row[1]), 0.0)))
+    return segments
+
+
+def write_concat_list(paths: List[str], list_path: str) -> None:
+    """Concat demuxer input file"""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def chunked_encode(ffmpeg_path: str, input_path: str, output_path: str, encode_cmd: List[str],
+                   duration: float, segments: int, has_audio: bool = True,
+                   progress_callback=None) -> Dict[str, Any]:
+    """
+    Encode input_path with the arguments of encode_cmd, split across parallel processes.
+    Returns timing stats, including how well the segment encoders kept the cores busy
+    (the speedup over a single encoder process is measured by `cli bench chunked`).
+    Raises subprocess.CalledProcessError / OSError / ValueError on failure.
+    """
+    start_time = time.time()
+    video_args, audio_args, muxer_args = split_encode_args(encode_cmd)
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+
+    # Source segments, encoded segments and the audio track need about three times the input
+    required_bytes = os.path.getsize(input_path) * 3
+    with staging_work_dir(required_bytes) as staged_dir, \
+            tempfile.TemporaryDirectory(prefix=".laces_chunks_", dir=staged_dir or output_dir) as work_dir:
+        sources = split_at_keyframes(ffmpeg_path, input_path, work_dir, plan_segment_times(duration, segments))
+        if len(sources) < 2:
+            raise ValueError("input has too few keyframes to split")
+        split_seconds = time.time() - start_time
+
+        total_duration = sum(d for _, d in sources) or 1.0
+        fractions = [0.0] * len(sources)
+        progress_lock = threading.Lock()
+
+        def encode_segment(index: int, source: str, segment_duration: float, threads: Optional[int]) -> float:
+            def on_snapshot(snapshot: Dict[str, Any]):
+                if progress_callback is None or snapshot['fraction'] is None:
+                    return
+                with progress_lock:
+                    fractions[index] = snapshot['fraction']
+                    done = sum(f * d for f, (_, d) in zip(fractions, sources))
+                progress_callback(dict(snapshot, fraction=min(done / total_duration, 1.0)))
+
+            target = os.path.join(work_dir, f"encoded_{index:04d}.{CHUNK_CONTAINER}")
+            segment_cmd = [ffmpeg_path, "-i", source] + video_args + ["-an", "-y", target]
+            if threads:
+                segment_cmd = apply_thread_args(segment_cmd, threads)
+            return run_ffmpeg_with_progress(segment_cmd, segment_duration, on_snapshot,
+                                            _subprocess_kwargs())['elapsed']
+
+        audio_path = os.path.join(work_dir, "audio.mka")
+        encode_start = time.time()
+        # The segment encoders split this job's share of the cores between them
+        with get_thread_budget().lease(len(sources)) as threads, \
+                ThreadPoolExecutor(max_workers=len(sources) + 1, thread_name_prefix="chunk") as executor:
+            futures = [executor.submit(encode_segment, index, source, segment_duration, threads)
+                       for index, (source, segment_duration) in enumerate(sources)]
+            audio_future = None
+            if has_audio:
+                # Audio is encoded in one piece so segment boundaries cannot leave gaps
+                audio_cmd = [ffmpeg_path, "-i", input_path, "-map", "0:a:0", "-vn"] + audio_args + ["-y", audio_path]
+                audio_future = executor.submit(run_ffmpeg_with_progress, audio_cmd, duration, None,
+                                               _subprocess_kwargs())
+            segment_times = [future.result() for future in futures]
+            if audio_future:
+                audio_future.result()
+        encode_seconds = time.time() - encode_start
+
+        list_path = os.path.join(work_dir, "concat.txt")
+        write_concat_list([os.path.join(work_dir, f"encoded_{i:04d}.{CHUNK_CONTAINER}") for i in range(len(sources))],
+                          list_path)
+        join_cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error",
+                    "-f", "concat", "-safe", "0", "-i", list_path]
+        if has_audio:
+            join_cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a"]
+        join_cmd += ["-c", "copy"]
+        if os.path.splitext(output_path)[1].lower() in (".mp4", ".mov"):
+            join_cmd += ["-movflags", "+faststart"]
+        joined_path = os.path.join(work_dir, "joined" + os.path.splitext(output_path)[1])
+        join_cmd += muxer_args + ["-y", joined_path]
+        subprocess.run(join_cmd, capture_output=True, text=True, check=True, **_subprocess_kwargs())
+        move_into_place(joined_path, output_path)
+
+    wall_time = time.time() - start_time
+    # Segment encode time over the time all segments could have run side by side;
+    # 1.0 means every segment encoder was busy for the whole encode phase
+    busy_capacity = encode_seconds * len(sources)
+    stats = {
+        'segments': len(sources),
+        'split_seconds': round(split_seconds, 3),
+        'encode_seconds': round(encode_seconds, 3),
+        'segment_seconds_total': round(sum(segment_times), 3),
+        'wall_time': round(wall_time, 3),
+        'parallel_efficiency': round(sum(segment_times) / busy_capacity, 3) if busy_capacity > 0 else None,
+        'realtime_multiple': round(duration / wall_time, 3) if wall_time > 0 else None
+    }
+    logging.info(f"Chunked encode {os.path.basename(input_path)}: {stats['segments']} segments in "
+                 f"{wall_time:.2f}s, {stats['parallel_efficiency']} parallel efficiency, "
+                 f"{stats['realtime_multiple']}x realtime")
+    return stats
+
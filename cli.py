@@ -0,0 +1,746 @@
+import os
+import sys
+import time
+import json
+import logging
+import argparse
+import threading
+from concurrent.futures import wait
+from typing import Dict, Any, List, Optional
+
+from converter import (
+    AUDIO_FORMATS, VIDEO_FORMATS, MediaConverter, get_ffmpeg_paths,
+    build_conversion_jobs, run_conversion_batch, get_conversion_worker_count,
+    start_hw_capability_detection, get_absolute_path,
+    open_conversion_cache, parse_output_formats, open_job_journal, start_conversion_journal,
+    resume_conversion_jobs, HW_CAPABILITIES_FILE
+)
+from probe import get_probe_cache
+from manifest import ConversionManifest
+from conversion_cache import CONVERSION_CACHE_MAX_BYTES
+from chunked import CHUNKED_ENCODE_MIN_SECONDS
+from scheduler import get_scheduler, run_detached, RESOURCE_BACKGROUND
+from staging import configure_staging
+from timings import (
+    configure_timings, get_span_recorder, flush_timings, new_job_id, job_scope, span, load_spans,
+    summarize_spans, TIMINGS_FILE
+)
+from benchmark import (
+    benchmark_fanout, benchmark_chunked, benchmark_threads, benchmark_suite, benchmark_progress_bus,
+    compare_bench_results, load_bench_results, save_bench_results, DEFAULT_REGRESSION_THRESHOLD
+)
+from tuning import (
+    tune_encoders, save_encoder_tuning, reset_encoder_tuning,
+    DEFAULT_MIN_SSIM, DEFAULT_SAMPLE_COUNT, DEFAULT_SAMPLE_SECONDS
+)
+from watcher import FolderWatcher, DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_INTERVAL
+
+# Headless entry point for scripts, cron jobs and render nodes.
+# Only converter/downloader may be imported here - never tkinter, vlc, pydub or fonts.
+#
+#   python -m cli convert --in DIR --out DIR --format mp3 --jobs 16
+#   python -m cli download --url URL --out DIR --format mp4 --quality 1080p
+#   python -m cli convert --in DIR --out DIR --format mp3 ogg flac
+#   python -m cli watch --in INBOX --out DIR --format mp3
+#   python -m cli tune --in SAMPLE_VIDEOS --format mp4 webm --min-ssim 0.98
+#   python -m cli batches / python -m cli resume [BATCH_ID]
+#   python -m cli cache stats|list|prune|clear
+#   python -m cli timings [--job JOB]
+#   python -m cli bench fanout --in FILE --format mp3 ogg flac
+#   python -m cli bench chunked --in LONG_VIDEO --format mp4
+#   python -m cli bench threads --in VIDEOS --format mp4 --jobs 4
+#   python -m cli bench suite --quick --output new.json --baseline old.json
+
+
+def collect_input_files(inputs: List[str], recursive: bool = False) -> List[str]:
+    """Expand input files and folders into a sorted list of convertible media files"""
+    extensions = tuple(f".{fmt}" for fmt in AUDIO_FORMATS + VIDEO_FORMATS)
+    files = []
+
+    for path in inputs:
+        if os.path.isdir(path):
+            if recursive:
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in names
+                                 if name.lower().endswith(extensions))
+            else:
+                files.extend(os.path.join(path, name) for name in os.listdir(path)
+                             if name.lower().endswith(extensions)
+                             and os.path.isfile(os.path.join(path, name)))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            logging.warning(f"Input not found, skipping: {path}")
+
+    return sorted(files)
+
+
+def get_file_size(path: str) -> int:
+    """File size in bytes, 0 if missing"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def build_throughput(total_bytes: int, file_count: int, wall_time: float) -> Dict[str, float]:
+    """Aggregate throughput figures for a summary"""
+    if wall_time <= 0:
+        return {'files_per_second': 0.0, 'megabytes_per_second': 0.0}
+    return {
+        'files_per_second': round(file_count / wall_time, 3),
+        'megabytes_per_second': round(total_bytes / 1024 / 1024 / wall_time, 3)
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    """Write the machine-readable summary to stdout"""
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def cmd_convert(args: argparse.Namespace) -> int:
+    """Convert files without the GUI"""
+    output_formats = parse_output_formats(args.format)
+    unsupported = [fmt for fmt in output_formats if fmt not in AUDIO_FORMATS + VIDEO_FORMATS]
+    if unsupported or not output_formats:
+        logging.error(f"Unsupported output format: {', '.join(unsupported) or args.format}")
+        return 2
+
+    resume_batch = getattr(args, 'resume_batch', None)
+    input_files = collect_input_files(args.inputs, args.recursive) if resume_batch is None else []
+    if not input_files and resume_batch is None:
+        logging.error("No input files found")
+        return 2
+
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    converter = MediaConverter(ffmpeg_path, ffprobe_path, args.chunk_min_seconds, args.chunk_segments)
+    os.makedirs(args.output_folder, exist_ok=True)
+    if args.gpu:
+        start_hw_capability_detection(ffmpeg_path)
+
+    jobs = []
+    rejected = []
+    planned_jobs = (resume_conversion_jobs(resume_batch) if resume_batch is not None
+                    else build_conversion_jobs(input_files, args.output_folder, output_formats))
+    for job in planned_jobs:
+        valid, error_msg = converter.validate_conversion(job['input_format'], job['output_format'])
+        if valid:
+            jobs.append(job)
+        else:
+            rejected.append({
+                'input_path': job['input_path'],
+                'output_path': job['output_path'],
+                'success': False,
+                'error': error_msg,
+                'elapsed': 0.0
+            })
+
+    def on_progress(completed: int, total: int, result: Dict[str, Any]):
+        state = "done" if result['success'] else "FAILED"
+        logging.info(f"[{completed}/{total}] {state}: {os.path.basename(result['input_path'])} "
+                     f"({result['elapsed']:.2f}s)")
+
+    manifest = ConversionManifest(args.output_folder) if args.incremental else None
+    cache = open_conversion_cache(args.cache_max_mb * 1024 * 1024) if args.cache else None
+    journal_batch = resume_batch or start_conversion_journal(jobs, {
+        'output_folder': args.output_folder,
+        'output_format': "+".join(output_formats),
+        'use_gpu': args.gpu,
+        'incremental': args.incremental
+    })
+
+    start_time = time.time()
+    results = run_conversion_batch(converter, jobs, args.gpu, args.jobs, on_progress,
+                                   manifest=manifest, cache=cache, journal_batch=journal_batch) if jobs else []
+    wall_time = time.time() - start_time
+
+    files = []
+    for result in results + rejected:
+        files.append({
+            'input': result['input_path'],
+            'output': result['output_path'],
+            'success': result['success'],
+            'skipped': result.get('skipped', False),
+            'cached': result.get('cached', False),
+            'error': result['error'],
+            'wall_time': round(result['elapsed'], 3),
+            'input_bytes': get_file_size(result['input_path'])
+        })
+
+    succeeded = [f for f in files if f['success'] and not f['skipped']]
+    skipped = [f for f in files if f['skipped']]
+    summary = {
+        'command': 'convert',
+        'output_format': "+".join(output_formats),
+        'workers': get_conversion_worker_count(args.jobs),
+        'total_files': len(files),
+        'succeeded': len(succeeded),
+        'skipped': len(skipped),
+        'cached': sum(1 for f in files if f['cached']),
+        'failed': len(files) - len(succeeded) - len(skipped),
+        'total_wall_time': round(wall_time, 3),
+        'throughput': build_throughput(sum(f['input_bytes'] for f in succeeded), len(succeeded), wall_time),
+        'files': files
+    }
+    probe_cache = get_probe_cache()
+    if probe_cache:
+        summary['probe_cache'] = probe_cache.stats()
+    if cache:
+        summary['conversion_cache'] = cache.stats()
+    summary['scheduler'] = get_scheduler().stats()
+    print_summary(summary)
+    return 0 if summary['failed'] == 0 else 1
+
+
+def watch_output_folder(path: str, roots: List[str], output_folder: str) -> str:
+    """Output folder for a watched file, mirroring its subfolder below the watched root"""
+    directory = os.path.dirname(os.path.abspath(path))
+    for root in roots:
+        if directory == root or directory.startswith(root + os.sep):
+            return os.path.normpath(os.path.join(output_folder, os.path.relpath(directory, root)))
+    return output_folder
+
+
+def cmd_watch(args: argparse.Namespace) -> int:
+    """Convert media files as they arrive in the input folders"""
+    output_formats = parse_output_formats(args.format)
+    roots = [os.path.abspath(path) for path in args.inputs]
+    missing = [path for path in roots if not os.path.isdir(path)]
+    if missing:
+        logging.error(f"Watch folder not found: {', '.join(missing)}")
+        return 2
+    output_root = os.path.abspath(args.output_folder)
+    if any(output_root == root or output_root.startswith(root + os.sep) for root in roots):
+        # Outputs would be picked up again as arrivals
+        logging.error("The output folder must not be inside a watched folder")
+        return 2
+
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    converter = MediaConverter(ffmpeg_path, ffprobe_path, args.chunk_min_seconds, args.chunk_segments)
+    os.makedirs(args.output_folder, exist_ok=True)
+    if args.gpu:
+        start_hw_capability_detection(ffmpeg_path)
+    cache = open_conversion_cache(args.cache_max_mb * 1024 * 1024) if args.cache else None
+    # Watched files are always converted incrementally so restarts do not redo finished work
+    manifests = {}
+    totals = {'succeeded': 0, 'skipped': 0, 'cached': 0, 'failed': 0}
+    totals_lock = threading.Lock()
+
+    def convert_arrivals(paths: List[str]):
+        by_folder = {}
+        for path in paths:
+            by_folder.setdefault(watch_output_folder(path, roots, args.output_folder), []).append(path)
+
+        for output_folder, input_files in by_folder.items():
+            os.makedirs(output_folder, exist_ok=True)
+            jobs = [job for job in build_conversion_jobs(input_files, output_folder, output_formats)
+                    if converter.validate_conversion(job['input_format'], job['output_format'])[0]]
+            if not jobs:
+                continue
+            with totals_lock:
+                if output_folder not in manifests:
+                    manifests[output_folder] = ConversionManifest(output_folder)
+                manifest = manifests[output_folder]
+            journal_batch = start_conversion_journal(jobs, {
+                'output_folder': output_folder,
+                'output_format': "+".join(output_formats),
+                'use_gpu': args.gpu,
+                'incremental': True
+            })
+            results = run_conversion_batch(converter, jobs, args.gpu, args.jobs, manifest=manifest,
+                                           cache=cache, journal_batch=journal_batch)
+            for result in results:
+                state = 'skipped' if result.get('skipped') else 'succeeded' if result['success'] else 'failed'
+                with totals_lock:
+                    totals[state] += 1
+                    totals['cached'] += 1 if result.get('cached') else 0
+                if state == 'failed':
+                    logging.error(f"Failed: {os.path.basename(result['input_path'])}: {result['error']}")
+                elif state == 'succeeded':
+                    logging.info(f"Converted {os.path.basename(result['input_path'])} -> {result['output_path']} "
+                                 f"({result['elapsed']:.2f}s)")
+
+    in_flight = []
+
+    def on_ready(paths: List[str]):
+        # Conversions run on the scheduler so the watcher keeps draining events meanwhile
+        in_flight[:] = [future for future in in_flight if not future.done()]
+        in_flight.append(run_detached(RESOURCE_BACKGROUND, convert_arrivals, paths))
+
+    watcher = FolderWatcher(roots, AUDIO_FORMATS + VIDEO_FORMATS, on_ready, recursive=args.recursive,
+                            settle_seconds=args.settle_seconds, force_polling=args.poll,
+                            poll_interval=args.poll_interval, include_existing=not args.new_only)
+    if args.duration > 0:
+        threading.Timer(args.duration, watcher.stop).start()
+
+    start_time = time.time()
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logging.info("Stopping watch")
+    wait(in_flight)
+
+    print_summary(dict({
+        'command': 'watch',
+        'mode': watcher.mode,
+        'output_format': "+".join(output_formats),
+        'files_seen': watcher.files_seen,
+        'files_ready': watcher.files_ready,
+        'pending': watcher.tracker.pending_count(),
+        'total_wall_time': round(time.time() - start_time, 3)
+    }, **totals))
+    return 0 if totals['failed'] == 0 else 1
+
+
+def cmd_download(args: argparse.Namespace) -> int:
+    """Download a URL without the GUI"""
+    # yt-dlp is only needed for downloads, so keep it out of the convert path
+    from downloader import (
+        validate_url, get_site_download_options, get_playlist_download_options,
+        modify_download_options, submit_download, is_audio_only_site,
+        attach_download_journal, finish_download_journal, attach_codec_pipeline,
+        attach_download_archive, attach_stage_timing, DEFAULT_PLAYLIST_DOWNLOAD_WORKERS
+    )
+
+    if not validate_url(args.url):
+        logging.error(f"Unsupported URL: {args.url}")
+        return 2
+
+    format_type = args.format.lower()
+    if is_audio_only_site(args.url) and format_type not in AUDIO_FORMATS:
+        logging.info("Audio-only site detected - using mp3 format")
+        format_type = 'mp3'
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    playlist_action = 'playlist' if args.playlist else 'single'
+
+    # Per-file wall time from first progress callback to 'finished'
+    file_started = {}
+    file_times = {}
+
+    def timing_hook(d):
+        filename = d.get('filename', '')
+        if d['status'] == 'downloading' and filename not in file_started:
+            file_started[filename] = time.time()
+        elif d['status'] == 'finished':
+            file_times[filename] = time.time() - file_started.get(filename, time.time())
+
+    ydl_opts = get_site_download_options(args.url, args.output_folder)
+    ydl_opts['progress_hooks'] = [timing_hook]
+    ydl_opts['quiet'] = True
+    if args.playlist:
+        ydl_opts.update(get_playlist_download_options())
+    ydl_opts = modify_download_options(ydl_opts, args.quality, format_type, playlist_action,
+                                       premiere_compatible=not args.no_premiere_check)
+
+    resume_batch = getattr(args, 'resume_batch', None)
+    journal_batch = resume_batch
+    journal = open_job_journal()
+    if journal_batch is None and journal is not None:
+        journal_batch = journal.start_batch('download', {
+            'url': args.url,
+            'output_folder': args.output_folder,
+            'format_type': format_type,
+            'quality': args.quality,
+            'playlist_action': playlist_action
+        })
+    if journal_batch is not None:
+        ydl_opts = attach_download_journal(ydl_opts, journal_batch, resume=resume_batch is not None)
+
+    # Premiere compatibility pass for YouTube mp4 downloads, per item while the next one downloads
+    job = new_job_id('download')
+    attach_stage_timing(ydl_opts, job)
+    codec_pipeline = attach_codec_pipeline(ydl_opts, args.url)
+
+    # Playlist re-runs only fetch items that are new since the last run
+    download_archive = None
+    if args.playlist and not args.no_archive:
+        download_archive = attach_download_archive(ydl_opts, args.output_folder, format_type, args.quality)
+
+    workers = max(args.jobs or DEFAULT_PLAYLIST_DOWNLOAD_WORKERS, 1) if args.playlist else 1
+    start_time = time.time()
+    error = None
+    try:
+        with job_scope(job), span('download_batch', url=args.url, playlist_action=playlist_action):
+            return_code, downloaded_files = submit_download(ydl_opts, args.url, workers=workers).result()
+    except Exception as e:
+        logging.error(f"Download failed: {e}")
+        return_code, downloaded_files, error = 1, [], str(e)
+
+    converted = []
+    if codec_pipeline is not None:
+        with job_scope(job), span('finalize', url=args.url):
+            converted = codec_pipeline.wait(downloaded_files)
+    if journal_batch is not None:
+        finish_download_journal(journal_batch, return_code == 0)
+    if download_archive is not None:
+        download_archive.save()
+    flush_timings()
+    wall_time = time.time() - start_time
+
+    files = [{
+        'path': filepath,
+        'wall_time': round(file_times.get(filepath, 0.0), 3),
+        'bytes': get_file_size(filepath),
+        'converted_to_h264': filepath in converted
+    } for filepath in downloaded_files]
+
+    summary = {
+        'command': 'download',
+        'url': args.url,
+        'format': format_type,
+        'quality': args.quality,
+        'playlist': args.playlist,
+        'jobs': workers,
+        'success': return_code == 0,
+        'error': error,
+        'total_files': len(files),
+        'skipped_already_present': len(download_archive.skipped) if download_archive is not None else 0,
+        'total_wall_time': round(wall_time, 3),
+        'throughput': build_throughput(sum(f['bytes'] for f in files), len(files), wall_time),
+        'files': files
+    }
+    recorder = get_span_recorder()
+    if recorder is not None:
+        summary['job'] = job
+        summary['stages'] = summarize_spans(load_spans(recorder.jsonl_path, job))
+    print_summary(summary)
+    return 0 if return_code == 0 else 1
+
+
+def cmd_caps(args: argparse.Namespace) -> int:
+    """Print the detected encoder capabilities of an ffmpeg binary"""
+    from hwcaps import load_capabilities, select_video_encoder
+
+    ffmpeg_path = args.ffmpeg or get_ffmpeg_paths()[0]
+    capabilities = load_capabilities(ffmpeg_path, get_absolute_path(HW_CAPABILITIES_FILE), refresh=args.refresh)
+    print_summary({
+        'command': 'caps',
+        'ffmpeg': ffmpeg_path,
+        'selected_encoder': select_video_encoder(capabilities, use_gpu=True),
+        'hwaccels': capabilities.get('hwaccels', []),
+        'hw_encoders': capabilities.get('hw_encoders', {}),
+        'encoder_count': len(capabilities.get('encoders', []))
+    })
+    return 0
+
+
+def cmd_tune(args: argparse.Namespace) -> int:
+    """Pick the fastest software encoder settings per format that meet a quality floor"""
+    if args.reset:
+        reset_encoder_tuning()
+        print_summary({'command': 'tune', 'reset': True, 'formats': {}})
+        return 0
+
+    output_formats = parse_output_formats(args.format or [])
+    input_files = collect_input_files(args.inputs or [], args.recursive)
+    if not input_files or not output_formats:
+        logging.error("Tuning needs --in with some video files and --format")
+        return 2
+
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    tuning = tune_encoders(MediaConverter(ffmpeg_path, ffprobe_path), input_files, output_formats,
+                           args.min_ssim, args.min_psnr, args.samples, args.sample_seconds)
+    summary = {'command': 'tune', 'saved': not args.dry_run}
+    summary.update(tuning)
+    if not args.dry_run:
+        summary['in_effect'] = save_encoder_tuning(tuning)
+    print_summary(summary)
+    return 0 if all(result['chosen'] for result in tuning['formats'].values()) else 1
+
+
+def cmd_timings(args: argparse.Namespace) -> int:
+    """Where the time went: per-stage totals of one job, or of everything recorded"""
+    path = args.timings_file or get_absolute_path(TIMINGS_FILE)
+    spans = load_spans(path)
+    job = args.job
+    if args.latest:
+        jobs = [record['job'] for record in spans if record.get('job')]
+        job = jobs[-1] if jobs else None
+    if job is not None:
+        spans = [record for record in spans if record.get('job') == job]
+    print_summary({'command': 'timings', 'file': path, 'job': job, 'spans': len(spans),
+                   'stages': summarize_spans(spans)})
+    return 0
+
+
+def cmd_batches(args: argparse.Namespace) -> int:
+    """List batches that were interrupted before they finished"""
+    journal = open_job_journal()
+    print_summary({'command': 'batches', 'unfinished': journal.unfinished_batches() if journal else []})
+    return 0
+
+
+def cmd_resume(args: argparse.Namespace) -> int:
+    """Re-run the unfinished jobs of an interrupted batch"""
+    journal = open_job_journal()
+    if journal is None:
+        return 1
+    if args.batch_id is None:
+        unfinished = journal.unfinished_batches()
+        if not unfinished:
+            logging.error("No interrupted batches to resume")
+            return 2
+        args.batch_id = unfinished[0]['id']
+    batch = journal.get_batch(args.batch_id)
+    if batch is None:
+        logging.error(f"No batch with id {args.batch_id}")
+        return 2
+
+    params = batch.params
+    logging.info(f"Resuming {batch.kind} batch {batch.id}")
+    if batch.kind == 'convert':
+        return cmd_convert(argparse.Namespace(
+            inputs=[], recursive=False, output_folder=params['output_folder'],
+            format=parse_output_formats(params['output_format']), jobs=args.jobs, gpu=params['use_gpu'],
+            incremental=params['incremental'], cache=False, cache_max_mb=0,
+            chunk_min_seconds=CHUNKED_ENCODE_MIN_SECONDS, chunk_segments=0, resume_batch=batch))
+    return cmd_download(argparse.Namespace(
+        url=params['url'], output_folder=params['output_folder'], format=params['format_type'],
+        quality=params['quality'], playlist=params['playlist_action'] == 'playlist',
+        no_premiere_check=False, no_archive=False, jobs=args.jobs, resume_batch=batch))
+
+
+def cmd_cache(args: argparse.Namespace) -> int:
+    """Inspect or prune the conversion output cache"""
+    cache = open_conversion_cache(args.max_mb * 1024 * 1024)
+    if cache is None:
+        return 1
+
+    summary = {'command': 'cache', 'action': args.action}
+    if args.action == 'list':
+        summary['entries'] = cache.entries(args.limit)
+    elif args.action == 'prune':
+        summary['pruned'] = cache.prune(args.max_mb * 1024 * 1024)
+    elif args.action == 'clear':
+        summary['pruned'] = cache.clear()
+    summary['stats'] = cache.stats()
+    print_summary(summary)
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    """Run a conversion benchmark"""
+    if args.benchmark == 'progress':
+        # No ffmpeg involved: floods the progress bus the way parallel downloads do
+        summary = {'command': 'bench', 'benchmark': 'progress'}
+        summary.update(benchmark_progress_bus(args.rate, args.seconds, args.jobs or 4))
+        print_summary(summary)
+        return 0
+
+    ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
+    converter = MediaConverter(ffmpeg_path, ffprobe_path)
+    output_formats = parse_output_formats(args.format or [])
+
+    if args.benchmark == 'suite':
+        # Offline and CPU only: fixtures are generated, hardware encoders are never tried
+        results = benchmark_suite(converter, args.fixtures, parse_output_formats(args.input_format or []),
+                                  output_formats, args.quick, args.repeat)
+        if args.output:
+            save_bench_results(results, args.output)
+        summary = {'command': 'bench', 'benchmark': 'suite'}
+        summary.update(results)
+        if args.baseline:
+            summary['comparison'] = compare_bench_results(results, load_bench_results(args.baseline),
+                                                          args.threshold)
+        print_summary(summary)
+        regressed = bool(summary.get('comparison', {}).get('regressions'))
+        return 1 if results['failed'] or regressed else 0
+
+    input_files = collect_input_files(args.inputs or [])
+    if not input_files or not output_formats:
+        logging.error("The fanout, chunked and threads benchmarks need --in and --format")
+        return 2
+    if args.gpu:
+        start_hw_capability_detection(ffmpeg_path)
+
+    summary = {'command': 'bench', 'benchmark': args.benchmark}
+    if args.benchmark == 'fanout':
+        summary.update(benchmark_fanout(converter, input_files, output_formats, args.gpu, args.jobs, args.repeat))
+    elif args.benchmark == 'threads':
+        summary.update(benchmark_threads(converter, input_files, output_formats[0], args.jobs, args.repeat))
+    else:
+        summary.update(benchmark_chunked(converter, input_files, output_formats[0], args.chunk_segments,
+                                         args.repeat))
+    print_summary(summary)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line definition"""
+    parser = argparse.ArgumentParser(prog="cli", description="Lace's Total File Converter (headless)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    parser.add_argument("--staging-dir", default="",
+                        help="fast local folder for intermediate files (default: the system temp folder)")
+    parser.add_argument("--no-staging", action="store_true",
+                        help="write intermediate files next to the outputs")
+    parser.add_argument("--timings-file", default="",
+                        help=f"JSON-lines file for stage timings (default: {TIMINGS_FILE} next to the app)")
+    parser.add_argument("--no-timings", action="store_true", help="do not record stage timings")
+    parser.add_argument("--prometheus-textfile", default="",
+                        help="also write per-stage totals here in Prometheus text format "
+                             "(e.g. a node_exporter textfile collector directory/laces.prom)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="convert media files")
+    convert_parser.add_argument("--in", dest="inputs", action="append", required=True,
+                                help="input file or folder (repeatable)")
+    convert_parser.add_argument("--out", dest="output_folder", required=True, help="output folder")
+    convert_parser.add_argument("--format", required=True, nargs="+", choices=AUDIO_FORMATS + VIDEO_FORMATS,
+                                help="one or more output formats; several are encoded from a single decode")
+    convert_parser.add_argument("--jobs", type=int, default=0,
+                                help="parallel conversions (default: one per CPU core)")
+    convert_parser.add_argument("--gpu", action="store_true",
+                                help="use the best hardware encoder detected for this ffmpeg")
+    convert_parser.add_argument("--recursive", action="store_true", help="descend into subfolders")
+    convert_parser.add_argument("--incremental", action="store_true",
+                                help="skip files whose input, settings and output are unchanged since the last run")
+    convert_parser.add_argument("--cache", action="store_true",
+                                help="reuse identical earlier conversions from the shared output cache")
+    convert_parser.add_argument("--cache-max-mb", type=int, default=CONVERSION_CACHE_MAX_BYTES // 1024 // 1024,
+                                help="size cap of the output cache in MB")
+    convert_parser.add_argument("--chunk-min-seconds", type=float, default=CHUNKED_ENCODE_MIN_SECONDS,
+                                help="encode CPU video jobs at least this long in parallel segments (0 = never)")
+    convert_parser.add_argument("--chunk-segments", type=int, default=0,
+                                help="segments per chunked encode (default: half the CPU cores)")
+    convert_parser.set_defaults(func=cmd_convert)
+
+    download_parser = subparsers.add_parser("download", help="download a video or playlist")
+    download_parser.add_argument("--url", required=True)
+    download_parser.add_argument("--out", dest="output_folder", required=True, help="output folder")
+    download_parser.add_argument("--format", default="mp4", choices=AUDIO_FORMATS + VIDEO_FORMATS)
+    download_parser.add_argument("--quality", default="1080p",
+                                 help="Best/4K/1440p/1080p/720p/480p, or e.g. 256kb/s for audio")
+    download_parser.add_argument("--playlist", action="store_true", help="download the whole playlist")
+    download_parser.add_argument("--no-premiere-check", action="store_true",
+                                 help="skip the H.264 compatibility pass for mp4")
+    download_parser.add_argument("--jobs", type=int, default=0,
+                                 help="playlist items downloaded at once (1 = one after another, 0 = default)")
+    download_parser.add_argument("--no-archive", action="store_true",
+                                 help="download every playlist item, even ones already in the output folder")
+    download_parser.set_defaults(func=cmd_download)
+
+    watch_parser = subparsers.add_parser("watch", help="convert files as they arrive in watched folders")
+    watch_parser.add_argument("--in", dest="inputs", action="append", required=True,
+                              help="folder to watch (repeatable)")
+    watch_parser.add_argument("--out", dest="output_folder", required=True,
+                              help="output folder (subfolders of the watched folder are mirrored)")
+    watch_parser.add_argument("--format", required=True, nargs="+", choices=AUDIO_FORMATS + VIDEO_FORMATS)
+    watch_parser.add_argument("--jobs", type=int, default=0, help="parallel conversions per arrival batch")
+    watch_parser.add_argument("--gpu", action="store_true", help="try hardware encoders for video")
+    watch_parser.add_argument("--recursive", action="store_true", help="watch subfolders too")
+    watch_parser.add_argument("--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+                              help="a file is converted once its size and mtime have not changed for this long")
+    watch_parser.add_argument("--poll", action="store_true",
+                              help="poll instead of using inotify (needed for network shares)")
+    watch_parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                              help="seconds between polls")
+    watch_parser.add_argument("--new-only", action="store_true",
+                              help="ignore files already in the folders at startup")
+    watch_parser.add_argument("--duration", type=float, default=0,
+                              help="stop after this many seconds (default: run until interrupted)")
+    watch_parser.add_argument("--cache", action="store_true", help="reuse identical earlier conversions")
+    watch_parser.add_argument("--cache-max-mb", type=int, default=CONVERSION_CACHE_MAX_BYTES // 1024 // 1024,
+                              help="size cap of the output cache in MB")
+    watch_parser.add_argument("--chunk-min-seconds", type=float, default=CHUNKED_ENCODE_MIN_SECONDS,
+                              help="encode CPU video jobs at least this long in parallel segments (0 = never)")
+    watch_parser.add_argument("--chunk-segments", type=int, default=0, help="segments per chunked encode")
+    watch_parser.set_defaults(func=cmd_watch)
+
+    caps_parser = subparsers.add_parser("caps", help="show detected hardware encoders")
+    caps_parser.add_argument("--ffmpeg", help="ffmpeg binary to inspect (default: the bundled one)")
+    caps_parser.add_argument("--refresh", action="store_true", help="ignore the saved detection result")
+    caps_parser.set_defaults(func=cmd_caps)
+
+    tune_parser = subparsers.add_parser("tune", help="measure encoder presets on your videos and keep the fastest good one")
+    tune_parser.add_argument("--in", dest="inputs", action="append", help="sample file or folder (repeatable)")
+    tune_parser.add_argument("--format", nargs="+", choices=VIDEO_FORMATS, help="output formats to tune")
+    tune_parser.add_argument("--recursive", action="store_true", help="descend into subfolders")
+    tune_parser.add_argument("--min-ssim", type=float, default=DEFAULT_MIN_SSIM,
+                             help="quality floor: worst sample SSIM a setting must reach")
+    tune_parser.add_argument("--min-psnr", type=float, help="optional extra floor on average PSNR (dB)")
+    tune_parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLE_COUNT, help="videos to sample")
+    tune_parser.add_argument("--sample-seconds", type=float, default=DEFAULT_SAMPLE_SECONDS,
+                             help="length of each sample clip")
+    tune_parser.add_argument("--dry-run", action="store_true", help="measure and report, but keep current settings")
+    tune_parser.add_argument("--reset", action="store_true", help="forget tuned settings, back to the defaults")
+    tune_parser.set_defaults(func=cmd_tune)
+
+    batches_parser = subparsers.add_parser("batches", help="list interrupted batches that can be resumed")
+    batches_parser.set_defaults(func=cmd_batches)
+
+    resume_parser = subparsers.add_parser("resume", help="finish an interrupted conversion or download")
+    resume_parser.add_argument("batch_id", type=int, nargs="?", help="batch to resume (default: the newest)")
+    resume_parser.add_argument("--jobs", type=int, default=0,
+                               help="parallel conversions, or playlist items downloaded at once")
+    resume_parser.set_defaults(func=cmd_resume)
+
+    cache_parser = subparsers.add_parser("cache", help="inspect or prune the conversion output cache")
+    cache_parser.add_argument("action", choices=["stats", "list", "prune", "clear"])
+    cache_parser.add_argument("--limit", type=int, default=50, help="entries to show for 'list'")
+    cache_parser.add_argument("--max-mb", type=int, default=CONVERSION_CACHE_MAX_BYTES // 1024 // 1024,
+                              help="size cap in MB; 'prune' evicts least recently used entries above it")
+    cache_parser.set_defaults(func=cmd_cache)
+
+    timings_parser = subparsers.add_parser("timings", help="summarize recorded stage timings")
+    timings_parser.add_argument("--job", help="only this job (ids are in download summaries and the file)")
+    timings_parser.add_argument("--latest", action="store_true", help="only the most recent job")
+    timings_parser.set_defaults(func=cmd_timings)
+
+    bench_parser = subparsers.add_parser("bench", help="measure conversion strategies against each other")
+    bench_parser.add_argument("benchmark", choices=["fanout", "chunked", "threads", "suite", "progress"],
+                              help="fanout: one decode for all formats vs one run per format; "
+                                   "chunked: parallel segments vs one encoder process (first --format); "
+                                   "threads: parallel encodes with vs without the shared thread budget; "
+                                   "suite: every format pair on generated fixtures, offline and CPU only; "
+                                   "progress: UI redraws under a synthetic progress event flood")
+    bench_parser.add_argument("--in", dest="inputs", action="append",
+                              help="input file or folder (repeatable; fanout, chunked and threads)")
+    bench_parser.add_argument("--format", nargs="+", choices=AUDIO_FORMATS + VIDEO_FORMATS,
+                              help="output formats (suite: limit the pairs, default all)")
+    bench_parser.add_argument("--input-format", nargs="+", choices=AUDIO_FORMATS + VIDEO_FORMATS,
+                              help="suite: fixture formats to convert from (default all)")
+    bench_parser.add_argument("--quick", action="store_true", help="suite: only the shortest fixtures")
+    bench_parser.add_argument("--fixtures", help="suite: folder to keep generated fixtures in between runs")
+    bench_parser.add_argument("--output", help="suite: write the results JSON here")
+    bench_parser.add_argument("--baseline", help="suite: results JSON of an earlier run to compare against")
+    bench_parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                              help="suite: slowdown (fraction) that counts as a regression")
+    bench_parser.add_argument("--jobs", type=int, default=0,
+                              help="parallel conversions (progress: publishing threads, default 4)")
+    bench_parser.add_argument("--gpu", action="store_true", help="allow hardware encoders")
+    bench_parser.add_argument("--repeat", type=int, default=3,
+                              help="runs per strategy or pair (best is reported)")
+    bench_parser.add_argument("--chunk-segments", type=int, default=0, help="segments for the chunked run")
+    bench_parser.add_argument("--rate", type=int, default=10000, help="progress: events per second to publish")
+    bench_parser.add_argument("--seconds", type=float, default=3.0, help="progress: how long to publish")
+    bench_parser.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Logs go to stderr so stdout stays pure JSON
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    configure_staging(args.staging_dir, not args.no_staging)
+    if args.command != 'timings':
+        configure_timings(args.timings_file or get_absolute_path(TIMINGS_FILE), args.prometheus_textfile,
+                          not args.no_timings)
+    try:
+        return args.func(args)
+    except FileNotFoundError as e:
+        logging.error(str(e))
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Content-addressed store of conversion outputs, shared by every batch and folder.
+# An entry is keyed by the input's content hash plus the exact ffmpeg command plan,
+# so the same clip under another name or folder is linked instead of re-encoded.
+# Stdlib only so converter.py can import it freely.
+
+CONVERSION_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """BLAKE2b digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_plan(plan: List[Tuple[str, List[str]]], input_path: str, output_path: str) -> List[List[str]]:
+    """Command plan with the binary and file paths replaced by placeholders"""
+    normalized = []
+    for label, cmd in plan:
+        args = [{input_path: "{input}", output_path: "{output}"}.get(arg, arg) for arg in cmd[1:]]
+        normalized.append([label] + args)
+    return normalized
+
+
+def link_or_copy(source: str, destination: str) -> str:
+    """Hard-link source to destination (copying across filesystems), replacing it atomically"""
+    temp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, temp_path)
+        method = 'link'
+    except OSError:
+        shutil.copy2(source, temp_path)
+        method = 'copy'
+    try:
+        os.replace(temp_path, destination)
+    except OSError:
+        os.remove(temp_path)
+        raise
+    return method
+
+
+class ConversionCache:
+    """
+    Output cache under cache_dir: objects/<xx>/<key>.<ext> plus an SQLite index.
+    Least recently used objects are evicted once their total size exceeds max_bytes.
+    Content hashes are memoized per (path, size, mtime) so unchanged inputs hash once.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = CONVERSION_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), timeout=10,
+                                     check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, object TEXT NOT NULL, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, source_name TEXT, created REAL NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "digest TEXT NOT NULL)"
+            )
+
+    def content_hash(self, path: str) -> str:
+        """Content hash of a file, reusing the memo while size and mtime are unchanged"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+
+        digest = hash_file(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest)
+            )
+        return digest
+
+    def make_key(self, input_path: str, output_path: str, plan: List[Tuple[str, List[str]]],
+                 version: int = 0) -> str:
+        """Cache key for converting input_path with this command plan"""
+        material = {
+            'version': version,
+            'input': self.content_hash(input_path),
+            'plan': normalize_plan(plan, input_path, output_path)
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _object_path(self, key: str, output_path: str) -> str:
+        extension = os.path.splitext(output_path)[1].lower()
+        return os.path.join(self.cache_dir, 'objects', key[:2], key + extension)
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Place the cached output for key at output_path; False on a miss"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT object, size, mtime_ns FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return False
+
+        object_path = os.path.join(self.cache_dir, row[0])
+        try:
+            stat = os.stat(object_path)
+            # A hard-linked output edited in place would change the shared object too
+            if stat.st_size != row[1] or stat.st_mtime_ns != row[2]:
+                raise OSError("cached object was modified")
+            method = link_or_copy(object_path, output_path)
+        except OSError as e:
+            logging.warning(f"Dropping unusable conversion cache entry {key[:12]}: {e}")
+            self._remove(key, object_path)
+            with self._lock:
+                self.misses += 1
+            return False
+
+        with self._lock, self._conn:
+            self.hits += 1
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        logging.info(f"Conversion cache hit ({method}): {os.path.basename(output_path)}")
+        return True
+
+    def store(self, key: str, output_path: str, source_name: Optional[str] = None) -> bool:
+        """Add a finished output to the cache, then evict down to max_bytes"""
+        object_path = self._object_path(key, output_path)
+        try:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            link_or_copy(output_path, object_path)
+            stat = os.stat(object_path)
+        except OSError as e:
+            logging.error(f"Could not add {output_path} to the conversion cache: {e}")
+            return False
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, object, size, mtime_ns, source_name, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, os.path.relpath(object_path, self.cache_dir), stat.st_size, stat.st_mtime_ns,
+                 source_name, now, now)
+            )
+        self.prune(self.max_bytes)
+        return True
+
+    def _remove(self, key: str, object_path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(object_path)
+        except OSError:
+            pass
+
+    def prune(self, max_bytes: int) -> Dict[str, int]:
+        """Evict least recently used objects until the cache fits in max_bytes"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, object, size FROM entries ORDER BY last_used DESC"
+            ).fetchall()
+
+        kept_bytes = 0
+        evicted = []
+        for key, object_name, size in rows:
+            if kept_bytes + size <= max_bytes:
+                kept_bytes += size
+            else:
+                evicted.append((key, object_name, size))
+
+        for key, object_name, _ in evicted:
+            self._remove(key, os.path.join(self.cache_dir, object_name))
+        if evicted:
+            logging.info(f"Conversion cache evicted {len(evicted)} entries "
+                         f"({sum(e[2] for e in evicted) / 1024 / 1024:.1f} MB)")
+        return {'evicted': len(evicted), 'freed_bytes': sum(e[2] for e in evicted), 'kept_bytes': kept_bytes}
+
+    def clear(self) -> Dict[str, int]:
+        """Drop every cached output"""
+        return self.prune(0)
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Cached outputs, most recently used first"""
+        query = "SELECT key, object, size, source_name, created, last_used FROM entries ORDER BY last_used DESC"
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{'key': row[0], 'object': row[1], 'size': row[2], 'source_name': row[3],
+                 'created': row[4], 'last_used': row[5]} for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the stored size"""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries,
+                'total_bytes': total_bytes, 'max_bytes': self.max_bytes, 'cache_dir': self.cache_dir}
@@ -0,0 +1,1056 @@
+import os
+import sys
+import json
+import time
+import logging
+import sqlite3
+import threading
+import subprocess
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from probe import probe_media, get_probe_cache, get_streams, get_duration
+from ffmpeg_progress import run_ffmpeg_with_progress, log_throughput
+from hwcaps import capability_detector, select_video_encoder, VAAPI_DEVICE
+from conversion_cache import ConversionCache, CONVERSION_CACHE_MAX_BYTES
+from chunked import chunked_encode, get_segment_count, CHUNKED_ENCODE_MIN_SECONDS
+from journal import get_job_journal, JournalBatch, JOURNAL_FILE
+from threadbudget import get_thread_budget, get_video_encoders, apply_thread_args
+from staging import stage_outputs, get_staging_area
+from timings import span, flush_timings
+from scheduler import (
+    get_scheduler, RESOURCE_DISK, RESOURCE_CPU_ENCODE, RESOURCE_HW_ENCODE,
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL
+)
+
+# This module must stay free of GUI, audio playback and font imports so that
+# the headless CLI (cli.py) can reuse it on machines without a display.
+
+# Media Constants
+AUDIO_FORMATS = ["wav", "ogg", "flac", "mp3", "m4a"]
+VIDEO_FORMATS = ["mp4", "avi", "mov", "mkv", "webm", "flv"]
+DEFAULT_BITRATE = "192k"
+DEFAULT_CONVERSION_WORKERS = os.cpu_count() or 1
+PROBE_CACHE_FILE = "probe_cache.sqlite3"
+HW_CAPABILITIES_FILE = "hw_capabilities.json"
+CONVERSION_CACHE_DIR = "conversion_cache"
+ENCODER_TUNING_FILE = "encoder_tuning.json"
+PCM_BYTES_PER_SECOND = 48000 * 2 * 2  # 16-bit stereo at 48 kHz, for output size estimates
+# Bump whenever the ffmpeg commands below change, so incremental batches re-convert
+ENCODER_SETTINGS_VERSION = 1
+
+# Software video encoder and its rate/speed options per output container.
+# The options can be overridden per format by `python -m cli tune` (see tuning.py).
+CPU_VIDEO_ENCODERS = {"mp4": "libx264", "mov": "libx264", "mkv": "libx264", "flv": "libx264",
+                      "webm": "libvpx-vp9", "avi": "mpeg4"}
+DEFAULT_CPU_VIDEO_SETTINGS = {
+    "libx264": {"-preset": "medium", "-crf": "23"},
+    "libvpx-vp9": {"-crf": "30", "-b:v": "0"},
+    "mpeg4": {"-q:v": "5"},
+}
+
+# Hardware H.264 arguments per encoder backend (see hwcaps.HW_ENCODER_BACKENDS).
+# "input" goes before -i, "filter" after it; "quality" is the general preset and
+# "flv" the constrained-bitrate variant used for FLV output.
+HW_VIDEO_ARGS = {
+    "nvenc": {"input": ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"],
+              "filter": [],
+              "quality": ["-c:v", "h264_nvenc", "-preset", "p1", "-tune", "hq",
+                          "-rc", "vbr", "-cq", "23", "-b:v", "0", "-maxrate", "130M",
+                          "-bufsize", "130M", "-spatial-aq", "1"],
+              "flv": ["-c:v", "h264_nvenc", "-preset", "p1",
+                      "-profile:v", "main", "-level", "3.1",
+                      "-b:v", "2M", "-maxrate", "2.5M", "-bufsize", "4M"]},
+    "qsv": {"input": [],
+            "filter": [],
+            "quality": ["-c:v", "h264_qsv", "-preset", "faster", "-global_quality", "23"],
+            "flv": ["-c:v", "h264_qsv", "-preset", "faster", "-profile:v", "main",
+                    "-b:v", "2M", "-maxrate", "2.5M", "-bufsize", "4M"]},
+    "amf": {"input": [],
+            "filter": [],
+            "quality": ["-c:v", "h264_amf", "-quality", "speed", "-rc", "cqp", "-qp_i", "23", "-qp_p", "23"],
+            "flv": ["-c:v", "h264_amf", "-quality", "speed", "-profile:v", "main",
+                    "-b:v", "2M", "-maxrate", "2.5M", "-bufsize", "4M"]},
+    "vaapi": {"input": ["-vaapi_device", VAAPI_DEVICE],
+              "filter": ["-vf", "format=nv12,hwupload"],
+              "quality": ["-c:v", "h264_vaapi", "-qp", "23"],
+              "flv": ["-c:v", "h264_vaapi", "-profile:v", "main", "-b:v", "2M", "-maxrate", "2.5M"]},
+}
+
+# Codecs each output container can hold as-is, per stream type.
+# Deliberately conservative: only combinations players and editors handle well.
+REMUX_COMPATIBLE_CODECS = {
+    "mp4": {"video": {"h264", "hevc", "mpeg4", "av1"},
+            "audio": {"aac", "mp3", "alac", "ac3", "eac3"},
+            "subtitle": {"mov_text"}},
+    "mov": {"video": {"h264", "hevc", "mpeg4", "prores", "mjpeg"},
+            "audio": {"aac", "mp3", "alac", "pcm_s16le", "pcm_s24le"},
+            "subtitle": {"mov_text"}},
+    "mkv": {"video": {"h264", "hevc", "mpeg4", "mpeg2video", "vp8", "vp9", "av1", "theora"},
+            "audio": {"aac", "mp3", "opus", "vorbis", "flac", "ac3", "eac3", "dts", "alac", "pcm_s16le"},
+            "subtitle": {"subrip", "ass", "ssa", "webvtt", "hdmv_pgs_subtitle", "dvd_subtitle"}},
+    "webm": {"video": {"vp8", "vp9", "av1"},
+             "audio": {"opus", "vorbis"},
+             "subtitle": {"webvtt"}},
+    "avi": {"video": {"mpeg4", "msmpeg4v3", "mjpeg"},
+            "audio": {"mp3", "ac3", "pcm_s16le"},
+            "subtitle": set()},
+    "flv": {"video": {"h264", "flv1"},
+            "audio": {"aac", "mp3"},
+            "subtitle": set()},
+}
+
+# Messages
+MSG_AUDIO_TO_VIDEO_ERROR = "Converting an audio file to a video file is literally not a thing."
+
+
+def resource_path(relative_path: str) -> str:
+    """Get absolute path to resource, works for dev and for PyInstaller"""
+    try:
+        if getattr(sys, 'frozen', False):
+            base_path = sys._MEIPASS
+        else:
+            base_path = os.path.dirname(os.path.abspath(__file__))
+    except Exception:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+
+    return os.path.join(base_path, relative_path)
+
+
+def get_absolute_path(relative_path: str) -> str:
+    """Get absolute path to file that needs to be written to"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, relative_path)
+
+
+def get_subprocess_kwargs() -> Dict[str, Any]:
+    """Extra subprocess.run arguments that keep console windows hidden on Windows"""
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.CREATE_NO_WINDOW}
+    return {}
+
+
+# FFmpeg handling
+def get_ffmpeg_path() -> str:
+    """Get the path to FFmpeg executable"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+        ffmpeg_path = os.path.join(base_path, 'ffmpeg.exe')
+        if not os.path.exists(ffmpeg_path):
+            logging.error(f"FFmpeg not found at {ffmpeg_path}")
+            ffmpeg_path = resource_path('ffmpeg.exe')
+            if not os.path.exists(ffmpeg_path):
+                raise FileNotFoundError("FFmpeg executable not found in application bundle")
+        return ffmpeg_path
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        ffmpeg_path = os.path.join(base_path, 'dist', 'ffmpeg', 'bin', 'ffmpeg.exe')
+        if not os.path.exists(ffmpeg_path):
+            ffmpeg_path = os.path.join(base_path, 'ffmpeg.exe')
+            if not os.path.exists(ffmpeg_path):
+                from shutil import which
+                system_ffmpeg = which('ffmpeg.exe') or which('ffmpeg')
+                if system_ffmpeg:
+                    return system_ffmpeg
+                raise FileNotFoundError("FFmpeg not found in expected development location or system PATH.")
+        return ffmpeg_path
+
+
+def get_ffmpeg_paths() -> Tuple[str, str]:
+    """Locate FFmpeg and FFprobe"""
+    ffmpeg_path = get_ffmpeg_path()
+    if getattr(sys, 'frozen', False):
+        ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
+        if not os.path.exists(ffprobe_path):
+            ffprobe_path = resource_path('ffprobe.exe')
+    else:
+        if sys.platform == 'win32':
+            from shutil import which
+            ffprobe_path = which('ffprobe.exe')
+            if not ffprobe_path:
+                ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
+                if not os.path.exists(ffprobe_path):
+                    raise FileNotFoundError("FFprobe not found in PATH")
+        else:
+            ffprobe_path = "ffprobe"
+
+    if not os.path.exists(ffmpeg_path):
+        raise FileNotFoundError(f"FFmpeg not found at: {ffmpeg_path}")
+    if sys.platform == 'win32' and not os.path.exists(ffprobe_path):
+        raise FileNotFoundError(f"FFprobe not found at: {ffprobe_path}")
+
+    return ffmpeg_path, ffprobe_path
+
+
+def get_ffprobe_path() -> Optional[str]:
+    """Locate FFprobe, or None if it is not available"""
+    try:
+        return get_ffmpeg_paths()[1]
+    except FileNotFoundError as e:
+        logging.warning(f"FFprobe unavailable: {e}")
+        return None
+
+
+def start_hw_capability_detection(ffmpeg_path: str) -> None:
+    """Kick off background encoder detection so it is ready before the first GPU encode"""
+    capability_detector.start(ffmpeg_path, get_absolute_path(HW_CAPABILITIES_FILE))
+
+
+def get_hw_capabilities(ffmpeg_path: Optional[str] = None) -> Dict[str, Any]:
+    """Detected encoder capabilities for this ffmpeg build (waits for detection if running)"""
+    return capability_detector.get(ffmpeg_path or get_ffmpeg_path(), get_absolute_path(HW_CAPABILITIES_FILE))
+
+
+_encoder_tuning = None
+_encoder_tuning_lock = threading.Lock()
+
+
+def load_encoder_tuning(refresh: bool = False, tuning_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Persisted per-format encoder choices from the tuner ({} when never tuned).
+    A refresh re-reads tuning_file (default: ENCODER_TUNING_FILE next to the app).
+    """
+    global _encoder_tuning
+    with _encoder_tuning_lock:
+        if _encoder_tuning is None or refresh:
+            _encoder_tuning = {}
+            tuning_file = tuning_file or get_absolute_path(ENCODER_TUNING_FILE)
+            if os.path.exists(tuning_file):
+                try:
+                    with open(tuning_file, 'r') as f:
+                        _encoder_tuning = json.load(f).get('formats', {})
+                except (OSError, ValueError, AttributeError) as e:
+                    logging.warning(f"Ignoring unreadable encoder tuning file: {e}")
+        return _encoder_tuning
+
+
+def get_cpu_video_settings(output_format: str) -> Dict[str, str]:
+    """Rate/speed options of the software encoder for a container: tuned if available, else the defaults"""
+    output_format = output_format.lower()
+    encoder = CPU_VIDEO_ENCODERS.get(output_format, "libx264")
+    tuned = load_encoder_tuning().get(output_format)
+    if tuned and tuned.get('encoder') == encoder and tuned.get('settings'):
+        return dict(tuned['settings'])
+    return dict(DEFAULT_CPU_VIDEO_SETTINGS[encoder])
+
+
+def open_conversion_cache(max_bytes: int = CONVERSION_CACHE_MAX_BYTES,
+                          cache_dir: Optional[str] = None) -> Optional[ConversionCache]:
+    """The shared conversion output cache next to the app, or None if it cannot be opened"""
+    cache_dir = cache_dir or get_absolute_path(CONVERSION_CACHE_DIR)
+    try:
+        return ConversionCache(cache_dir, max_bytes)
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Could not open conversion cache at {cache_dir}: {e}")
+        return None
+
+
+def open_job_journal():
+    """The shared crash-safe job journal next to the app, or None if it cannot be opened"""
+    return get_job_journal(get_absolute_path(JOURNAL_FILE))
+
+
+def probe_file(input_path: str, ffprobe_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Probe a file through the shared on-disk probe cache"""
+    ffprobe_path = ffprobe_path or get_ffprobe_path()
+    if not ffprobe_path:
+        return None
+    cache = get_probe_cache(get_absolute_path(PROBE_CACHE_FILE))
+    with span('probe', file=os.path.basename(input_path)):
+        return probe_media(input_path, ffprobe_path, cache)
+
+
+def run_ffmpeg(cmd: List[str], input_path: Optional[str] = None,
+               progress_callback=None) -> Dict[str, Any]:
+    """
+    Run an ffmpeg command with a live progress channel.
+    progress_callback(snapshot) receives fraction/fps/speed updates; the fraction is
+    weighted by the input's duration from the probe cache.
+    """
+    duration = get_duration(probe_file(input_path)) if input_path else None
+    if get_video_encoders(cmd):
+        # Software video encodes get their share of the cores instead of one thread per core each
+        with get_thread_budget().lease() as threads:
+            if threads:
+                cmd = apply_thread_args(cmd, threads)
+            stats = run_ffmpeg_with_progress(cmd, duration, progress_callback, get_subprocess_kwargs())
+    else:
+        stats = run_ffmpeg_with_progress(cmd, duration, progress_callback, get_subprocess_kwargs())
+    log_throughput(os.path.basename(input_path or cmd[-1]), stats)
+    return stats
+
+
+# File handling utilities
+def safe_filename(filepath: str) -> str:
+    """Ensure filename is safe for the filesystem"""
+    import string
+    allowed_chars = string.ascii_letters + string.digits + " ._-()"
+    directory, filename = os.path.split(filepath)
+    base, ext = os.path.splitext(filename)
+    safe_base = ''.join(ch if ch in allowed_chars else '_' for ch in base)
+
+    if not safe_base:
+        safe_base = "file"
+
+    safe_name = safe_base + ext
+    if safe_name != filename:
+        new_path = os.path.join(directory, safe_name)
+        count = 1
+        while os.path.exists(new_path):
+            new_path = os.path.join(directory, f"{safe_base}_{count}{ext}")
+            count += 1
+        try:
+            os.rename(filepath, new_path)
+            return new_path
+        except PermissionError:
+            return filepath
+    return filepath
+
+
+# Media conversion classes and functions
+class MediaConverter:
+    """Handles media file conversions"""
+
+    def __init__(self, ffmpeg_path: str, ffprobe_path: Optional[str] = None,
+                 chunked_min_duration: float = CHUNKED_ENCODE_MIN_SECONDS, chunked_segments: int = 0):
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        # CPU video encodes at least this long (seconds) are split into parallel segments; 0 = never
+        self.chunked_min_duration = chunked_min_duration
+        self.chunked_segments = chunked_segments
+
+    def validate_conversion(self, input_format: str, output_format: str) -> Tuple[bool, Optional[str]]:
+        """Validate if conversion is allowed"""
+        if input_format in AUDIO_FORMATS and output_format in VIDEO_FORMATS:
+            return False, MSG_AUDIO_TO_VIDEO_ERROR
+        return True, None
+
+    def check_video_has_audio(self, input_path: str) -> bool:
+        """Check if video file contains audio stream"""
+        probe = probe_file(input_path, self.ffprobe_path)
+        if probe is not None:
+            return bool(get_streams(probe, "audio"))
+
+        # No ffprobe available - fall back to parsing ffmpeg's banner
+        probe_cmd = [self.ffmpeg_path, "-i", input_path, "-hide_banner"]
+        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=False)
+        return "Stream #0" in probe_result.stderr and "Audio:" in probe_result.stderr
+
+    def get_audio_conversion_args(self, output_format: str) -> List[str]:
+        """Get FFmpeg arguments for audio conversion"""
+        args_map = {
+            "mp3": ["-acodec", "libmp3lame", "-q:a", "2", "-b:a", DEFAULT_BITRATE],
+            "ogg": ["-acodec", "libvorbis", "-q:a", "6"],
+            "flac": ["-acodec", "flac"],
+            "wav": ["-acodec", "pcm_s16le"],
+            "m4a": ["-acodec", "aac", "-b:a", DEFAULT_BITRATE]
+        }
+        return args_map.get(output_format, [])
+
+    def get_encoding_signature(self, input_format: str, output_format: str, use_gpu: bool) -> Dict[str, Any]:
+        """Everything that decides how a file is encoded, for incremental batch checks"""
+        signature = {
+            'version': ENCODER_SETTINGS_VERSION,
+            'output_format': output_format
+        }
+        if input_format in VIDEO_FORMATS and output_format in VIDEO_FORMATS:
+            signature['use_gpu'] = use_gpu
+            cpu_settings = get_cpu_video_settings(output_format)
+            # Only tuned settings are recorded, so untuned setups keep matching older manifests
+            if cpu_settings != DEFAULT_CPU_VIDEO_SETTINGS[CPU_VIDEO_ENCODERS.get(output_format, "libx264")]:
+                signature['cpu_video_settings'] = cpu_settings
+        else:
+            signature['audio_args'] = self.get_audio_conversion_args(output_format)
+        return signature
+
+    def plan_commands(self, input_path: str, output_path: str, input_format: str,
+                      output_format: str, use_gpu: bool) -> List[Tuple[str, List[str]]]:
+        """Exact ffmpeg commands for a conversion, in the order they will be tried"""
+        # Video to Video
+        if input_format in VIDEO_FORMATS and output_format in VIDEO_FORMATS:
+            return plan_video_commands(self.ffmpeg_path, input_path, output_path, output_format, use_gpu)
+
+        # Build FFmpeg command
+        ffmpeg_cmd = [self.ffmpeg_path, "-i", input_path, "-y"]
+
+        # Video to Audio
+        if input_format in VIDEO_FORMATS and output_format in AUDIO_FORMATS:
+            if not self.check_video_has_audio(input_path):
+                raise ValueError("Video file has no audio track")
+            ffmpeg_cmd.append("-vn")  # No video
+
+        # Add format-specific arguments
+        ffmpeg_cmd.extend(self.get_audio_conversion_args(output_format))
+        ffmpeg_cmd.append(output_path)
+        return [("audio", ffmpeg_cmd)]
+
+    def try_chunked_encode(self, input_path: str, output_path: str, plan: List[Tuple[str, List[str]]],
+                           progress_callback=None) -> bool:
+        """Encode a long video in keyframe-aligned parallel segments when it is worth it"""
+        # Only plain CPU encodes: remux is already fast and hardware encoders are not shared
+        if not self.chunked_min_duration or plan[0][0] != "cpu":
+            return False
+        segments = get_segment_count(self.chunked_segments)
+        probe = probe_file(input_path, self.ffprobe_path)
+        duration = get_duration(probe)
+        if segments < 2 or duration < self.chunked_min_duration or not get_streams(probe, "video"):
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            chunked_encode(self.ffmpeg_path, input_path, output_path, plan[0][1], duration, segments,
+                           has_audio=bool(get_streams(probe, "audio")), progress_callback=progress_callback)
+            return True
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            details = e.stderr.strip()[-200:] if isinstance(e, subprocess.CalledProcessError) and e.stderr else e
+            logging.info(f"Chunked encode failed for {os.path.basename(input_path)}, "
+                         f"encoding in one piece: {details}")
+            return False
+
+    def convert_single_file(self, input_path: str, output_path: str,
+                            input_format: str, output_format: str, use_gpu: bool,
+                            progress_callback=None, plan=None) -> bool:
+        """Convert a single file"""
+        try:
+            with span('convert', file=os.path.basename(input_path), format=output_format):
+                if plan is None:
+                    with span('plan', file=os.path.basename(input_path)):
+                        plan = self.plan_commands(input_path, output_path, input_format, output_format, use_gpu)
+                with span('encode', file=os.path.basename(input_path), format=output_format) as encode:
+                    if self.try_chunked_encode(input_path, output_path, plan, progress_callback):
+                        encode['path'] = 'chunked'
+                        return True
+                    encode['path'] = run_command_plan(plan, input_path, output_path, progress_callback)
+                return True
+
+        except subprocess.CalledProcessError as e:
+            logging.error(f"FFmpeg conversion failed: {e}")
+            raise
+        except Exception as e:
+            logging.error(f"Conversion error: {e}")
+            raise
+
+
+def get_remux_blockers(probe: Optional[Dict[str, Any]], output_format: str) -> List[str]:
+    """
+    Reasons why the input cannot simply be stream-copied into output_format.
+    An empty list means every stream is legal in the target container.
+    """
+    allowed = REMUX_COMPATIBLE_CODECS.get(output_format.lower())
+    if allowed is None:
+        return [f"no remux table for {output_format}"]
+    if not probe:
+        return ["input could not be probed"]
+
+    streams = get_streams(probe)
+    if not get_streams(probe, "video"):
+        return ["input has no video stream"]
+
+    blockers = []
+    for stream in streams:
+        codec_type = stream.get("codec_type", "unknown")
+        codec_name = stream.get("codec_name", "unknown")
+        if codec_type not in allowed:
+            blockers.append(f"{codec_type} stream #{stream.get('index')} ({codec_name})")
+        elif stream.get("disposition", {}).get("attached_pic"):
+            blockers.append(f"cover art stream #{stream.get('index')} ({codec_name})")
+        elif codec_name not in allowed[codec_type]:
+            blockers.append(f"{codec_type} codec {codec_name}")
+    return blockers
+
+
+def build_remux_command(ffmpeg_path: str, input_path: str, output_path: str, output_format: str) -> List[str]:
+    """Copy every stream into a new container without re-encoding"""
+    remux_cmd = [ffmpeg_path, "-i", input_path, "-map", "0", "-c", "copy"]
+    if output_format.lower() in ("mp4", "mov"):
+        remux_cmd.extend(["-movflags", "+faststart"])
+    remux_cmd.extend(["-y", output_path])
+    return remux_cmd
+
+
+def build_hw_video_command(ffmpeg_path: str, input_path: str, output_path: str,
+                           output_format: str, capabilities: Dict[str, Any]) -> Optional[List[str]]:
+    """Hardware-accelerated command for the best available backend, or None if there is none"""
+    selection = select_video_encoder(capabilities, use_gpu=True)
+    backend = selection['backend']
+    if backend not in HW_VIDEO_ARGS:
+        return None
+
+    output_format = output_format.lower()
+    if output_format == "avi":
+        # AVI stays MPEG-4 Part 2; only CUDA decoding is accelerated
+        if backend != "nvenc" or "cuda" not in capabilities.get('hwaccels', []):
+            return None
+        return [ffmpeg_path, "-hwaccel", "cuda", "-i", input_path,
+                "-c:v", "mpeg4", "-q:v", "5", "-c:a", "mp3", "-y", output_path]
+
+    args = HW_VIDEO_ARGS[backend]
+    cmd = [ffmpeg_path] + args["input"] + ["-i", input_path] + args["filter"]
+    if output_format == "flv":
+        cmd += args["flv"] + ["-c:a", "aac", "-b:a", "128k", "-f", "flv", "-y", output_path]
+    else:
+        cmd += args["quality"] + ["-c:a", "aac", "-b:a", DEFAULT_BITRATE, "-y", output_path]
+    logging.info(f"Using {selection['encoder']} ({backend}) for {os.path.basename(input_path)}")
+    return cmd
+
+
+def build_cpu_video_command(ffmpeg_path: str, input_path: str, output_path: str,
+                            output_format: str, settings: Optional[Dict[str, str]] = None) -> List[str]:
+    """Software encode for the target container (settings: encoder options, default tuned/built-in)"""
+    output_format = output_format.lower()
+    settings = settings if settings is not None else get_cpu_video_settings(output_format)
+    video_args = ["-c:v", CPU_VIDEO_ENCODERS.get(output_format, "libx264")]
+    if output_format == "flv":
+        video_args += ["-profile:v", "main", "-level", "3.1"]
+    for option, value in settings.items():
+        video_args += [option, str(value)]
+
+    if output_format == "webm":
+        return [ffmpeg_path, "-i", input_path] + video_args + [
+            "-c:a", "libopus", "-b:a", "128k",
+            "-y", output_path]
+    if output_format == "avi":
+        return [ffmpeg_path, "-i", input_path] + video_args + ["-c:a", "mp3", "-y", output_path]
+    if output_format == "flv":
+        return [ffmpeg_path, "-i", input_path] + video_args + [
+            "-c:a", "aac", "-b:a", "128k",
+            "-f", "flv", "-y", output_path]
+    return [ffmpeg_path, "-i", input_path] + video_args + [
+        "-c:a", "aac", "-b:a", DEFAULT_BITRATE,
+        "-y", output_path]
+
+
+def plan_video_commands(ffmpeg_path: str, input_path: str, output_path: str,
+                        output_format: str, use_gpu: bool) -> List[Tuple[str, List[str]]]:
+    """
+    Ordered (label, command) candidates for a video to video conversion:
+    stream copy when every stream fits, then a proven hardware encoder, then the CPU.
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    plan = []
+    # Stream copy when every input stream already fits the target container
+    blockers = get_remux_blockers(probe_file(input_path), output_format)
+    if not blockers:
+        plan.append(("remux", build_remux_command(ffmpeg_path, input_path, output_path, output_format)))
+    else:
+        logging.info(f"Encode path: {os.path.basename(input_path)} -> {output_format} "
+                     f"needs transcoding ({'; '.join(blockers)})")
+
+    # WebM is always VP9 on the CPU; elsewhere use hardware only where detection proved it works
+    if use_gpu and output_format.lower() != "webm":
+        gpu_cmd = build_hw_video_command(ffmpeg_path, input_path, output_path, output_format,
+                                         get_hw_capabilities(ffmpeg_path))
+        if gpu_cmd:
+            plan.append(("gpu", gpu_cmd))
+        else:
+            logging.info(f"No usable hardware encoder for {output_format}, encoding on CPU")
+
+    plan.append(("cpu", build_cpu_video_command(ffmpeg_path, input_path, output_path, output_format)))
+    return plan
+
+
+def estimate_output_bytes(input_path: str, output_path: str) -> int:
+    """Rough upper bound of an output's size, for staging free-space checks"""
+    try:
+        input_size = os.path.getsize(input_path)
+    except OSError:
+        input_size = 0
+    if output_path.lower().endswith(".wav"):
+        # Uncompressed PCM can be many times larger than a compressed input
+        return max(input_size * 2, int(get_duration(probe_file(input_path)) * PCM_BYTES_PER_SECOND))
+    return input_size * 2
+
+
+def run_command_plan(plan: List[Tuple[str, List[str]]], input_path: str, output_path: str,
+                     progress_callback=None) -> str:
+    """
+    Run each planned command until one succeeds; returns the label of the one that did.
+    The output is written in the staging area and moved into place once complete.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with stage_outputs([output_path], estimate_output_bytes(input_path, output_path)) as staged:
+        for index, (label, cmd) in enumerate(plan):
+            if cmd[-1] == output_path:
+                cmd = cmd[:-1] + [staged[output_path]]
+            try:
+                run_ffmpeg(cmd, input_path, progress_callback)
+            except subprocess.CalledProcessError as e:
+                if index == len(plan) - 1:
+                    raise
+                logging.info(f"{label} path failed for {os.path.basename(input_path)}, "
+                             f"falling back to {plan[index + 1][0]}: {(e.stderr or '').strip()[-200:]}")
+                continue
+            if label == "remux":
+                logging.info(f"Remux (stream copy) path: {os.path.basename(input_path)} -> "
+                             f"{os.path.splitext(output_path)[1][1:]}")
+            return label
+        raise ValueError("Empty conversion plan")
+
+
+def direct_ffmpeg_gpu_video2video(input_path: str, output_path: str,
+                                  output_format: str, use_gpu: bool,
+                                  progress_callback=None) -> None:
+    """Direct video to video conversion with optional GPU acceleration"""
+    plan = plan_video_commands(get_ffmpeg_path(), input_path, output_path, output_format, use_gpu)
+    run_command_plan(plan, input_path, output_path, progress_callback)
+
+
+def parse_output_formats(value: Union[str, List[str]]) -> List[str]:
+    """Output formats from a list or a string such as 'mp3+ogg+flac' (duplicates dropped)"""
+    if isinstance(value, str):
+        value = value.replace(",", "+").replace(" ", "+").split("+")
+    formats = []
+    for fmt in value:
+        fmt = fmt.strip().lower().lstrip(".")
+        if fmt and fmt not in formats:
+            formats.append(fmt)
+    return formats
+
+
+def build_conversion_jobs(input_paths: List[str], output_folder: str,
+                          output_format: Union[str, List[str]],
+                          sanitize_names: bool = False) -> List[Dict[str, Any]]:
+    """
+    Plan one conversion job per input file and output format.
+    Output names that would collide within the batch get a numeric suffix,
+    so parallel workers never write to the same file.
+    """
+    jobs = []
+    claimed_outputs = set()
+    output_formats = parse_output_formats(output_format)
+
+    for original_path in input_paths:
+        input_path = safe_filename(original_path) if sanitize_names else original_path
+        file_base, file_ext = os.path.splitext(os.path.basename(input_path))
+
+        for fmt in output_formats:
+            output_path = os.path.join(output_folder, f"{file_base}.{fmt}")
+            count = 1
+            while output_path in claimed_outputs:
+                output_path = os.path.join(output_folder, f"{file_base}_{count}.{fmt}")
+                count += 1
+            claimed_outputs.add(output_path)
+
+            jobs.append({
+                'input_path': input_path,
+                'output_path': output_path,
+                'input_format': file_ext[1:].lower(),
+                'output_format': fmt
+            })
+
+    return jobs
+
+
+def start_conversion_journal(jobs: List[Dict[str, Any]], params: Dict[str, Any]) -> Optional[JournalBatch]:
+    """Record a conversion batch in the job journal before it starts"""
+    journal = open_job_journal()
+    if journal is None:
+        return None
+    try:
+        return journal.start_batch('convert', params, [{
+            'key': job['output_path'],
+            'input_path': job['input_path'],
+            'output_path': job['output_path'],
+            'data': {'input_format': job['input_format'], 'output_format': job['output_format']}
+        } for job in jobs])
+    except sqlite3.Error as e:
+        logging.error(f"Could not record batch in the job journal: {e}")
+        return None
+
+
+def resume_conversion_jobs(batch: JournalBatch) -> List[Dict[str, Any]]:
+    """Conversion jobs of an interrupted batch that still have to run (half-written outputs removed)"""
+    return [{
+        'input_path': job['input_path'],
+        'output_path': job['output_path'],
+        'input_format': job['data']['input_format'],
+        'output_format': job['data']['output_format']
+    } for job in batch.journal.prepare_resume(batch.id)]
+
+
+def get_conversion_worker_count(requested: Optional[int] = None) -> int:
+    """Resolve the number of parallel conversion workers (0 or None = auto)"""
+    if requested is None or requested <= 0:
+        return DEFAULT_CONVERSION_WORKERS
+    return requested
+
+
+def new_job_result(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Result record for a job that has not run yet"""
+    return {
+        'input_path': job['input_path'],
+        'output_path': job['output_path'],
+        'success': False,
+        'skipped': False,
+        'cached': False,
+        'error': None,
+        'elapsed': 0.0
+    }
+
+
+def fetch_cached_output(cache, job: Dict[str, Any], plan: List[Tuple[str, List[str]]],
+                        result: Dict[str, Any]) -> Optional[str]:
+    """Try the conversion cache for a job; returns the cache key (None if unusable)"""
+    if cache is None:
+        return None
+    try:
+        cache_key = cache.make_key(job['input_path'], job['output_path'], plan, ENCODER_SETTINGS_VERSION)
+        result['cached'] = cache.fetch(cache_key, job['output_path'])
+        return cache_key
+    except (OSError, sqlite3.Error) as e:
+        logging.error(f"Conversion cache lookup failed for {job['input_path']}: {e}")
+        return None
+
+
+def store_cached_output(cache, cache_key: Optional[str], job: Dict[str, Any]) -> None:
+    """Add a freshly converted output to the conversion cache"""
+    if cache is None or not cache_key:
+        return
+    try:
+        cache.store(cache_key, job['output_path'], os.path.basename(job['input_path']))
+    except sqlite3.Error as e:
+        logging.error(f"Conversion cache write failed for {job['output_path']}: {e}")
+
+
+def run_conversion_job(converter: MediaConverter, job: Dict[str, Any], use_gpu: bool,
+                       progress_callback=None, cache=None, plan=None) -> Dict[str, Any]:
+    """
+    Convert one batch job and record its outcome instead of raising.
+    With a ConversionCache, a previous identical conversion is reused (result['cached'] = True).
+    """
+    result = new_job_result(job)
+    start_time = time.time()
+    try:
+        if isinstance(plan, Exception):
+            raise plan
+        if plan is None:
+            plan = converter.plan_commands(job['input_path'], job['output_path'],
+                                           job['input_format'], job['output_format'], use_gpu)
+        cache_key = fetch_cached_output(cache, job, plan, result)
+        if not result['cached']:
+            converter.convert_single_file(job['input_path'], job['output_path'],
+                                          job['input_format'], job['output_format'], use_gpu,
+                                          progress_callback, plan)
+            store_cached_output(cache, cache_key, job)
+        result['success'] = True
+    except Exception as e:
+        logging.error(f"Failed to convert {job['input_path']}: {e}")
+        result['error'] = str(e)
+    result['elapsed'] = time.time() - start_time
+    return result
+
+
+def is_shareable_command(cmd: List[str]) -> bool:
+    """True when a command has no input-side options, so its outputs can join a fan-out"""
+    return len(cmd) > 2 and cmd[1] == "-i"
+
+
+def build_fanout_command(ffmpeg_path: str, input_path: str,
+                         plans: List[Tuple[str, List[Tuple[str, List[str]]]]]) -> List[str]:
+    """One ffmpeg command that decodes input_path once and writes every output with its preferred arguments"""
+    fanout_cmd = [ffmpeg_path, "-i", input_path, "-y"]
+    for output_path, plan in plans:
+        cmd = plan[0][1]
+        fanout_cmd.extend(arg for arg in cmd[3:-1] if arg != "-y")
+        fanout_cmd.append(output_path)
+    return fanout_cmd
+
+
+def plan_conversion_group(converter: MediaConverter, jobs: List[Dict[str, Any]],
+                          use_gpu: bool) -> List[Union[List[Tuple[str, List[str]]], Exception]]:
+    """Command plan of every job in a group (the exception instead, if planning failed)"""
+    plans = []
+    for job in jobs:
+        try:
+            plans.append(converter.plan_commands(job['input_path'], job['output_path'],
+                                                 job['input_format'], job['output_format'], use_gpu))
+        except Exception as e:
+            plans.append(e)
+    return plans
+
+
+def get_conversion_resource(plans: List[Union[List[Tuple[str, List[str]]], Exception]]) -> str:
+    """Scheduler resource class for a conversion group, from the commands it will run first"""
+    labels = {plan[0][0] if isinstance(plan, list) else "cpu" for plan in plans}
+    if labels == {"remux"}:
+        return RESOURCE_DISK
+    if "gpu" in labels and not labels & {"cpu", "audio"}:
+        return RESOURCE_HW_ENCODE
+    return RESOURCE_CPU_ENCODE
+
+
+def run_conversion_group(converter: MediaConverter, jobs: List[Dict[str, Any]], use_gpu: bool,
+                         progress_callback=None, cache=None, plans=None) -> List[Dict[str, Any]]:
+    """
+    Convert one input to several output formats with a single decode.
+    If the combined command fails, each output is retried on its own.
+    plans may carry the group's plan_conversion_group() result to avoid planning twice.
+    """
+    if plans is None:
+        plans = plan_conversion_group(converter, jobs, use_gpu)
+    if len(jobs) == 1:
+        return [run_conversion_job(converter, jobs[0], use_gpu, progress_callback, cache, plans[0])]
+
+    input_path = jobs[0]['input_path']
+    results = [new_job_result(job) for job in jobs]
+    start_time = time.time()
+
+    pending = []
+    for job, result, plan in zip(jobs, results, plans):
+        try:
+            if isinstance(plan, Exception):
+                raise plan
+            cache_key = fetch_cached_output(cache, job, plan, result)
+            if result['cached']:
+                result['success'] = True
+            else:
+                pending.append((job, result, plan, cache_key))
+        except Exception as e:
+            logging.error(f"Failed to convert {input_path}: {e}")
+            result['error'] = str(e)
+
+    # Outputs whose preferred command decodes into GPU memory cannot share the decode
+    shared = [entry for entry in pending if is_shareable_command(entry[2][0][1])]
+    if len(shared) > 1:
+        output_paths = [job['output_path'] for job, _, _, _ in shared]
+        try:
+            for output_path in output_paths:
+                os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            with stage_outputs(output_paths, sum(estimate_output_bytes(input_path, path)
+                                                 for path in output_paths)) as staged:
+                fanout_cmd = build_fanout_command(converter.ffmpeg_path, input_path,
+                                                  [(staged[job['output_path']], plan) for job, _, plan, _ in shared])
+                run_ffmpeg(fanout_cmd, input_path, progress_callback)
+            logging.info(f"Fan-out: {os.path.basename(input_path)} -> "
+                         f"{', '.join(job['output_format'] for job, _, _, _ in shared)} in one decode")
+            for job, result, _, cache_key in shared:
+                store_cached_output(cache, cache_key, job)
+                result['success'] = True
+            pending = [entry for entry in pending if entry not in shared]
+        except Exception as e:
+            details = (e.stderr or '').strip()[-200:] if isinstance(e, subprocess.CalledProcessError) else e
+            logging.info(f"Fan-out failed for {os.path.basename(input_path)}, converting formats separately: "
+                         f"{details}")
+
+    for job, result, plan, cache_key in pending:
+        try:
+            converter.convert_single_file(input_path, job['output_path'], job['input_format'],
+                                          job['output_format'], use_gpu, progress_callback, plan)
+            store_cached_output(cache, cache_key, job)
+            result['success'] = True
+        except Exception as e:
+            logging.error(f"Failed to convert {input_path} to {job['output_format']}: {e}")
+            result['error'] = str(e)
+
+    elapsed = time.time() - start_time
+    for result in results:
+        result['elapsed'] = elapsed
+    return results
+
+
+def group_jobs_by_input(jobs: List[Dict[str, Any]]) -> List[List[int]]:
+    """Job indices grouped by input file, in first-seen order"""
+    groups = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault(job['input_path'], []).append(index)
+    return list(groups.values())
+
+
+class BatchProgress:
+    """
+    Overall progress of a batch, with each job weighted by its input duration.
+    Durations arrive as their probes finish; until then a job weighs as much as
+    the average known one.
+    """
+
+    def __init__(self, durations: List[Optional[float]]):
+        self._durations = list(durations)
+        self._fractions = [0.0] * len(durations)
+        self._reported = 0.0
+        self._lock = threading.Lock()
+
+    def set_duration(self, index: int, duration: Optional[float]) -> None:
+        with self._lock:
+            self._durations[index] = duration
+
+    def update(self, index: int, fraction: float) -> float:
+        """Record one job's progress and return the batch fraction (0-1)"""
+        with self._lock:
+            self._fractions[index] = max(self._fractions[index], min(fraction, 1.0))
+            known = [d for d in self._durations if d and d > 0]
+            fallback = sum(known) / len(known) if known else 1.0
+            weights = [d if d and d > 0 else fallback for d in self._durations]
+            done = sum(w * f for w, f in zip(weights, self._fractions)) / (sum(weights) or 1.0)
+            # A late probe can make the total grow; hold the bar rather than move it back
+            self._reported = max(self._reported, done)
+            return self._reported
+
+
+def run_conversion_batch(converter: MediaConverter, jobs: List[Dict[str, Any]], use_gpu: bool,
+                         max_workers: Optional[int] = None,
+                         progress_callback=None,
+                         fraction_callback=None,
+                         manifest=None,
+                         cache=None,
+                         journal_batch=None) -> List[Dict[str, Any]]:
+    """
+    Convert jobs concurrently through the shared scheduler (see scheduler.py).
+    Results are collected in completion order; a failed file never aborts the batch.
+    progress_callback(completed, total, result) is called after every finished job.
+    fraction_callback(fraction, snapshot) receives live duration-weighted batch progress.
+    With a ConversionManifest, jobs whose input, arguments and output are unchanged
+    are skipped (result['skipped'] = True) and successful conversions are recorded.
+    With a ConversionCache, identical earlier conversions are linked in instead of re-encoded.
+    With a JournalBatch, every job's state changes are journaled so a crash can be resumed.
+    """
+    total = len(jobs)
+    results = []
+    signatures = {}
+
+    if manifest is not None:
+        pending = []
+        for job in jobs:
+            signature = converter.get_encoding_signature(job['input_format'], job['output_format'], use_gpu)
+            if manifest.is_up_to_date(job['input_path'], job['output_path'], signature):
+                results.append(dict(new_job_result(job), success=True, skipped=True))
+                if journal_batch is not None:
+                    journal_batch.done(job['output_path'], elapsed=0.0)
+                if progress_callback:
+                    progress_callback(len(results), total, results[-1])
+            else:
+                signatures[job['output_path']] = signature
+                pending.append(job)
+        logging.info(f"Incremental batch: {len(results)} unchanged, {len(pending)} to convert")
+        jobs = pending
+        if not jobs:
+            if journal_batch is not None:
+                journal_batch.finish()
+            return results
+
+    groups = group_jobs_by_input(jobs)
+    workers = min(get_conversion_worker_count(max_workers), max(len(groups), 1))
+    scheduler = get_scheduler()
+    batch_key = object()
+
+    logging.info(f"Converting {len(jobs)} files with {workers} workers")
+    # Probe durations in parallel (cached for the conversions themselves); encoding starts
+    # right away and each duration joins the progress weights when its probe finishes
+    batch_progress = BatchProgress([None] * len(jobs))
+
+    def on_probed(index: int, future: Future) -> None:
+        if future.exception() is None:
+            batch_progress.set_duration(index, get_duration(future.result()))
+
+    for index, job in enumerate(jobs):
+        probe_future = scheduler.submit(RESOURCE_DISK, probe_file, job['input_path'], converter.ffprobe_path,
+                                        priority=PRIORITY_INTERACTIVE, batch=batch_key)
+        probe_future.add_done_callback(lambda future, index=index: on_probed(index, future))
+
+    def make_group_callback(indices: List[int]):
+        def on_snapshot(snapshot: Dict[str, Any]):
+            if fraction_callback and snapshot['fraction'] is not None:
+                for index in indices:
+                    fraction = batch_progress.update(index, snapshot['fraction'])
+                fraction_callback(fraction, snapshot)
+        return on_snapshot
+
+    def run_group(indices: List[int], plans) -> List[Dict[str, Any]]:
+        if journal_batch is not None:
+            # Without a staging area ffmpeg writes the output itself, so a crash leaves it truncated
+            in_place = get_staging_area() is None
+            for index in indices:
+                journal_batch.running(jobs[index]['output_path'], in_place=in_place)
+        return run_conversion_group(converter, [jobs[i] for i in indices], use_gpu,
+                                    make_group_callback(indices), cache, plans)
+
+    def submit_group(indices: List[int]) -> Future:
+        # Jobs sharing an input (several output formats) run as one single-decode group,
+        # queued on the resource its planned commands actually use
+        plans = plan_conversion_group(converter, [jobs[i] for i in indices], use_gpu)
+        return scheduler.submit(get_conversion_resource(plans), run_group, indices, plans,
+                                priority=PRIORITY_NORMAL, batch=batch_key)
+
+    # At most `workers` groups of this batch in flight; the scheduler budgets cap all batches together
+    queued_groups = list(groups)
+    in_flight = {}
+    while queued_groups or in_flight:
+        while queued_groups and len(in_flight) < workers:
+            indices = queued_groups.pop(0)
+            in_flight[submit_group(indices)] = indices
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            indices = in_flight.pop(future)
+            try:
+                group_results = future.result()
+            except Exception as e:
+                # run_conversion_group reports per-job failures itself; this is a bug or
+                # an environment failure, and must not take the rest of the batch down
+                logging.error(f"Conversion of {jobs[indices[0]]['input_path']} failed: {e}", exc_info=True)
+                group_results = [dict(new_job_result(jobs[index]), error=str(e)) for index in indices]
+            for index, result in zip(indices, group_results):
+                results.append(result)
+                if journal_batch is not None:
+                    if result['success']:
+                        journal_batch.done(result['output_path'], elapsed=result['elapsed'])
+                    else:
+                        journal_batch.failed(result['output_path'], result['error'], result['elapsed'])
+                if manifest is not None and result['success']:
+                    manifest.record(result['input_path'], result['output_path'], signatures[result['output_path']])
+                if fraction_callback:
+                    fraction_callback(batch_progress.update(index, 1.0), None)
+                if progress_callback:
+                    progress_callback(len(results), total, result)
+
+    if manifest is not None:
+        manifest.save()
+    if journal_batch is not None:
+        journal_batch.finish()
+    flush_timings()
+    return results
+
+
+def check_and_convert_codec(filepath: str, ffmpeg_path: str, ffprobe_path: str) -> bool:
+    """Check if video needs H.264 conversion for Premiere compatibility"""
+    try:
+        if not os.path.exists(filepath):
+            return False
+
+        # Check codec using the cached ffprobe layer
+        with span('codec_check', file=os.path.basename(filepath)) as check:
+            video_streams = get_streams(probe_file(filepath, ffprobe_path), "video")
+            codec = video_streams[0].get('codec_name', '').lower() if video_streams else ''
+            check['codec'] = codec
+
+        # Check if conversion is needed
+        if codec in ['vp9', 'vp09', 'av01', 'vp8']:
+            logging.info(f"Converting {codec} to H.264 for Premiere compatibility")
+
+            # The H.264 copy is written in the staging area (or next to the file as
+            # .temp.mp4) and replaces the original once it is complete
+            with span('encode', file=os.path.basename(filepath), format='mp4', path='premiere_h264'), \
+                    stage_outputs([filepath], os.path.getsize(filepath) * 2, fallback_suffix='.temp.mp4') as staged:
+                # Conversion command
+                convert_cmd = [
+                    ffmpeg_path, '-i', filepath,
+                    '-c:v', 'libx264',  # H.264 codec
+                    '-preset', 'fast',  # Faster conversion
+                    '-crf', '18',  # Higher quality
+                    '-c:a', 'aac',  # AAC audio
+                    '-b:a', '256k',  # Higher audio bitrate
+                    '-movflags', '+faststart',
+                    '-y', staged[filepath]
+                ]
+
+                run_ffmpeg(convert_cmd, filepath)
+
+            logging.info(f"Successfully converted to H.264: {filepath}")
+            return True
+
+    except Exception as e:
+        logging.error(f"Error during codec conversion: {e}")
+    return False
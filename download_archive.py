@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+# Per-output-folder record of downloaded videos, keyed like yt-dlp's own archive
+# ("<extractor> <video id>") and passed to yt-dlp as its download_archive, so
+# playlist re-runs skip entries before extracting them. Unlike yt-dlp's text file,
+# each entry also records the format/quality and where the file went: an item only
+# counts as present if it was fetched with the same settings and is still on disk.
+
+DOWNLOAD_ARCHIVE_FILE = ".laces_downloads.json"
+DOWNLOAD_ARCHIVE_VERSION = 1
+DOWNLOAD_ARCHIVE_SAVE_INTERVAL = 10  # seconds between periodic saves during a playlist
+
+
+def archive_key(info: Dict[str, Any]) -> Optional[str]:
+    """yt-dlp archive id of an info dict ("<extractor> <video id>"), None if it has no id"""
+    extractor = info.get('extractor_key') or info.get('ie_key') or info.get('extractor')
+    video_id = info.get('id')
+    if not extractor or not video_id:
+        return None
+    return f"{extractor.lower()} {video_id}"
+
+
+class DownloadArchive:
+    """Download archive stored as JSON in the output folder; behaves as yt-dlp's archive set"""
+
+    def __init__(self, output_folder: str, format_type: str, quality: str):
+        self.path = os.path.join(output_folder, DOWNLOAD_ARCHIVE_FILE)
+        self.profile = {'format': format_type, 'quality': quality}
+        self.skipped = set()
+        self._entries = {}
+        self._paths = {}  # archive key -> final path, between MoveFiles and yt-dlp recording it
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.load()
+
+    def load(self) -> None:
+        """Read the archive, starting empty if it is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == DOWNLOAD_ARCHIVE_VERSION:
+                self._entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable download archive {self.path}: {e}")
+
+    def save(self) -> bool:
+        """Write the archive atomically"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {'version': DOWNLOAD_ARCHIVE_VERSION, 'entries': dict(self._entries)}
+            self._dirty = False
+            self._last_save = time.time()
+
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+            return True
+        except OSError as e:
+            logging.error(f"Error saving download archive: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def maybe_save(self) -> None:
+        """Save if the last save is older than DOWNLOAD_ARCHIVE_SAVE_INTERVAL"""
+        if time.time() - self._last_save >= DOWNLOAD_ARCHIVE_SAVE_INTERVAL:
+            self.save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        # yt-dlp asks this for every playlist entry before extracting it
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get('profile') != self.profile:
+            return False
+        filepath = entry.get('filepath')
+        if filepath and not os.path.exists(filepath):
+            return False
+        with self._lock:
+            self.skipped.add(key)
+        return True
+
+    def add(self, key: str) -> None:
+        """Called by yt-dlp once an item is completely downloaded and post-processed"""
+        with self._lock:
+            self._entries[key] = {
+                'profile': self.profile,
+                'filepath': self._paths.pop(key, None),
+                'downloaded_at': time.time()
+            }
+            self._dirty = True
+        self.maybe_save()
+
+    def note_filepath(self, info: Dict[str, Any]) -> None:
+        """Remember where an item was moved to, for the entry yt-dlp is about to add"""
+        key = archive_key(info)
+        if key and info.get('filepath'):
+            with self._lock:
+                self._paths[key] = os.path.abspath(info['filepath'])
+
+    def postprocessor_hook(self, d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFiles':
+            self.note_filepath(d.get('info_dict', {}))
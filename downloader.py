@@ -0,0 +1,793 @@
+import os
+import sys
+import time
+import shutil
+import logging
+import threading
+import types
+from urllib.parse import urlparse
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Tuple, Optional, Callable, Iterator
+
+import yt_dlp
+
+from converter import AUDIO_FORMATS, get_ffmpeg_path, resource_path, check_and_convert_codec
+from scheduler import get_scheduler, RESOURCE_NETWORK, RESOURCE_CPU_ENCODE, RESOURCE_BACKGROUND, PRIORITY_NORMAL
+from staging import staging_work_dir
+from download_archive import DownloadArchive
+from sitelimits import get_site_key, get_site_limiter, is_throttling_error
+from infocache import get_info_cache, info_cache_variant
+from timings import span, record_span, job_scope
+
+DEFAULT_PLAYLIST_DOWNLOAD_WORKERS = 3
+PLAYLIST_THROTTLE_RETRIES = 3  # times one item is retried after the site throttled it
+
+# yt-dlp helpers shared by the GUI download thread and the headless CLI.
+# Nothing in here may touch tkinter.
+
+# Stage timing name of yt-dlp postprocessors that get their own stage
+POSTPROCESSOR_STAGES = {'Merger': 'merge'}
+
+
+def is_valid_url(input_url: str) -> bool:
+    """Check if URL is from a supported platform"""
+    supported_domains = [
+        'youtube.com', 'youtu.be',
+        'music.youtube.com',
+        'twitter.com', 'x.com',
+        'tiktok.com',
+        'dailymotion.com', 'dai.ly',
+        'vimeo.com',
+        'instagram.com/reels', 'instagram.com/reel',
+        'twitch.tv',
+        'facebook.com', 'fb.watch',
+        'soundcloud.com', 'snd.sc',
+        'bandcamp.com',
+        'reddit.com',
+        'ok.ru',
+        'rumble.com'
+    ]
+    try:
+        parsed_url = urlparse(input_url)
+        cleaned_path = parsed_url.path.split('?')[0].lower()
+        netloc = parsed_url.netloc.lower()
+        return any(domain in (netloc + cleaned_path) for domain in supported_domains)
+    except Exception:
+        return False
+
+
+def validate_url(url: str) -> bool:
+    """Validate URL format and content"""
+    if not url or not isinstance(url, str):
+        return False
+    url = url.strip()
+    if not url:
+        return False
+    return is_valid_url(url)
+
+
+def analyze_playlist_url(url: str) -> Tuple[bool, bool]:
+    """
+    Analyzes a URL to determine its playlist characteristics
+    Returns: (is_playlist_page, is_video_in_playlist)
+    """
+    # Full playlist page
+    if 'youtube.com/playlist?list=' in url:
+        return True, False
+
+    # Video that's part of a playlist
+    if 'youtube.com/watch' in url and 'list=' in url:
+        return False, True
+
+    # YouTube Music playlist
+    if 'music.youtube.com/playlist' in url:
+        return True, False
+
+    # YouTube Music video in playlist
+    if 'music.youtube.com/watch' in url and 'list=' in url:
+        return False, True
+
+    # SoundCloud set (playlist)
+    if 'soundcloud.com/sets/' in url:
+        return True, False
+
+    # Generic catch-all for other potential playlist URLs
+    if 'playlist' in url.lower() and 'list=' in url:
+        return True, False
+
+    return False, False
+
+
+def get_format_string(quality: str, format_type: str) -> str:
+    """
+    Returns the format string for yt-dlp based on selected quality and format type
+    Now with more flexible H.264 preference that won't fail if H.264 isn't available
+    """
+    if format_type in AUDIO_FORMATS:
+        return "bestaudio/best"
+
+    # For video, prefer H.264 but fall back to other codecs if not available
+    if format_type == "mp4":
+        # More flexible format strings that prefer H.264 but don't require it
+        quality_map = {
+            "Best": "bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best",
+            "4K": "bestvideo[height<=2160][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=2160][ext=mp4]+bestaudio/bestvideo[height<=2160]+bestaudio/best[height<=2160]",
+            "1440p": "bestvideo[height<=1440][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=1440][ext=mp4]+bestaudio/bestvideo[height<=1440]+bestaudio/best[height<=1440]",
+            "1080p": "bestvideo[height<=1080][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=1080][ext=mp4]+bestaudio/bestvideo[height<=1080]+bestaudio/best[height<=1080]",
+            "720p": "bestvideo[height<=720][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=720][ext=mp4]+bestaudio/bestvideo[height<=720]+bestaudio/best[height<=720]",
+            "480p": "bestvideo[height<=480][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=480][ext=mp4]+bestaudio/bestvideo[height<=480]+bestaudio/best[height<=480]"
+        }
+        return quality_map.get(quality, "bestvideo[height<=1080][ext=mp4]+bestaudio/bestvideo[height<=1080]+bestaudio/best")
+    else:
+        # For other formats, standard selection
+        quality_map = {
+            "Best": "bestvideo+bestaudio/best",
+            "4K": "bestvideo[height<=2160]+bestaudio/best[height<=2160]",
+            "1440p": "bestvideo[height<=1440]+bestaudio/best[height<=1440]",
+            "1080p": "bestvideo[height<=1080]+bestaudio/best[height<=1080]",
+            "720p": "bestvideo[height<=720]+bestaudio/best[height<=720]",
+            "480p": "bestvideo[height<=480]+bestaudio/best[height<=480]"
+        }
+        return quality_map.get(quality, "bestvideo[height<=1080]+bestaudio/best")
+
+
+def modify_download_options(ydl_opts: Dict[str, Any], quality: str, format_type: str,
+                            playlist_action: str = 'single', premiere_compatible: bool = True,
+                            on_format_change: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Configures yt-dlp options based on format and playlist settings
+    on_format_change(new_format) is called when the site forces a different format
+    """
+    try:
+        ffmpeg_path = get_ffmpeg_path()
+        ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
+        if not os.path.exists(ffprobe_path):
+            if getattr(sys, 'frozen', False):
+                ffprobe_path = resource_path('ffprobe.exe')
+            else:
+                ffprobe_path = shutil.which('ffprobe') or ffprobe_path
+
+        ydl_opts.update({
+            'ffmpeg_location': ffmpeg_path,
+            'prefer_ffmpeg': True,
+        })
+
+        # Handle playlist configuration
+        if playlist_action == 'playlist':
+            ydl_opts['noplaylist'] = False
+            if 'watch' in ydl_opts.get('webpage_url', '') and 'list=' in ydl_opts.get('webpage_url', ''):
+                ydl_opts['outtmpl'] = '%(playlist_title)s/%(playlist_index)s-%(title)s.%(ext)s'
+            else:
+                ydl_opts['outtmpl'] = '%(playlist_title)s/%(playlist_index)s-%(title)s.%(ext)s'
+        elif playlist_action == 'single':
+            ydl_opts['noplaylist'] = True
+            ydl_opts['outtmpl'] = '%(title)s.%(ext)s'
+        else:
+            return None
+
+        is_youtube_music = 'music.youtube.com' in ydl_opts.get('webpage_url', '')
+
+        parsed_url = urlparse(ydl_opts.get('webpage_url', ''))
+        netloc = parsed_url.netloc.lower()
+
+        # Check if audio-only site
+        if any(d in netloc for d in ["soundcloud.com", "snd.sc", "bandcamp.com"]):
+            if format_type not in AUDIO_FORMATS:
+                format_type = "mp3"
+                logging.info("Audio-only site detected, defaulting to mp3")
+                if on_format_change:
+                    on_format_change(format_type)
+
+        if format_type in AUDIO_FORMATS or is_youtube_music:
+            # Audio processing
+            bitrate_str = quality.replace("kb/s", "").strip()
+            if not bitrate_str.isdigit():
+                bitrate_str = "192"
+
+            audio_postprocessors = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': format_type if format_type in AUDIO_FORMATS else 'mp3',
+                'preferredquality': bitrate_str,
+                'nopostoverwrites': False
+            }]
+
+            if is_youtube_music or any(d in netloc for d in ["soundcloud.com", "bandcamp.com"]):
+                audio_postprocessors.append({
+                    'key': 'FFmpegMetadata',
+                    'add_metadata': True,
+                })
+
+            if format_type == 'mp3':
+                audio_postprocessors.append({
+                    'key': 'EmbedThumbnail',
+                    'already_have_thumbnail': False,
+                })
+                ydl_opts['writethumbnail'] = True
+
+            ydl_opts.update({
+                'format': 'bestaudio/best',
+                'postprocessors': audio_postprocessors
+            })
+
+        else:
+            # Video format handling
+            format_string = get_format_string(quality, format_type)
+
+            # Basic video options
+            ydl_opts.update({
+                'format': format_string,
+                'merge_output_format': format_type,
+                'postprocessors': []
+            })
+
+            # For YouTube, always set merge_output_format
+            if "youtube.com" in netloc or "youtu.be" in netloc:
+                if format_type == 'mp4' and premiere_compatible:
+                    # Store paths for post-processing
+                    ydl_opts['_ffmpeg_path'] = ffmpeg_path
+                    ydl_opts['_ffprobe_path'] = ffprobe_path
+                    ydl_opts['_check_codec'] = True
+
+                elif format_type == 'webm':
+                    ydl_opts['postprocessors'].append({
+                        'key': 'FFmpegVideoRemuxer',
+                        'preferedformat': 'webm'
+                    })
+                    ydl_opts['postprocessor_args'] = {
+                        'FFmpegVideoRemuxer': [
+                            '-c:v', 'libvpx-vp9',
+                            '-crf', '30',
+                            '-b:v', '0',
+                            '-c:a', 'libopus',
+                            '-b:a', '128k'
+                        ]
+                    }
+                elif format_type == 'avi':
+                    ydl_opts['postprocessors'].append({
+                        'key': 'FFmpegVideoRemuxer',
+                        'preferedformat': 'avi'
+                    })
+                    ydl_opts['postprocessor_args'] = {
+                        'FFmpegVideoRemuxer': [
+                            '-c:v', 'mpeg4',
+                            '-c:a', 'mp3',
+                            '-q:v', '6',
+                            '-b:a', '192k'
+                        ]
+                    }
+            else:
+                # For non-YouTube sites
+                ydl_opts.update({
+                    'format': format_string,
+                    'merge_output_format': format_type,
+                    'postprocessors': [{
+                        'key': 'FFmpegVideoRemuxer',
+                        'preferedformat': format_type
+                    }]
+                })
+
+        # Improved error handling
+        ydl_opts['ignoreerrors'] = False  # Don't ignore errors so we can see what's wrong
+        ydl_opts['verbose'] = False  # Less verbose output
+
+        return ydl_opts
+
+    except Exception as e:
+        logging.error(f"Error in modify_download_options: {e}", exc_info=True)
+        # Return basic options as fallback
+        return {
+            'format': 'bestvideo+bestaudio/best',
+            'merge_output_format': format_type,
+            'outtmpl': '%(title)s.%(ext)s',
+            'noplaylist': True if playlist_action == 'single' else False,
+            'ffmpeg_location': ffmpeg_path,
+            'progress_hooks': ydl_opts.get('progress_hooks', [])
+        }
+
+
+def get_site_download_options(input_url: str, output_folder: str) -> Dict[str, Any]:
+    """Base yt-dlp options with site-specific retry/timeout tuning applied"""
+    parsed_url = urlparse(input_url)
+    netloc = parsed_url.netloc.lower()
+
+    # Determine site type
+    is_youtube = any(domain in netloc for domain in ['youtube.com', 'youtu.be', 'music.youtube.com'])
+    is_twitter = any(domain in netloc for domain in ['twitter.com', 'x.com'])
+    is_tiktok = 'tiktok.com' in netloc
+    is_instagram = 'instagram.com' in netloc
+
+    # Base yt-dlp options
+    ydl_opts = {
+        'paths': {'home': output_folder, 'temp': output_folder},
+        'ignoreerrors': False,  # Changed to False to see errors
+        'overwrites': True,
+        'max_sleep_interval': 1,
+        'min_sleep_interval': 1,
+        'extractor_retries': 5,
+        'webpage_url': input_url,
+        'verbose': False,
+        'socket_timeout': 15,
+        'retries': 3,
+        'fragment_retries': 3,
+    }
+
+    # Apply site-specific optimizations
+    if is_youtube:
+        ydl_opts.update({
+            'retries': 10,
+            'fragment_retries': 10,
+            'external_downloader_args': {'ffmpeg_i': ['-timeout', '60000000', '-thread_queue_size', '10000']},
+        })
+    elif is_twitter or is_instagram:
+        ydl_opts.update({
+            'retries': 5,
+            'fragment_retries': 10,
+            'external_downloader_args': {'ffmpeg_i': ['-timeout', '30000000']},
+        })
+    elif is_tiktok:
+        ydl_opts.update({
+            'retries': 8,
+            'fragment_retries': 8,
+            'external_downloader_args': {'ffmpeg_i': ['-timeout', '30000000']},
+        })
+
+    return ydl_opts
+
+
+def is_audio_only_site(input_url: str) -> bool:
+    """Check if the URL belongs to a site that only serves audio"""
+    netloc = urlparse(input_url).netloc.lower()
+    return any(domain in netloc for domain in ['soundcloud.com', 'snd.sc', 'bandcamp.com'])
+
+
+def get_playlist_download_options() -> Dict[str, Any]:
+    """Extra yt-dlp options used when downloading whole playlists"""
+    return {
+        'socket_timeout': 30,
+        'retries': 10,
+        'fragment_retries': 10,
+        'retry_sleep_functions': {'fragment': lambda n: 5},
+        'concurrent_fragment_downloads': 1,
+        # Start on the first entries while later pages are still being fetched
+        'lazy_playlist': True,
+        'logger': logging.getLogger('yt-dlp'),
+        'progress_with_newline': True,
+        'noprogress': False
+    }
+
+
+def extract_info_cached(ydl, url: str, ie_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Unprocessed info dict of a URL (extract_info with process=False), shared through
+    the info cache so analysis, pre-download checks and the download extract once.
+    Lazily generated playlist entries are wrapped so every phase can iterate them.
+    """
+    cache = get_info_cache()
+    variant = info_cache_variant(ydl.params)
+    info = cache.get(url, variant)
+    if info is not None:
+        logging.debug(f"Reusing extracted info for {url}")
+        return info
+    with span('extract', url=url):
+        info = ydl.extract_info(url, download=False, ie_key=ie_key, process=False)
+    if info is None:
+        # Extraction failed and ignoreerrors swallowed it
+        return None
+    if isinstance(info.get('entries'), types.GeneratorType):
+        info['entries'] = yt_dlp.utils.LazyList(info['entries'])
+    cache.put(url, info, variant)
+    return dict(info)
+
+
+def download_with_tracking(ydl_opts: Dict[str, Any], input_url: str, entry: Optional[Dict[str, Any]] = None,
+                           extra_info: Optional[Dict[str, Any]] = None) -> Tuple[int, List[str]]:
+    """
+    Run a yt-dlp download and collect the files it finished writing. With entry,
+    only that (already enumerated) playlist entry is downloaded.
+    Fragments and pre-merge streams go to the staging area; yt-dlp moves the
+    finished files to the output folder itself.
+    Returns (yt-dlp return code, downloaded file paths).
+    """
+    with job_scope(ydl_opts.get('_stage_job')), staging_work_dir() as work_dir:
+        if work_dir is not None:
+            ydl_opts = dict(ydl_opts, paths=dict(ydl_opts.get('paths', {}), temp=work_dir))
+        return _download_with_tracking(ydl_opts, input_url, entry, extra_info)
+
+
+def _download_with_tracking(ydl_opts: Dict[str, Any], input_url: str, entry: Optional[Dict[str, Any]] = None,
+                            extra_info: Optional[Dict[str, Any]] = None) -> Tuple[int, List[str]]:
+    downloaded_files = []
+    moved_files = []
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        # Add a hook to track downloaded files
+        original_hooks = ydl_opts.get('progress_hooks', [])
+
+        def track_downloads(d):
+            if d['status'] == 'finished':
+                filename = d.get('filename', '')
+                if filename and os.path.exists(filename):
+                    downloaded_files.append(filename)
+            # Call original hooks
+            for hook in original_hooks:
+                hook(d)
+
+        def track_moves(d):
+            # Final location of each item once it has left the temp path
+            if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFiles':
+                filepath = d.get('info_dict', {}).get('filepath')
+                if filepath:
+                    moved_files.append(filepath)
+
+        ydl.add_progress_hook(track_downloads)
+        ydl.add_postprocessor_hook(track_moves)
+
+        # Download
+        variant = info_cache_variant(ydl_opts)
+        cached_info = get_info_cache().get(input_url, variant) if entry is None else None
+        if entry is None and cached_info is None:
+            return_code = ydl.download([input_url])
+        elif entry is None:
+            # Same as download() minus the extraction already done during analysis
+            try:
+                ydl.process_ie_result(cached_info, download=True)
+            except Exception:
+                # The cached info may have gone stale (expired media URLs); don't reuse it
+                get_info_cache().discard(input_url, variant)
+                raise
+            return_code = 0
+        else:
+            # Errors raise DownloadError, as they do from download() with ignoreerrors off
+            ydl.process_ie_result(dict(entry), download=True, extra_info=dict(extra_info or {}))
+            return_code = 0
+
+    return return_code, moved_files or [path for path in downloaded_files if os.path.exists(path)]
+
+
+def resolve_playlist(ydl, input_url: str) -> Dict[str, Any]:
+    """Top-level info of a URL without processing its entries (redirects like watch?list= are followed)"""
+    info = extract_info_cached(ydl, input_url)
+    while info.get('_type') in ('url', 'url_transparent'):
+        info = extract_info_cached(ydl, info['url'], info.get('ie_key'))
+    return info
+
+
+def parse_playlist_items(spec: Optional[str]) -> Callable[[int], bool]:
+    """Predicate for a playlist_items selection like "1-3,5,8:" (None selects everything)"""
+    if not spec:
+        return lambda index: True
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if part.endswith(':'):
+            ranges.append((int(part[:-1] or 1), None))
+        elif '-' in part:
+            start, end = part.split('-', 1)
+            ranges.append((int(start), int(end)))
+        elif part:
+            ranges.append((int(part), int(part)))
+    return lambda index: any(start <= index and (end is None or index <= end) for start, end in ranges)
+
+
+def iter_playlist_entries(ydl, playlist: Dict[str, Any], selected: Callable[[int], bool],
+                          on_count: Optional[Callable[[int], None]] = None
+                          ) -> Iterator[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+    """
+    (playlist index, entry, extra info) for each selected entry not in the download
+    archive. Entries are pulled lazily, page by page for big playlists, and extra info
+    carries the playlist fields yt-dlp itself would add (output template, journal keys
+    and progress use them). on_count gets the playlist length as soon as it is known:
+    up front if the site says, otherwise once the last entry has been enumerated.
+    """
+    entries = playlist.get('entries') or []
+    count = playlist.get('playlist_count') or (len(entries) if isinstance(entries, list) else None)
+    if count and on_count:
+        on_count(count)
+    common = {
+        'playlist': playlist.get('title') or playlist.get('id'),
+        'playlist_id': playlist.get('id'),
+        'playlist_title': playlist.get('title'),
+        'playlist_uploader': playlist.get('uploader'),
+        'playlist_uploader_id': playlist.get('uploader_id'),
+        'playlist_count': count,
+        'n_entries': count,
+        '__last_playlist_index': count or 0,
+    }
+    index = 0
+    for index, entry in enumerate(entries, 1):
+        if not entry or not selected(index):
+            continue
+        if ydl.in_download_archive(entry):
+            logging.info(f"Skipping playlist item {index}, already downloaded")
+            continue
+        yield index, entry, dict(common, playlist_index=index, playlist_autonumber=index)
+    if not count and on_count:
+        on_count(index)
+
+
+def download_playlist_concurrently(ydl_opts: Dict[str, Any], input_url: str,
+                                   workers: int = DEFAULT_PLAYLIST_DOWNLOAD_WORKERS,
+                                   priority: int = PRIORITY_NORMAL,
+                                   on_playlist_count: Optional[Callable[[int], None]] = None) -> Tuple[int, List[str]]:
+    """
+    Download up to `workers` playlist entries at once, each with its own YoutubeDL on
+    the network budget. Entries are enumerated only as far as needed to keep the
+    workers busy, so the first files arrive before a long playlist is fully listed.
+    Per-site caps and throttling backoff come from the shared site limiter; a
+    throttled item is retried after the pause. Any other failure stops new items
+    from starting and is raised once the running ones have finished.
+    """
+    limiter = get_site_limiter()
+    scheduler = get_scheduler()
+    default_site = get_site_key(input_url, 'unknown')
+
+    with job_scope(ydl_opts.get('_stage_job')), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        playlist = resolve_playlist(ydl, input_url)
+        if playlist.get('_type') != 'playlist':
+            return download_with_tracking(ydl_opts, input_url)
+        entries = iter_playlist_entries(ydl, playlist, parse_playlist_items(ydl_opts.get('playlist_items')),
+                                        on_playlist_count)
+
+        pending = []  # items waiting for a site slot: [index, entry, extra, site, attempts]
+        in_flight = {}
+        downloaded_files = []
+        error = None
+        exhausted = False
+        while True:
+            # Enumerate only as far as there is room to start downloads
+            while not exhausted and error is None and len(pending) < workers:
+                item = next(entries, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    index, entry, extra = item
+                    pending.append([index, entry, extra, get_site_key(entry.get('url', ''), default_site), 0])
+
+            if error is None:
+                for item in list(pending):
+                    if len(in_flight) >= workers:
+                        break
+                    if limiter.try_acquire(item[3]):
+                        pending.remove(item)
+                        future = scheduler.submit(RESOURCE_NETWORK, download_with_tracking, ydl_opts, input_url,
+                                                  item[1], item[2], priority=priority, batch=input_url)
+                        in_flight[future] = item
+
+            if not in_flight:
+                if error is not None or (exhausted and not pending):
+                    break
+                # Every waiting item's site is busy or backing off
+                time.sleep(min(max(min(limiter.backoff_remaining(item[3]) for item in pending), 0.05), 1.0))
+                continue
+
+            done, _ = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                limiter.release(item[3])
+                try:
+                    _, files = future.result()
+                except Exception as e:
+                    if is_throttling_error(e) and item[4] < PLAYLIST_THROTTLE_RETRIES:
+                        limiter.report_throttled(item[3])
+                        item[4] += 1
+                        pending.insert(0, item)
+                    elif error is None:
+                        logging.error(f"Playlist item {item[0]} failed: {e}")
+                        error = e
+                    continue
+                limiter.report_success(item[3])
+                downloaded_files.extend(files)
+
+    if error is not None:
+        raise error
+    return 0, downloaded_files
+
+
+def submit_download(ydl_opts: Dict[str, Any], input_url: str, priority: int = PRIORITY_NORMAL,
+                    workers: int = 1, on_playlist_count: Optional[Callable[[int], None]] = None) -> Future:
+    """
+    Queue download_with_tracking on the scheduler's network budget. Playlists with
+    workers > 1 are downloaded by download_playlist_concurrently instead, which
+    reports the playlist length to on_playlist_count once it is known.
+    """
+    if workers > 1 and not ydl_opts.get('noplaylist', True):
+        # The coordinator only waits on its items, so it must not hold a network slot itself
+        return get_scheduler().submit(RESOURCE_BACKGROUND, download_playlist_concurrently, ydl_opts, input_url,
+                                      workers, priority, on_playlist_count, priority=priority, batch=input_url)
+    return get_scheduler().submit(RESOURCE_NETWORK, download_with_tracking, ydl_opts, input_url,
+                                  priority=priority, batch=input_url)
+
+
+class CodecCheckPipeline:
+    """
+    Runs the Premiere H.264 compatibility pass on each item as soon as yt-dlp has
+    moved it into place, on the scheduler's CPU budget, while the next item downloads.
+    """
+
+    def __init__(self, ffmpeg_path: str, ffprobe_path: str, batch: Optional[str] = None,
+                 status_callback: Optional[Callable[[str], None]] = None, job: Optional[str] = None):
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        self.batch = batch
+        self.status_callback = status_callback
+        self.job = job
+        self._futures = {}  # file path -> Future of check_and_convert_codec
+        self._lock = threading.Lock()
+
+    def postprocessor_hook(self, d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFiles':
+            self.submit(d.get('info_dict', {}).get('filepath'))
+
+    def submit(self, filepath: Optional[str]) -> None:
+        """Queue one downloaded file (non-mp4 and already queued files are ignored)"""
+        if not filepath or not filepath.lower().endswith('.mp4'):
+            return
+        with self._lock:
+            if filepath not in self._futures:
+                self._futures[filepath] = get_scheduler().submit(RESOURCE_CPU_ENCODE, self._check, filepath,
+                                                                 batch=self.batch)
+
+    def _check(self, filepath: str) -> bool:
+        if self.status_callback:
+            self.status_callback(filepath)
+        with job_scope(self.job):
+            return check_and_convert_codec(filepath, self.ffmpeg_path, self.ffprobe_path)
+
+    def wait(self, downloaded_files: Optional[List[str]] = None) -> List[str]:
+        """
+        Queue whatever the hooks missed from downloaded_files, wait for every check
+        and return the files that were converted to H.264.
+        """
+        for filepath in downloaded_files or []:
+            self.submit(filepath)
+        with self._lock:
+            futures = dict(self._futures)
+        converted = []
+        for filepath, future in futures.items():
+            try:
+                if future.result():
+                    converted.append(filepath)
+            except Exception as e:
+                logging.error(f"Error processing {filepath}: {e}")
+        return converted
+
+
+def attach_codec_pipeline(ydl_opts: Dict[str, Any], batch: Optional[str] = None,
+                          status_callback: Optional[Callable[[str], None]] = None) -> Optional[CodecCheckPipeline]:
+    """Hook the H.264 compatibility pass into a download; None when the download does not need it"""
+    if not ydl_opts.get('_check_codec'):
+        return None
+    pipeline = CodecCheckPipeline(ydl_opts['_ffmpeg_path'], ydl_opts['_ffprobe_path'], batch, status_callback,
+                                  ydl_opts.get('_stage_job'))
+    ydl_opts['postprocessor_hooks'] = list(ydl_opts.get('postprocessor_hooks', [])) + [pipeline.postprocessor_hook]
+    return pipeline
+
+
+class DownloadStageTimer:
+    """Records a 'download' span per file and one per postprocessor run from yt-dlp's hooks"""
+
+    def __init__(self, job: Optional[str] = None):
+        self.job = job
+        self._started = {}  # (stage, key) -> (wall clock start, perf_counter start)
+        self._lock = threading.Lock()
+
+    def _start(self, key) -> None:
+        with self._lock:
+            self._started.setdefault(key, (time.time(), time.perf_counter()))
+
+    def _finish(self, key, stage: str, status: str, elapsed: Optional[float] = None, **labels) -> None:
+        with self._lock:
+            started = self._started.pop(key, None)
+        if started is None:
+            # Already recorded (hooks can be reported twice) or nothing was transferred
+            return
+        if elapsed is not None:
+            # yt-dlp's own measurement of this attempt; a start left by a failed attempt is stale
+            record_span(stage, time.time() - elapsed, elapsed, status, job=self.job, **labels)
+        else:
+            record_span(stage, started[0], time.perf_counter() - started[1], status, job=self.job, **labels)
+
+    def progress_hook(self, d):
+        filename = d.get('filename') or ''
+        key = ('download', filename)
+        if d['status'] == 'downloading':
+            self._start(key)
+        elif d['status'] in ('finished', 'error'):
+            self._finish(key, 'download', 'ok' if d['status'] == 'finished' else 'error', d.get('elapsed'),
+                         file=os.path.basename(filename),
+                         bytes=d.get('total_bytes') or d.get('downloaded_bytes'))
+
+    def postprocessor_hook(self, d):
+        name = d.get('postprocessor') or 'unknown'
+        info = d.get('info_dict', {})
+        key = (name, info.get('id'), info.get('playlist_index'))
+        if d['status'] == 'started':
+            self._start(key)
+        elif d['status'] == 'finished':
+            self._finish(key, POSTPROCESSOR_STAGES.get(name, 'postprocess'), 'ok',
+                         postprocessor=name, file=os.path.basename(info.get('filepath') or ''))
+
+
+def attach_stage_timing(ydl_opts: Dict[str, Any], job: Optional[str]) -> DownloadStageTimer:
+    """
+    Time the download, merge and postprocessing of every item as part of job.
+    Attach before the codec pipeline so its checks are attributed to the job too.
+    """
+    timer = DownloadStageTimer(job)
+    ydl_opts['_stage_job'] = job
+    ydl_opts['progress_hooks'] = list(ydl_opts.get('progress_hooks', [])) + [timer.progress_hook]
+    ydl_opts['postprocessor_hooks'] = list(ydl_opts.get('postprocessor_hooks', [])) + [timer.postprocessor_hook]
+    return timer
+
+
+def attach_download_archive(ydl_opts: Dict[str, Any], output_folder: str, format_type: str,
+                            quality: str) -> DownloadArchive:
+    """
+    Skip items already downloaded into output_folder with the same format and quality,
+    so a playlist re-run only fetches what is new. Save the archive after the download.
+    """
+    archive = DownloadArchive(output_folder, format_type, quality)
+    ydl_opts['download_archive'] = archive
+    ydl_opts['postprocessor_hooks'] = list(ydl_opts.get('postprocessor_hooks', [])) + [archive.postprocessor_hook]
+    if len(archive):
+        logging.info(f"Download archive has {len(archive)} items for {output_folder}")
+    return archive
+
+
+def journal_item_key(info: Dict[str, Any]) -> str:
+    """Job journal key of a download: its playlist position, or 'single'"""
+    index = info.get('playlist_index')
+    return str(index) if index else 'single'
+
+
+def build_playlist_items(done_indices: List[int]) -> Optional[str]:
+    """yt-dlp playlist_items selecting every entry not yet downloaded (None if nothing is done)"""
+    if not done_indices:
+        return None
+    parts = []
+    expected = 1
+    for index in sorted(set(done_indices)):
+        if index > expected:
+            parts.append(str(expected) if index - 1 == expected else f"{expected}-{index - 1}")
+        expected = index + 1
+    parts.append(f"{expected}:")
+    return ",".join(parts)
+
+
+def attach_download_journal(ydl_opts: Dict[str, Any], journal_batch, resume: bool = False) -> Dict[str, Any]:
+    """
+    Record each downloaded item in the job journal: running on its first progress
+    update, done once yt-dlp has moved the finished file into place. When resuming,
+    half-written files are removed and only the missing playlist items are requested.
+    """
+    if resume:
+        journal_batch.journal.prepare_resume(journal_batch.id)
+        done_keys = [job['key'] for job in journal_batch.jobs(['done'])]
+        playlist_items = build_playlist_items([int(key) for key in done_keys if key.isdigit()])
+        if playlist_items:
+            ydl_opts['playlist_items'] = playlist_items
+            logging.info(f"Resuming playlist download, {len(done_keys)} items already done")
+
+    started = set()
+
+    def journal_progress_hook(d):
+        if d['status'] == 'downloading':
+            key = journal_item_key(d.get('info_dict', {}))
+            if (key, d.get('filename')) not in started:
+                started.add((key, d.get('filename')))
+                journal_batch.running(key, d.get('filename'))
+
+    def journal_postprocessor_hook(d):
+        if d['status'] == 'finished' and d.get('postprocessor') == 'MoveFiles':
+            info = d.get('info_dict', {})
+            journal_batch.done(journal_item_key(info), info.get('filepath'))
+
+    ydl_opts['progress_hooks'] = list(ydl_opts.get('progress_hooks', [])) + [journal_progress_hook]
+    ydl_opts['postprocessor_hooks'] = list(ydl_opts.get('postprocessor_hooks', [])) + [journal_postprocessor_hook]
+    return ydl_opts
+
+
+def finish_download_journal(journal_batch, success: bool) -> None:
+    """Close a download batch, leaving a failed one resumable if it got anywhere"""
+    if success or not journal_batch.jobs(['done']):
+        journal_batch.finish()
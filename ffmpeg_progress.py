@@ -0,0 +1,161 @@
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+
+# Machine-readable ffmpeg progress (-progress pipe:1).
+# ffmpeg writes blocks of key=value lines, each block ending with
+# progress=continue or progress=end. Stdlib only.
+
+STDERR_TAIL_LINES = 40
+
+
+def parse_ffmpeg_time(value: str) -> Optional[float]:
+    """Parse HH:MM:SS.micro into seconds"""
+    try:
+        hours, minutes, seconds = value.strip().split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except (ValueError, AttributeError):
+        return None
+
+
+class FFmpegProgressParser:
+    """
+    Incremental parser for ffmpeg's -progress output.
+    Feed it one line at a time; feed() returns a snapshot dict whenever a block completes.
+    """
+
+    def __init__(self, duration: Optional[float] = None):
+        self.duration = duration if duration and duration > 0 else None
+        self._block = {}
+        self.latest = None
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        """Consume one line of progress output"""
+        line = line.strip()
+        if '=' not in line:
+            return None
+        key, value = line.split('=', 1)
+        self._block[key.strip()] = value.strip()
+        if key.strip() != 'progress':
+            return None
+
+        snapshot = self._build_snapshot(self._block)
+        self._block = {}
+        self.latest = snapshot
+        return snapshot
+
+    def _build_snapshot(self, block: Dict[str, str]) -> Dict[str, Any]:
+        """Turn a raw key=value block into typed progress numbers"""
+        out_time = None
+        # out_time_ms is in microseconds too (a long-standing ffmpeg quirk)
+        for key in ('out_time_us', 'out_time_ms'):
+            if block.get(key, 'N/A') not in ('N/A', ''):
+                try:
+                    out_time = int(block[key]) / 1_000_000
+                    break
+                except ValueError:
+                    pass
+        if out_time is None and 'out_time' in block:
+            out_time = parse_ffmpeg_time(block['out_time'])
+        out_time = max(out_time or 0.0, 0.0)
+
+        snapshot = {
+            'frame': _to_int(block.get('frame')),
+            'fps': _to_float(block.get('fps')),
+            'bitrate_kbps': _to_float(block.get('bitrate', '').replace('kbits/s', '')),
+            'total_size': _to_int(block.get('total_size')),
+            'out_time': out_time,
+            'speed': _to_float(block.get('speed', '').rstrip('x')),
+            'progress': block.get('progress', 'continue'),
+            'fraction': None
+        }
+
+        if snapshot['progress'] == 'end':
+            snapshot['fraction'] = 1.0
+        elif self.duration:
+            snapshot['fraction'] = min(out_time / self.duration, 1.0)
+        return snapshot
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def add_progress_args(cmd: List[str]) -> List[str]:
+    """Insert the progress channel as global options right after the ffmpeg binary"""
+    return [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+
+
+def run_ffmpeg_with_progress(cmd: List[str], duration: Optional[float] = None,
+                             progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             popen_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run an ffmpeg command, parsing its progress channel as it goes.
+    Only the last STDERR_TAIL_LINES lines of stderr are kept in memory.
+    Raises subprocess.CalledProcessError on failure; returns throughput stats on success.
+    """
+    full_cmd = add_progress_args(cmd)
+    parser = FFmpegProgressParser(duration)
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+    start_time = time.time()
+
+    process = subprocess.Popen(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               stdin=subprocess.DEVNULL, text=True, errors='replace',
+                               **(popen_kwargs or {}))
+
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip())
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    for line in process.stdout:
+        snapshot = parser.feed(line)
+        if snapshot and progress_callback:
+            try:
+                progress_callback(snapshot)
+            except Exception as e:
+                logging.error(f"Progress callback failed: {e}")
+
+    return_code = process.wait()
+    stderr_thread.join(timeout=5)
+
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, full_cmd, stderr="\n".join(stderr_tail))
+
+    return summarize_throughput(parser.latest, time.time() - start_time)
+
+
+def summarize_throughput(snapshot: Optional[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Per-job throughput: realtime multiple and average frames per second"""
+    out_time = snapshot['out_time'] if snapshot else 0.0
+    frames = snapshot['frame'] if snapshot and snapshot['frame'] else 0
+    return {
+        'elapsed': elapsed,
+        'out_time': out_time,
+        'frames': frames,
+        'realtime_multiple': out_time / elapsed if elapsed > 0 else 0.0,
+        'avg_fps': frames / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def log_throughput(label: str, stats: Dict[str, Any]) -> None:
+    """Log a job's throughput in a consistent format"""
+    message = f"{label}: {stats['elapsed']:.2f}s, {stats['realtime_multiple']:.2f}x realtime"
+    if stats['frames']:
+        message += f", {stats['avg_fps']:.1f} frames/s"
+    logging.info(message)
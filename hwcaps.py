@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional, Set
+
+# One-time detection of the hardware encoders this ffmpeg build can actually use.
+# Results are persisted keyed by the ffmpeg binary's SHA-256, so a given build is
+# only probed once. Stdlib only so converter.py can import it freely.
+
+# Preference order for hardware H.264 encoding
+HW_ENCODER_BACKENDS = [
+    ("nvenc", "h264_nvenc"),
+    ("qsv", "h264_qsv"),
+    ("amf", "h264_amf"),
+    ("vaapi", "h264_vaapi"),
+]
+SOFTWARE_BACKEND = ("software", "libx264")
+VAAPI_DEVICE = "/dev/dri/renderD128"
+TEST_ENCODE_TIMEOUT = 20
+
+
+def _subprocess_kwargs() -> Dict[str, Any]:
+    return {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+
+
+def resolve_binary(ffmpeg_path: str) -> str:
+    """Absolute path of the ffmpeg binary (PATH lookup for bare names)"""
+    if os.path.exists(ffmpeg_path):
+        return os.path.abspath(ffmpeg_path)
+    return shutil.which(ffmpeg_path) or ffmpeg_path
+
+
+def hash_binary(path: str) -> str:
+    """SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_encoders(output: str) -> Set[str]:
+    """Encoder names from 'ffmpeg -encoders' output"""
+    encoders = set()
+    in_list = False
+    for line in output.splitlines():
+        if line.strip().startswith('------'):
+            in_list = True
+            continue
+        parts = line.split()
+        if in_list and len(parts) >= 2 and len(parts[0]) == 6:
+            encoders.add(parts[1])
+    return encoders
+
+
+def parse_hwaccels(output: str) -> List[str]:
+    """Method names from 'ffmpeg -hwaccels' output"""
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.strip().lower().startswith('hardware acceleration methods'):
+            return [l.strip() for l in lines[index + 1:] if l.strip()]
+    return []
+
+
+def build_test_encode_command(ffmpeg_path: str, encoder: str) -> List[str]:
+    """Tiny synthetic encode that fails fast when the hardware is missing"""
+    cmd = [ffmpeg_path, '-hide_banner', '-loglevel', 'error']
+    if encoder.endswith('_vaapi'):
+        cmd.extend(['-vaapi_device', VAAPI_DEVICE])
+    cmd.extend(['-f', 'lavfi', '-i', 'color=black:s=256x256:d=0.1', '-frames:v', '1'])
+    if encoder.endswith('_vaapi'):
+        cmd.extend(['-vf', 'format=nv12,hwupload'])
+    cmd.extend(['-c:v', encoder, '-f', 'null', '-'])
+    return cmd
+
+
+def _run(cmd: List[str], timeout: int) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, **_subprocess_kwargs())
+
+
+def detect_capabilities(ffmpeg_path: str) -> Dict[str, Any]:
+    """Probe ffmpeg for encoders/hwaccels and test-encode with each hardware encoder"""
+    start_time = time.time()
+    encoders = set()
+    hwaccels = []
+    try:
+        encoders = parse_encoders(_run([ffmpeg_path, '-hide_banner', '-encoders'], 30).stdout)
+        hwaccels = parse_hwaccels(_run([ffmpeg_path, '-hide_banner', '-hwaccels'], 30).stdout)
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.error(f"Could not query ffmpeg capabilities: {e}")
+
+    working = {}
+    for backend, encoder in HW_ENCODER_BACKENDS:
+        if encoder not in encoders:
+            continue
+        try:
+            result = _run(build_test_encode_command(ffmpeg_path, encoder), TEST_ENCODE_TIMEOUT)
+            working[backend] = result.returncode == 0
+        except (OSError, subprocess.SubprocessError):
+            working[backend] = False
+
+    capabilities = {
+        'encoders': sorted(encoders),
+        'hwaccels': hwaccels,
+        'hw_encoders': {backend: ok for backend, ok in working.items()},
+        'detected_at': time.time(),
+        'detect_seconds': round(time.time() - start_time, 3)
+    }
+    usable = [b for b, ok in working.items() if ok] or ['none']
+    logging.info(f"Hardware encoders available: {', '.join(usable)}")
+    return capabilities
+
+
+def load_capabilities(ffmpeg_path: str, cache_file: str, refresh: bool = False) -> Dict[str, Any]:
+    """Capabilities for this ffmpeg binary, from the persisted cache when possible"""
+    binary = resolve_binary(ffmpeg_path)
+    try:
+        binary_hash = hash_binary(binary)
+    except OSError as e:
+        logging.error(f"Could not hash ffmpeg binary {binary}: {e}")
+        return detect_capabilities(ffmpeg_path)
+
+    cache = {}
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable capability cache: {e}")
+
+    if not refresh and binary_hash in cache:
+        return cache[binary_hash]
+
+    capabilities = detect_capabilities(ffmpeg_path)
+    capabilities['ffmpeg_path'] = binary
+    cache[binary_hash] = capabilities
+    try:
+        with open(cache_file, 'w') as f:
+            json.dump(cache, f, indent=4)
+    except OSError as e:
+        logging.error(f"Could not save capability cache: {e}")
+    return capabilities
+
+
+def select_video_encoder(capabilities: Optional[Dict[str, Any]], use_gpu: bool = True) -> Dict[str, str]:
+    """Best H.264 encoder backend: nvenc > qsv > amf > vaapi > software"""
+    if use_gpu and capabilities:
+        hw_encoders = capabilities.get('hw_encoders', {})
+        for backend, encoder in HW_ENCODER_BACKENDS:
+            if hw_encoders.get(backend):
+                return {'backend': backend, 'encoder': encoder}
+    return {'backend': SOFTWARE_BACKEND[0], 'encoder': SOFTWARE_BACKEND[1]}
+
+
+class CapabilityDetector:
+    """Runs detection once in the background and hands out the result"""
+
+    def __init__(self):
+        self._capabilities = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, ffmpeg_path: str, cache_file: str) -> None:
+        """Begin background detection (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._detect, args=(ffmpeg_path, cache_file),
+                                            daemon=True, name="hwcaps")
+            self._thread.start()
+
+    def _detect(self, ffmpeg_path: str, cache_file: str) -> None:
+        try:
+            self._capabilities = load_capabilities(ffmpeg_path, cache_file)
+        except Exception as e:
+            logging.error(f"Capability detection failed: {e}")
+            self._capabilities = {'encoders': [], 'hwaccels': [], 'hw_encoders': {}}
+
+    def get(self, ffmpeg_path: str, cache_file: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Capabilities, starting detection if needed and waiting up to timeout for it"""
+        self.start(ffmpeg_path, cache_file)
+        self._thread.join(timeout)
+        return self._capabilities or {'encoders': [], 'hwaccels': [], 'hw_encoders': {}}
+
+
+capability_detector = CapabilityDetector()
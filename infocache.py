@@ -0,0 +1,94 @@
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Dict, Any, Optional
+
+# Short-lived cache of unprocessed yt-dlp info dicts, keyed by normalized URL. URL
+# analysis, the pre-download checks and the download itself all need the same
+# extraction; with this they share one. Entries expire quickly because the media
+# URLs inside an info dict do. Stdlib only.
+
+INFO_CACHE_TTL = 600  # seconds
+INFO_CACHE_MAX_ENTRIES = 32
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = ('si', 'feature', 'pp', 'fbclid', 'igshid', 'ref', 'ref_src')
+# yt-dlp options that change what an unprocessed extraction returns: whether a
+# watch?v=...&list=... URL is a video or a playlist, flat or resolved entries, which
+# entries lazy paging fetches and whether a failing page ends it or is skipped
+VARIANT_PARAMS = ('noplaylist', 'extract_flat', 'playlist_items', 'ignoreerrors')
+
+
+def normalize_url(url: str) -> str:
+    """Cache key of a URL: lowercase host without www., tracking parameters and fragment dropped"""
+    parts = urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in TRACKING_PARAMS and not key.startswith('utm_'))
+    return urlunsplit((parts.scheme.lower() or 'https', netloc, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+
+def info_cache_variant(params: Dict[str, Any]) -> str:
+    """Cache variant of a set of yt-dlp options; options left unset or off are not part of it"""
+    return ';'.join(f"{name}={params[name]}" for name in VARIANT_PARAMS if params.get(name))
+
+
+class InfoCache:
+    """
+    LRU of info dicts with a time-to-live. variant separates extractions of the same
+    URL that differ, e.g. watch?v=...&list=... with and without noplaylist, or a
+    one-entry flat analysis from the download (see info_cache_variant).
+    """
+
+    def __init__(self, ttl: float = INFO_CACHE_TTL, max_entries: int = INFO_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored at, info)
+        self._lock = threading.Lock()
+
+    def get(self, url: str, variant: str = '') -> Optional[Dict[str, Any]]:
+        """A shallow copy of the cached info (yt-dlp modifies what it processes), or None"""
+        key = (normalize_url(url), variant)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or time.time() - cached[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(cached[1])
+
+    def put(self, url: str, info: Dict[str, Any], variant: str = '') -> None:
+        key = (normalize_url(url), variant)
+        with self._lock:
+            self._entries[key] = (time.time(), info)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, url: str, variant: str = '') -> None:
+        """Forget a URL, e.g. after its download failed with the cached info"""
+        with self._lock:
+            self._entries.pop((normalize_url(url), variant), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_info_cache = None
+_info_cache_lock = threading.Lock()
+
+
+def get_info_cache() -> InfoCache:
+    """Process-wide info cache"""
+    global _info_cache
+    with _info_cache_lock:
+        if _info_cache is None:
+            _info_cache = InfoCache()
+        return _info_cache
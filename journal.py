@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Iterable
+
+# Crash-safe record of batch jobs (conversions and playlist downloads).
+# Every state change is committed immediately, so after a crash the jobs that
+# never reached "done" can be re-run on the next launch. Stdlib only.
+
+JOURNAL_FILE = "job_journal.sqlite3"
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_BATCHES_KEPT = 50
+# Leftovers a killed or failed job can leave next to its output
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".temp.mp4")
+
+
+class JournalBatch:
+    """One batch in the journal; records state transitions of its jobs"""
+
+    def __init__(self, journal: 'JobJournal', batch_id: int, kind: str, params: Dict[str, Any]):
+        self.journal = journal
+        self.id = batch_id
+        self.kind = kind
+        self.params = params
+
+    def add(self, key: str, input_path: Optional[str] = None, output_path: Optional[str] = None,
+            data: Optional[Dict[str, Any]] = None) -> None:
+        """Register a queued job (no-op if the key is already known)"""
+        self.journal._execute(
+            "INSERT OR IGNORE INTO jobs (batch_id, job_key, state, input_path, output_path, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.id, key, JOB_QUEUED, input_path, output_path, json.dumps(data or {}))
+        )
+
+    def running(self, key: str, output_path: Optional[str] = None, in_place: bool = False) -> None:
+        """
+        Job started; output_path is where a half-written file may be left. in_place
+        means the job writes output_path itself (no staging or temp name), so a crash
+        mid-job leaves a truncated file there.
+        """
+        self.add(key, output_path=output_path)
+        self.journal._execute(
+            "UPDATE jobs SET state = ?, started = ?, output_path = COALESCE(?, output_path), in_place = ? "
+            "WHERE batch_id = ? AND job_key = ?",
+            (JOB_RUNNING, time.time(), output_path, int(in_place), self.id, key)
+        )
+
+    def done(self, key: str, output_path: Optional[str] = None, elapsed: Optional[float] = None) -> None:
+        """Job finished successfully"""
+        self.add(key, output_path=output_path)
+        self.journal._execute(
+            "UPDATE jobs SET state = ?, finished = ?, elapsed = ?, error = NULL, "
+            "output_path = COALESCE(?, output_path) WHERE batch_id = ? AND job_key = ?",
+            (JOB_DONE, time.time(), elapsed, output_path, self.id, key)
+        )
+
+    def failed(self, key: str, error: Optional[str], elapsed: Optional[float] = None) -> None:
+        """Job failed"""
+        self.journal._execute(
+            "UPDATE jobs SET state = ?, finished = ?, elapsed = ?, error = ? WHERE batch_id = ? AND job_key = ?",
+            (JOB_FAILED, time.time(), elapsed, error, self.id, key)
+        )
+
+    def finish(self) -> None:
+        """The batch ran to its end (successfully or not); it will not be offered for resume"""
+        self.journal.finish_batch(self.id)
+
+    def jobs(self, states: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """This batch's jobs, optionally filtered by state"""
+        return self.journal.jobs(self.id, states)
+
+
+class JobJournal:
+    """
+    SQLite journal of batches and their jobs.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS batches ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, params TEXT NOT NULL, "
+                "created REAL NOT NULL, finished REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "batch_id INTEGER NOT NULL, job_key TEXT NOT NULL, state TEXT NOT NULL, "
+                "input_path TEXT, output_path TEXT, data TEXT, started REAL, finished REAL, "
+                "elapsed REAL, error TEXT, in_place INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (batch_id, job_key))"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            if 'in_place' not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN in_place INTEGER NOT NULL DEFAULT 0")
+
+    def _execute(self, query: str, params: tuple = ()) -> None:
+        # A journal write must never take the batch down with it
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(query, params)
+        except sqlite3.Error as e:
+            logging.error(f"Job journal write failed: {e}")
+
+    def _query(self, query: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+    def start_batch(self, kind: str, params: Dict[str, Any],
+                    jobs: Optional[List[Dict[str, Any]]] = None) -> JournalBatch:
+        """
+        Record a new batch. Each job dict needs a 'key' and may carry
+        'input_path', 'output_path' and 'data' (what is needed to re-run it).
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO batches (kind, params, created) VALUES (?, ?, ?)",
+                (kind, json.dumps(params), time.time())
+            )
+            batch_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (batch_id, job_key, state, input_path, output_path, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(batch_id, job['key'], JOB_QUEUED, job.get('input_path'), job.get('output_path'),
+                  json.dumps(job.get('data', {}))) for job in jobs or []]
+            )
+        return JournalBatch(self, batch_id, kind, params)
+
+    def get_batch(self, batch_id: int) -> Optional[JournalBatch]:
+        """A batch by id, or None"""
+        rows = self._query("SELECT kind, params FROM batches WHERE id = ?", (batch_id,))
+        if not rows:
+            return None
+        return JournalBatch(self, batch_id, rows[0][0], json.loads(rows[0][1]))
+
+    def finish_batch(self, batch_id: int) -> None:
+        """Mark a batch finished and forget the oldest finished batches"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE batches SET finished = ? WHERE id = ?", (time.time(), batch_id))
+                old_ids = [row[0] for row in self._conn.execute(
+                    "SELECT id FROM batches WHERE finished IS NOT NULL ORDER BY id DESC LIMIT -1 OFFSET ?",
+                    (FINISHED_BATCHES_KEPT,)
+                ).fetchall()]
+                for old_id in old_ids:
+                    self._conn.execute("DELETE FROM jobs WHERE batch_id = ?", (old_id,))
+                    self._conn.execute("DELETE FROM batches WHERE id = ?", (old_id,))
+        except sqlite3.Error as e:
+            logging.error(f"Job journal write failed: {e}")
+
+    def discard_batch(self, batch_id: int) -> None:
+        """Forget an interrupted batch the user chose not to resume"""
+        self.finish_batch(batch_id)
+
+    def jobs(self, batch_id: int, states: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Jobs of a batch in insertion order"""
+        rows = self._query(
+            "SELECT job_key, state, input_path, output_path, data, started, finished, elapsed, error, in_place "
+            "FROM jobs WHERE batch_id = ? ORDER BY rowid", (batch_id,)
+        )
+        jobs = [{'key': row[0], 'state': row[1], 'input_path': row[2], 'output_path': row[3],
+                 'data': json.loads(row[4] or '{}'), 'started': row[5], 'finished': row[6],
+                 'elapsed': row[7], 'error': row[8], 'in_place': bool(row[9])} for row in rows]
+        if states is not None:
+            states = set(states)
+            jobs = [job for job in jobs if job['state'] in states]
+        return jobs
+
+    def unfinished_batches(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Batches that never finished (the app died mid-run), newest first, with job counts"""
+        rows = self._query("SELECT id, kind, params, created FROM batches WHERE finished IS NULL ORDER BY id DESC")
+        batches = []
+        for batch_id, batch_kind, params, created in rows:
+            if kind and batch_kind != kind:
+                continue
+            counts = dict(self._query(
+                "SELECT state, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY state", (batch_id,)
+            ))
+            batches.append({'id': batch_id, 'kind': batch_kind, 'params': json.loads(params),
+                            'created': created, 'counts': counts,
+                            'total': sum(counts.values()), 'done': counts.get(JOB_DONE, 0)})
+        return batches
+
+    def prepare_resume(self, batch_id: int) -> List[Dict[str, Any]]:
+        """
+        Jobs of a batch that still have to run. Partial files of jobs that were running
+        or failed are deleted, and those jobs are queued again. The output itself is
+        only deleted for a job that was running in place when the process died; a
+        failed job may have failed before touching an earlier, good output.
+        """
+        pending = self.jobs(batch_id, (JOB_QUEUED, JOB_RUNNING, JOB_FAILED))
+        for job in pending:
+            if job['state'] != JOB_QUEUED and job['output_path']:
+                remove_partial_output(job['output_path'],
+                                      include_output=job['state'] == JOB_RUNNING and job['in_place'])
+            job['state'] = JOB_QUEUED
+            job['in_place'] = False
+        self._execute("UPDATE jobs SET state = ?, started = NULL, finished = NULL, error = NULL, in_place = 0 "
+                      "WHERE batch_id = ? AND state != ?", (JOB_QUEUED, batch_id, JOB_DONE))
+        return pending
+
+
+def remove_partial_output(output_path: str, include_output: bool = False) -> None:
+    """Delete the partial files a job may have left next to output_path (and output_path itself if asked)"""
+    suffixes = ("",) + PARTIAL_SUFFIXES if include_output else PARTIAL_SUFFIXES
+    for suffix in suffixes:
+        path = output_path + suffix
+        if os.path.isfile(path):
+            try:
+                os.remove(path)
+                logging.info(f"Removed half-written output {path}")
+            except OSError as e:
+                logging.warning(f"Could not remove half-written output {path}: {e}")
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_job_journal(db_path: Optional[str] = None) -> Optional[JobJournal]:
+    """Shared journal instance, opened on first use; None if it cannot be opened"""
+    global _journal
+    with _journal_lock:
+        if _journal is None and db_path:
+            try:
+                _journal = JobJournal(db_path)
+            except sqlite3.Error as e:
+                logging.error(f"Could not open job journal at {db_path}: {e}")
+        return _journal
@@ -5,7 +5,6 @@ import time
 import random
 import threading
 import subprocess
-from urllib.parse import urlparse
 import traceback
 import logging
 import json
@@ -29,6 +28,25 @@ from tkinterdnd2 import DND_FILES, TkinterDnD
 
 import vlc
 
+from converter import (
+    AUDIO_FORMATS, VIDEO_FORMATS, MSG_AUDIO_TO_VIDEO_ERROR,
+    MediaConverter, resource_path, get_absolute_path, get_ffmpeg_path, get_ffmpeg_paths,
+    build_conversion_jobs, run_conversion_batch,
+    start_hw_capability_detection, open_conversion_cache, parse_output_formats,
+    open_job_journal, start_conversion_journal, resume_conversion_jobs
+)
+from manifest import ConversionManifest
+from staging import configure_staging
+from timings import configure_timings, flush_timings, new_job_id, job_scope, span, TIMINGS_FILE
+from scheduler import run_detached, RESOURCE_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from progressbus import get_progress_bus, PROGRESS_FRAME_INTERVAL
+from downloader import (
+    validate_url, analyze_playlist_url, modify_download_options,
+    get_site_download_options, get_playlist_download_options, is_audio_only_site,
+    attach_download_journal, finish_download_journal, submit_download, attach_codec_pipeline,
+    attach_download_archive, attach_stage_timing, extract_info_cached, DEFAULT_PLAYLIST_DOWNLOAD_WORKERS
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
@@ -46,16 +64,14 @@ WINDOW_DEFAULT_HEIGHT = 550
 PROGRESS_UPDATE_INTERVAL = 2000
 
 # Media Constants
-AUDIO_FORMATS = ["wav", "ogg", "flac", "mp3", "m4a"]
-VIDEO_FORMATS = ["mp4", "avi", "mov", "mkv", "webm", "flv"]
-DEFAULT_BITRATE = "192k"
 NOTIFICATION_DURATION = 3
+# Multi-format presets for the format box (any "a+b+c" typed in works too)
+FORMAT_COMBINATIONS = ["mp3+ogg+flac", "mp3+wav", "mp4+webm", "mp4+mp3"]
 
 # Messages
 MSG_SELECT_INPUT = "Please select input files."
 MSG_SELECT_OUTPUT = "Please select an output folder."
 MSG_INVALID_FORMAT = "Please select a valid output format."
-MSG_AUDIO_TO_VIDEO_ERROR = "Converting an audio file to a video file is literally not a thing."
 
 # Platform-specific setup for Windows DLL loading
 if sys.version_info >= (3, 8) and os.name == 'nt':
@@ -77,7 +93,9 @@ class AppState:
         self.youtube_link_entry = None
         self.format_dropdown = None
         self.convert_button = None
+        self.download_button = None
         self.gpu_checkbox = None
+        self.incremental_checkbox = None
         self.youtube_status_label = None
         self.youtube_quality_dropdown = None
         self.progress_frame = None
@@ -85,6 +103,7 @@ class AppState:
 
         # Variables
         self.gpu_var = None
+        self.incremental_var = None
         self.format_var = None
         self.progress_var = None
         self.youtube_format_var = None
@@ -98,9 +117,11 @@ class AppState:
         self.bad_apple_overlay = None
 
         # Download tracking
-        self.playlist_current_index = 0
+        self.playlist_item_progress = {}  # playlist index -> fraction done (several run at once)
+        self.playlist_item_speed = {}  # playlist index -> bytes/s of its running download
         self.playlist_total_count = 0
         self.download_started_time = None
+        self.url_analysis = None  # token of the URL analysis in progress
 
         # Managers
         self.settings_manager = None
@@ -108,7 +129,8 @@ class AppState:
 
     def reset_download_tracking(self):
         """Reset download tracking variables"""
-        self.playlist_current_index = 0
+        self.playlist_item_progress = {}
+        self.playlist_item_speed = {}
         self.playlist_total_count = 0
         self.download_started_time = None
 
@@ -170,7 +192,19 @@ class SettingsManager:
         "use_gpu": True,
         "max_recent_folders": 5,
         "auto_check_updates": True,
-        "notification_volume": 0.7
+        "notification_volume": 0.7,
+        "conversion_workers": 0,  # 0 = one worker per CPU core
+        "incremental_conversion": False,
+        "conversion_cache": False,  # reuse identical conversions across batches and folders
+        "conversion_cache_max_mb": 10240,
+        "chunked_encode_min_seconds": 600,  # split longer CPU video encodes into parallel segments; 0 = off
+        "chunked_encode_segments": 0,  # 0 = half the CPU cores
+        "staging_enabled": True,  # write intermediates locally, move finished files to the output
+        "staging_dir": "",  # empty = system temp directory
+        "download_archive": True,  # playlist re-runs skip items already in the output folder
+        "playlist_download_workers": 3,  # playlist items downloaded at once; 1 = one after another
+        "stage_timings": True,  # append per-stage timings of every job to stage_timings.jsonl
+        "prometheus_textfile": ""  # also write stage totals here for node_exporter; empty = off
     }
 
     def __init__(self, settings_file: str = SETTINGS_FILE):
@@ -341,28 +375,6 @@ def log_errors():
         f.write(traceback.format_exc())
 
 
-def resource_path(relative_path: str) -> str:
-    """Get absolute path to resource, works for dev and for PyInstaller"""
-    try:
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-    except Exception:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-
-    return os.path.join(base_path, relative_path)
-
-
-def get_absolute_path(relative_path: str) -> str:
-    """Get absolute path to file that needs to be written to"""
-    if getattr(sys, 'frozen', False):
-        base_path = os.path.dirname(sys.executable)
-    else:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
-
-
 def safe_update_ui(func) -> None:
     """Safely execute UI updates on the main thread"""
     if callable(func) and app_state.app:
@@ -402,54 +414,10 @@ def temporary_directory(prefix="laces_temp_"):
 
 
 # FFmpeg handling
-def get_ffmpeg_path() -> str:
-    """Get the path to FFmpeg executable"""
-    if getattr(sys, 'frozen', False):
-        base_path = os.path.dirname(sys.executable)
-        ffmpeg_path = os.path.join(base_path, 'ffmpeg.exe')
-        if not os.path.exists(ffmpeg_path):
-            logging.error(f"FFmpeg not found at {ffmpeg_path}")
-            ffmpeg_path = resource_path('ffmpeg.exe')
-            if not os.path.exists(ffmpeg_path):
-                raise FileNotFoundError("FFmpeg executable not found in application bundle")
-        return ffmpeg_path
-    else:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        ffmpeg_path = os.path.join(base_path, 'dist', 'ffmpeg', 'bin', 'ffmpeg.exe')
-        if not os.path.exists(ffmpeg_path):
-            ffmpeg_path = os.path.join(base_path, 'ffmpeg.exe')
-            if not os.path.exists(ffmpeg_path):
-                from shutil import which
-                system_ffmpeg = which('ffmpeg.exe')
-                if system_ffmpeg:
-                    return system_ffmpeg
-                raise FileNotFoundError("FFmpeg not found in expected development location or system PATH.")
-        return ffmpeg_path
-
-
 def initialize_ffmpeg_paths() -> Tuple[str, str]:
     """Initialize FFmpeg and FFprobe paths"""
     try:
-        ffmpeg_path = get_ffmpeg_path()
-        if getattr(sys, 'frozen', False):
-            ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
-            if not os.path.exists(ffprobe_path):
-                ffprobe_path = resource_path('ffprobe.exe')
-        else:
-            if sys.platform == 'win32':
-                from shutil import which
-                ffprobe_path = which('ffprobe.exe')
-                if not ffprobe_path:
-                    ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
-                    if not os.path.exists(ffprobe_path):
-                        raise FileNotFoundError("FFprobe not found in PATH")
-            else:
-                ffprobe_path = "ffprobe"
-
-        if not os.path.exists(ffmpeg_path):
-            raise FileNotFoundError(f"FFmpeg not found at: {ffmpeg_path}")
-        if sys.platform == 'win32' and not os.path.exists(ffprobe_path):
-            raise FileNotFoundError(f"FFprobe not found at: {ffprobe_path}")
+        ffmpeg_path, ffprobe_path = get_ffmpeg_paths()
 
         AudioSegment.converter = ffmpeg_path
         AudioSegment.ffmpeg = ffmpeg_path
@@ -529,7 +497,7 @@ def play_notification(audio_path: Optional[str] = None, duration: int = NOTIFICA
             player.release()
             logging.info("Audio notification playback ended")
 
-        threading.Thread(target=stop_and_cleanup, daemon=True).start()
+        run_detached(RESOURCE_BACKGROUND, stop_and_cleanup, priority=PRIORITY_BULK)
         return True
 
     except Exception as e:
@@ -756,7 +724,7 @@ def show_vlc_overlay(video_path: str, duration: int = 11):
             overlay.destroy()
             logging.info("VLC playback ended; overlay destroyed.")
 
-        threading.Thread(target=close_overlay, daemon=True).start()
+        run_detached(RESOURCE_BACKGROUND, close_overlay, priority=PRIORITY_BULK)
     except Exception as e:
         logging.error(f"Error in VLC playback: {e}")
         show_error("Video Error", "Could not play video. Check error_log.txt for details.")
@@ -764,208 +732,6 @@ def show_vlc_overlay(video_path: str, duration: int = 11):
             overlay.destroy()
 
 
-# File handling utilities
-def safe_filename(filepath: str) -> str:
-    """Ensure filename is safe for the filesystem"""
-    import string
-    allowed_chars = string.ascii_letters + string.digits + " ._-()"
-    directory, filename = os.path.split(filepath)
-    base, ext = os.path.splitext(filename)
-    safe_base = ''.join(ch if ch in allowed_chars else '_' for ch in base)
-
-    if not safe_base:
-        safe_base = "file"
-
-    safe_name = safe_base + ext
-    if safe_name != filename:
-        new_path = os.path.join(directory, safe_name)
-        count = 1
-        while os.path.exists(new_path):
-            new_path = os.path.join(directory, f"{safe_base}_{count}{ext}")
-            count += 1
-        try:
-            os.rename(filepath, new_path)
-            return new_path
-        except PermissionError:
-            return filepath
-    return filepath
-
-
-# URL validation
-def is_valid_url(input_url: str) -> bool:
-    """Check if URL is from a supported platform"""
-    supported_domains = [
-        'youtube.com', 'youtu.be',
-        'music.youtube.com',
-        'twitter.com', 'x.com',
-        'tiktok.com',
-        'dailymotion.com', 'dai.ly',
-        'vimeo.com',
-        'instagram.com/reels', 'instagram.com/reel',
-        'twitch.tv',
-        'facebook.com', 'fb.watch',
-        'soundcloud.com', 'snd.sc',
-        'bandcamp.com',
-        'reddit.com',
-        'ok.ru',
-        'rumble.com'
-    ]
-    try:
-        parsed_url = urlparse(input_url)
-        cleaned_path = parsed_url.path.split('?')[0].lower()
-        netloc = parsed_url.netloc.lower()
-        return any(domain in (netloc + cleaned_path) for domain in supported_domains)
-    except Exception:
-        return False
-
-
-def validate_url(url: str) -> bool:
-    """Validate URL format and content"""
-    if not url or not isinstance(url, str):
-        return False
-    url = url.strip()
-    if not url:
-        return False
-    return is_valid_url(url)
-
-
-# Media conversion classes and functions
-class MediaConverter:
-    """Handles media file conversions"""
-
-    def __init__(self, ffmpeg_path: str):
-        self.ffmpeg_path = ffmpeg_path
-
-    def validate_conversion(self, input_format: str, output_format: str) -> Tuple[bool, Optional[str]]:
-        """Validate if conversion is allowed"""
-        if input_format in AUDIO_FORMATS and output_format in VIDEO_FORMATS:
-            return False, MSG_AUDIO_TO_VIDEO_ERROR
-        return True, None
-
-    def check_video_has_audio(self, input_path: str) -> bool:
-        """Check if video file contains audio stream"""
-        probe_cmd = [self.ffmpeg_path, "-i", input_path, "-hide_banner"]
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=False)
-        return "Stream #0" in probe_result.stderr and "Audio:" in probe_result.stderr
-
-    def get_audio_conversion_args(self, output_format: str) -> List[str]:
-        """Get FFmpeg arguments for audio conversion"""
-        args_map = {
-            "mp3": ["-acodec", "libmp3lame", "-q:a", "2", "-b:a", DEFAULT_BITRATE],
-            "ogg": ["-acodec", "libvorbis", "-q:a", "6"],
-            "flac": ["-acodec", "flac"],
-            "wav": ["-acodec", "pcm_s16le"],
-            "m4a": ["-acodec", "aac", "-b:a", DEFAULT_BITRATE]
-        }
-        return args_map.get(output_format, [])
-
-    def convert_single_file(self, input_path: str, output_path: str,
-                            input_format: str, output_format: str, use_gpu: bool) -> bool:
-        """Convert a single file"""
-        try:
-            # Video to Video
-            if input_format in VIDEO_FORMATS and output_format in VIDEO_FORMATS:
-                direct_ffmpeg_gpu_video2video(input_path, output_path, output_format, use_gpu)
-                return True
-
-            # Build FFmpeg command
-            ffmpeg_cmd = [self.ffmpeg_path, "-i", input_path, "-y"]
-
-            # Video to Audio
-            if input_format in VIDEO_FORMATS and output_format in AUDIO_FORMATS:
-                if not self.check_video_has_audio(input_path):
-                    raise ValueError("Video file has no audio track")
-                ffmpeg_cmd.append("-vn")  # No video
-
-            # Add format-specific arguments
-            ffmpeg_cmd.extend(self.get_audio_conversion_args(output_format))
-            ffmpeg_cmd.append(output_path)
-
-            # Execute conversion
-            if sys.platform == 'win32':
-                subprocess.run(ffmpeg_cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW,
-                               capture_output=True, text=True)
-            else:
-                subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True)
-
-            return True
-
-        except subprocess.CalledProcessError as e:
-            logging.error(f"FFmpeg conversion failed: {e}")
-            raise
-        except Exception as e:
-            logging.error(f"Conversion error: {e}")
-            raise
-
-
-def direct_ffmpeg_gpu_video2video(input_path: str, output_path: str,
-                                  output_format: str, use_gpu: bool) -> None:
-    """Direct video to video conversion with optional GPU acceleration"""
-    try:
-        ffmpeg_path = get_ffmpeg_path()
-        if not os.path.exists(input_path):
-            raise FileNotFoundError(f"Input file not found: {input_path}")
-
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # Special handling for WebM
-        if output_format.lower() == "webm":
-            cpu_cmd = [ffmpeg_path, "-i", input_path,
-                       "-c:v", "libvpx-vp9", "-crf", "30", "-b:v", "0",
-                       "-c:a", "libopus", "-b:a", "128k",
-                       "-y", output_path]
-            subprocess.run(cpu_cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            return
-
-        # Try GPU acceleration first
-        if use_gpu:
-            gpu_cmd = None
-            if output_format.lower() == "avi":
-                gpu_cmd = [ffmpeg_path, "-hwaccel", "cuda", "-i", input_path,
-                           "-c:v", "mpeg4", "-q:v", "5", "-c:a", "mp3", "-y", output_path]
-            elif output_format.lower() == "flv":
-                gpu_cmd = [ffmpeg_path, "-hwaccel", "cuda", "-hwaccel_output_format", "cuda",
-                           "-i", input_path, "-c:v", "h264_nvenc", "-preset", "p1",
-                           "-profile:v", "main", "-level", "3.1",
-                           "-b:v", "2M", "-maxrate", "2.5M", "-bufsize", "4M",
-                           "-c:a", "aac", "-b:a", "128k",
-                           "-f", "flv", "-y", output_path]
-            else:
-                # Default GPU handling for MP4, MKV, etc.
-                gpu_cmd = [ffmpeg_path, "-hwaccel", "cuda", "-hwaccel_output_format", "cuda",
-                           "-i", input_path, "-c:v", "h264_nvenc", "-preset", "p1", "-tune", "hq",
-                           "-rc", "vbr", "-cq", "23", "-b:v", "0", "-maxrate", "130M",
-                           "-bufsize", "130M", "-spatial-aq", "1", "-c:a", "aac", "-b:a", DEFAULT_BITRATE,
-                           "-y", output_path]
-
-            if gpu_cmd:
-                try:
-                    subprocess.run(gpu_cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-                    return
-                except subprocess.CalledProcessError:
-                    logging.info(f"GPU acceleration failed for {output_format}, falling back to CPU")
-
-        # CPU fallback paths
-        if output_format.lower() == "avi":
-            cpu_cmd = [ffmpeg_path, "-i", input_path,
-                       "-c:v", "mpeg4", "-q:v", "5", "-c:a", "mp3", "-y", output_path]
-        elif output_format.lower() == "flv":
-            cpu_cmd = [ffmpeg_path, "-i", input_path,
-                       "-c:v", "libx264", "-profile:v", "main", "-level", "3.1",
-                       "-preset", "medium", "-crf", "23",
-                       "-c:a", "aac", "-b:a", "128k",
-                       "-f", "flv", "-y", output_path]
-        else:
-            cpu_cmd = [ffmpeg_path, "-i", input_path,
-                       "-c:v", "libx264", "-preset", "medium", "-crf", "23",
-                       "-c:a", "aac", "-b:a", DEFAULT_BITRATE,
-                       "-y", output_path]
-
-        subprocess.run(cpu_cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-    except Exception:
-        raise
-
-
 def punish_user_with_maths() -> bool:
     """Educational prompt for invalid conversion attempts"""
     result = [False]
@@ -1007,12 +773,17 @@ def punish_user_with_maths() -> bool:
 
 
 def convert_audio(input_paths: List[str], output_folder: str, output_format: str,
-                  progress_var: tk.IntVar, convert_button: tk.Button, use_gpu: bool) -> None:
-    """Main conversion function"""
+                  progress_var: tk.IntVar, convert_button: tk.Button, use_gpu: bool,
+                  max_workers: Optional[int] = None, incremental: bool = False,
+                  cache_max_mb: int = 0, resume_batch=None) -> None:
+    """Main conversion function (resume_batch: interrupted JournalBatch to finish instead)"""
     try:
         # Initialize converter
-        ffmpeg_path, _ = initialize_ffmpeg_paths()
-        converter = MediaConverter(ffmpeg_path)
+        ffmpeg_path, ffprobe_path = initialize_ffmpeg_paths()
+        settings = app_state.settings_manager
+        converter = MediaConverter(ffmpeg_path, ffprobe_path,
+                                   chunked_min_duration=settings.get("chunked_encode_min_seconds", 600),
+                                   chunked_segments=settings.get("chunked_encode_segments", 0))
         os.makedirs(output_folder, exist_ok=True)
 
         # Setup UI updates
@@ -1025,68 +796,149 @@ def convert_audio(input_paths: List[str], output_folder: str, output_format: str
         update_button("Converting...")
         total_files = len(input_paths)
         warned = False
+        if resume_batch is not None:
+            jobs = resume_conversion_jobs(resume_batch)
+            total_files = len(jobs)
+        else:
+            jobs = build_conversion_jobs(input_paths, output_folder, output_format, sanitize_names=True)
 
-        # Process each file
-        for idx, original_path in enumerate(input_paths, start=1):
-            try:
-                input_path = safe_filename(original_path)
-                file_name = os.path.basename(input_path)
-                file_base, file_ext = os.path.splitext(file_name)
-                input_format = file_ext[1:].lower()
-                output_path = os.path.join(output_folder, f"{file_base}.{output_format}")
-
-                update_status(f"Converting file {idx}/{total_files}: {file_name}")
-
-                # Validate conversion
-                valid, error_msg = converter.validate_conversion(input_format, output_format)
-                if not valid:
-                    if error_msg == MSG_AUDIO_TO_VIDEO_ERROR:
-                        update_button("Convert", "#9370DB")
-                        if not punish_user_with_maths():
-                            return
-                        update_button("Convert", "#9370DB")
-                        return
-                    else:
-                        show_error("Conversion Error", error_msg)
-                        return
+        # Validate every file before any work is started
+        for job in jobs:
+            input_format = job['input_format']
 
-                # WebM warning
-                if input_format in VIDEO_FORMATS and output_format == "webm" and not warned:
-                    answer = messagebox.askyesnocancel(
-                        "Warning",
-                        "Converting a video to WebM using VP9 may take a very long time. Do you want to proceed?",
-                        parent=app_state.app
-                    )
-                    if answer is None or not answer:
+            valid, error_msg = converter.validate_conversion(input_format, job['output_format'])
+            if not valid:
+                if error_msg == MSG_AUDIO_TO_VIDEO_ERROR:
+                    update_button("Convert", "#9370DB")
+                    if not punish_user_with_maths():
                         return
-                    warned = True
+                    update_button("Convert", "#9370DB")
+                    return
+                else:
+                    show_error("Conversion Error", error_msg)
+                    return
 
-                # Convert file
-                converter.convert_single_file(input_path, output_path, input_format, output_format, use_gpu)
+            # WebM warning
+            if input_format in VIDEO_FORMATS and job['output_format'] == "webm" and not warned:
+                answer = messagebox.askyesnocancel(
+                    "Warning",
+                    "Converting a video to WebM using VP9 may take a very long time. Do you want to proceed?",
+                    parent=app_state.app
+                )
+                if answer is None or not answer:
+                    update_button("CONVERT", "#9370DB")
+                    return
+                warned = True
+
+        update_status(f"Converting {total_files} files...")
+        journal_batch = resume_batch or start_conversion_journal(jobs, {
+            'output_folder': output_folder,
+            'output_format': output_format,
+            'use_gpu': use_gpu,
+            'incremental': incremental
+        })
 
-                # Update progress
-                progress_var.set(int((idx / total_files) * 100))
-                update_button(f"Converting: {progress_var.get()}%")
+        completed_count = [0]
+        last_percent = [-1]
 
-            except Exception as e:
-                show_error("Conversion Error", f"Failed to convert {file_name}: {str(e)}")
+        def on_progress(completed: int, total: int, result: Dict[str, Any]):
+            completed_count[0] = completed
+            file_name = os.path.basename(result['input_path'])
+            update_status(f"Converted {completed}/{total}: {file_name}")
+
+        def on_fraction(fraction: float, snapshot: Optional[Dict[str, Any]]):
+            # Live encode progress; only touch the UI when the whole percent changes
+            percent = int(fraction * 100)
+            if percent == last_percent[0]:
                 return
+            last_percent[0] = percent
+            safe_update_ui(lambda: progress_var.set(percent))
+            update_button(f"Converting: {percent}%")
+            if snapshot and snapshot.get('speed'):
+                update_status(f"Converting {completed_count[0]}/{len(jobs)} done - "
+                              f"{snapshot['speed']:.1f}x realtime")
+
+        manifest = ConversionManifest(output_folder) if incremental else None
+        cache = open_conversion_cache(cache_max_mb * 1024 * 1024) if cache_max_mb > 0 else None
+        results = run_conversion_batch(converter, jobs, use_gpu, max_workers, on_progress, on_fraction,
+                                       manifest=manifest, cache=cache, journal_batch=journal_batch)
+        failures = [r for r in results if not r['success']]
+        skipped_count = sum(1 for r in results if r.get('skipped'))
+        cached_count = sum(1 for r in results if r.get('cached'))
+        converted_count = len(results) - len(failures) - skipped_count
+
+        if failures:
+            failed_lines = [f"{os.path.basename(r['input_path'])}: {r['error']}" for r in failures[:10]]
+            if len(failures) > 10:
+                failed_lines.append(f"...and {len(failures) - 10} more")
+            show_error("Conversion Error",
+                       f"Failed to convert {len(failures)} of {total_files} files:\n\n" + "\n".join(failed_lines))
+
+        if len(failures) == total_files:
+            update_button("CONVERT", "#9370DB")
+            update_status("Conversion failed - check error messages")
+            return
 
         # Show completion
-        show_conversion_complete(output_folder)
+        summary_text = None
+        if incremental:
+            summary_text = f"Converted {converted_count}, skipped {skipped_count} unchanged"
+        if cached_count:
+            summary_text = (summary_text + ", " if summary_text else "") + f"{cached_count} reused from cache"
+        show_conversion_complete(output_folder, summary_text)
 
     except Exception:
         raise
 
 
-def show_conversion_complete(output_folder: str):
+def offer_resume_interrupted_batches() -> None:
+    """Offer to finish conversions and downloads that were cut short by a crash or forced exit"""
+    journal = open_job_journal()
+    if journal is None:
+        return
+
+    for batch_info in journal.unfinished_batches():
+        params = batch_info['params']
+        remaining = batch_info['total'] - batch_info['done']
+        if batch_info['kind'] == 'convert':
+            question = (f"A conversion of {batch_info['total']} files to {params['output_format']} was interrupted "
+                        f"({batch_info['done']} done, {remaining} left).\n\nResume it now?")
+        else:
+            question = (f"A download of {params['url']} was interrupted "
+                        f"({batch_info['done']} items done).\n\nResume it now?")
+
+        if (batch_info['kind'] == 'convert' and remaining == 0) or \
+                not messagebox.askyesno("Resume?", question, parent=app_state.app):
+            journal.discard_batch(batch_info['id'])
+            continue
+
+        batch = journal.get_batch(batch_info['id'])
+        toggle_interface(False)
+        if batch.kind == 'convert':
+            target = convert_audio
+            args = ([], params['output_folder'], params['output_format'], app_state.progress_var,
+                    app_state.convert_button, params['use_gpu'],
+                    app_state.settings_manager.get("conversion_workers", 0), params['incremental'], 0, batch)
+        else:
+            target = download_thread
+            args = (params['url'], params['output_folder'], params['format_type'], params['quality'],
+                    params['playlist_action'], batch)
+        run_detached(RESOURCE_BACKGROUND, target, *args)
+        # One batch at a time; anything older is offered again next launch
+        break
+
+
+def show_conversion_complete(output_folder: str, summary_text: Optional[str] = None):
     """Show conversion completion dialog"""
+    status_text = "Conversion Complete! ^.^"
+    if summary_text:
+        status_text += f" ({summary_text})"
 
     def show_completion_dialog():
         # Update UI
         safe_update_ui(lambda: (
             app_state.convert_button.config(text="CONVERT", bg="#9370DB", fg="white"),
-            app_state.youtube_status_label.config(text="Conversion Complete! ^.^"),
+            app_state.youtube_status_label.config(text=status_text),
             play_notification()
         ))
 
@@ -1111,38 +963,6 @@ def show_conversion_complete(output_folder: str):
 # ... Previous code continues from where you left off ...
 
 # YouTube/Video download functions
-def analyze_playlist_url(url: str) -> Tuple[bool, bool]:
-    """
-    Analyzes a URL to determine its playlist characteristics
-    Returns: (is_playlist_page, is_video_in_playlist)
-    """
-    # Full playlist page
-    if 'youtube.com/playlist?list=' in url:
-        return True, False
-
-    # Video that's part of a playlist
-    if 'youtube.com/watch' in url and 'list=' in url:
-        return False, True
-
-    # YouTube Music playlist
-    if 'music.youtube.com/playlist' in url:
-        return True, False
-
-    # YouTube Music video in playlist
-    if 'music.youtube.com/watch' in url and 'list=' in url:
-        return False, True
-
-    # SoundCloud set (playlist)
-    if 'soundcloud.com/sets/' in url:
-        return True, False
-
-    # Generic catch-all for other potential playlist URLs
-    if 'playlist' in url.lower() and 'list=' in url:
-        return True, False
-
-    return False, False
-
-
 @handle_errors(default_return={'title': 'YouTube Playlist', 'count': -1, 'current_index': 1})
 def get_playlist_info(url: str) -> Dict[str, Any]:
     """Get information about a playlist"""
@@ -1177,7 +997,7 @@ def get_playlist_info(url: str) -> Dict[str, Any]:
     # Get initial information
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
-            info = ydl.extract_info(url, download=False, process=False)
+            info = extract_info_cached(ydl, url)
 
             playlist_title = info.get('title', 'Unknown Playlist')
             if is_video_in_playlist:
@@ -1215,348 +1035,153 @@ def format_time(seconds: float) -> str:
         return f"{hours:.0f}h {minutes:.0f}m"
 
 
-def get_format_string(quality: str, format_type: str) -> str:
+def yt_dlp_progress_hook(d: Dict[str, Any]) -> None:
     """
-    Returns the format string for yt-dlp based on selected quality and format type
-    Now with more flexible H.264 preference that won't fail if H.264 isn't available
+    Progress hook for yt-dlp downloads. Runs on download workers for every chunk,
+    so it only publishes to the progress bus; render_download_progress draws it.
     """
-    if format_type in AUDIO_FORMATS:
-        return "bestaudio/best"
-
-    # For video, prefer H.264 but fall back to other codecs if not available
-    if format_type == "mp4":
-        # More flexible format strings that prefer H.264 but don't require it
-        quality_map = {
-            "Best": "bestvideo[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best",
-            "4K": "bestvideo[height<=2160][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=2160][ext=mp4]+bestaudio/bestvideo[height<=2160]+bestaudio/best[height<=2160]",
-            "1440p": "bestvideo[height<=1440][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=1440][ext=mp4]+bestaudio/bestvideo[height<=1440]+bestaudio/best[height<=1440]",
-            "1080p": "bestvideo[height<=1080][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=1080][ext=mp4]+bestaudio/bestvideo[height<=1080]+bestaudio/best[height<=1080]",
-            "720p": "bestvideo[height<=720][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=720][ext=mp4]+bestaudio/bestvideo[height<=720]+bestaudio/best[height<=720]",
-            "480p": "bestvideo[height<=480][ext=mp4][vcodec^=avc]+bestaudio/bestvideo[height<=480][ext=mp4]+bestaudio/bestvideo[height<=480]+bestaudio/best[height<=480]"
-        }
-        return quality_map.get(quality, "bestvideo[height<=1080][ext=mp4]+bestaudio/bestvideo[height<=1080]+bestaudio/best")
-    else:
-        # For other formats, standard selection
-        quality_map = {
-            "Best": "bestvideo+bestaudio/best",
-            "4K": "bestvideo[height<=2160]+bestaudio/best[height<=2160]",
-            "1440p": "bestvideo[height<=1440]+bestaudio/best[height<=1440]",
-            "1080p": "bestvideo[height<=1080]+bestaudio/best[height<=1080]",
-            "720p": "bestvideo[height<=720]+bestaudio/best[height<=720]",
-            "480p": "bestvideo[height<=480]+bestaudio/best[height<=480]"
-        }
-        return quality_map.get(quality, "bestvideo[height<=1080]+bestaudio/best")
-
-
-def modify_download_options(ydl_opts: Dict[str, Any], quality: str, format_type: str,
-                            playlist_action: str = 'single', premiere_compatible: bool = True) -> Dict[str, Any]:
-    """Configures yt-dlp options based on format and playlist settings"""
+    info_dict = d.get('info_dict', {})
+    playlist_index = info_dict.get('playlist_index')
+    get_progress_bus().publish(('download', playlist_index or d.get('filename') or ''), d['status'], {
+        'title': (info_dict.get('title') or '').strip(),
+        'playlist_index': playlist_index,
+        'n_entries': info_dict.get('n_entries'),
+        'downloaded_bytes': d.get('downloaded_bytes') or 0,
+        'total_bytes': d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+        'speed': d.get('speed') or 0,
+        'percent_str': d.get('_percent_str', '').strip(),
+        'speed_str': d.get('_speed_str', '').strip(),
+        'eta_str': d.get('_eta_str', '').strip(),
+        'error': d.get('error')
+    })
+
+
+def pump_progress_events() -> None:
+    """Drain the progress bus at a fixed frame rate (Tk thread), whatever the event rate"""
     try:
-        ffmpeg_path = get_ffmpeg_path()
-        ffprobe_path = os.path.join(os.path.dirname(ffmpeg_path), 'ffprobe.exe')
-        if not os.path.exists(ffprobe_path) and getattr(sys, 'frozen', False):
-            ffprobe_path = resource_path('ffprobe.exe')
-
-        ydl_opts.update({
-            'ffmpeg_location': ffmpeg_path,
-            'prefer_ffmpeg': True,
-            'external_downloader_args': {'ffmpeg_i': ['-threads', '4']},
-        })
-
-        # Handle playlist configuration
-        if playlist_action == 'playlist':
-            ydl_opts['noplaylist'] = False
-            if 'watch' in ydl_opts.get('webpage_url', '') and 'list=' in ydl_opts.get('webpage_url', ''):
-                ydl_opts['outtmpl'] = '%(playlist_title)s/%(playlist_index)s-%(title)s.%(ext)s'
-            else:
-                ydl_opts['outtmpl'] = '%(playlist_title)s/%(playlist_index)s-%(title)s.%(ext)s'
-        elif playlist_action == 'single':
-            ydl_opts['noplaylist'] = True
-            ydl_opts['outtmpl'] = '%(title)s.%(ext)s'
+        events = get_progress_bus().drain()
+        downloads = [(status, state) for (kind, _), (status, state) in events.items() if kind == 'download']
+        if downloads:
+            render_download_progress(downloads)
+    except Exception as e:
+        logging.error(f"Error drawing progress: {e}", exc_info=True)
+    app_state.app.after(int(PROGRESS_FRAME_INTERVAL * 1000), pump_progress_events)
+
+
+def render_download_progress(events: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Apply the latest download event of each item, then redraw the status once"""
+    for status, state in events:
+        # Track every item that reports progress; parallel playlist downloads interleave
+        playlist_index = state['playlist_index']
+        if not playlist_index:
+            continue
+        if state['n_entries']:
+            app_state.playlist_total_count = state['n_entries']
+        if not app_state.download_started_time:
+            app_state.download_started_time = time.time()
+        if status == 'downloading':
+            total = state['total_bytes']
+            fraction = state['downloaded_bytes'] / total if total else 0.0
+            app_state.playlist_item_progress[playlist_index] = min(fraction, 0.99)
+            app_state.playlist_item_speed[playlist_index] = state['speed']
+        elif status == 'finished':
+            app_state.playlist_item_progress[playlist_index] = 1.0
+            app_state.playlist_item_speed.pop(playlist_index, None)
+
+    # The most recently updated item drives the status line
+    status, state = events[-1]
+    playlist_index = state['playlist_index']
+    video_title = state['title']
+
+    # Format title for display
+    display_title = ""
+    if video_title:
+        if len(video_title) > 30:
+            display_title = video_title[:27] + "..."
         else:
-            return None
-
-        is_youtube_music = 'music.youtube.com' in ydl_opts.get('webpage_url', '')
-
-        parsed_url = urlparse(ydl_opts.get('webpage_url', ''))
-        netloc = parsed_url.netloc.lower()
-
-        # Check if audio-only site
-        if any(d in netloc for d in ["soundcloud.com", "snd.sc", "bandcamp.com"]):
-            if format_type not in AUDIO_FORMATS:
-                format_type = "mp3"
-                app_state.youtube_format_var.set("mp3")
-                messagebox.showinfo("Format Changed",
-                                    "That website only supports audio files, so defaulting to mp3",
-                                    parent=app_state.app)
-
-        if format_type in AUDIO_FORMATS or is_youtube_music:
-            # Audio processing
-            bitrate_str = quality.replace("kb/s", "").strip()
-            if not bitrate_str.isdigit():
-                bitrate_str = "192"
-
-            audio_postprocessors = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': format_type if format_type in AUDIO_FORMATS else 'mp3',
-                'preferredquality': bitrate_str,
-                'nopostoverwrites': False
-            }]
-
-            if is_youtube_music or any(d in netloc for d in ["soundcloud.com", "bandcamp.com"]):
-                audio_postprocessors.append({
-                    'key': 'FFmpegMetadata',
-                    'add_metadata': True,
-                })
-
-            if format_type == 'mp3':
-                audio_postprocessors.append({
-                    'key': 'EmbedThumbnail',
-                    'already_have_thumbnail': False,
-                })
-                ydl_opts['writethumbnail'] = True
-
-            ydl_opts.update({
-                'format': 'bestaudio/best',
-                'postprocessors': audio_postprocessors
-            })
-
+            display_title = video_title
+
+    item_progress = app_state.playlist_item_progress
+    total_count = app_state.playlist_total_count
+    in_playlist = bool(playlist_index)
+    done_count = sum(1 for fraction in item_progress.values() if fraction >= 1.0)
+    active = sorted(index for index, fraction in item_progress.items() if fraction < 1.0)
+    progress_sum = sum(item_progress.values())
+    progress_percent = min(progress_sum / total_count * 100, 100.0) if total_count else 0.0
+    # Streamed playlists only learn their length once fully enumerated
+    of_total = f"/{total_count}" if total_count else ""
+    percent_str = f" ({progress_percent:.1f}%)" if total_count else ""
+
+    # Calculate elapsed time
+    elapsed_time_str = ""
+    if in_playlist and total_count and done_count and app_state.download_started_time:
+        elapsed_time = time.time() - app_state.download_started_time
+        elapsed_time_str = format_time(elapsed_time)
+
+        # Estimate remaining time from the overall rate
+        estimated_remaining = elapsed_time / progress_sum * max(total_count - progress_sum, 0)
+        elapsed_time_str = f" | Elapsed: {elapsed_time_str}, Remaining: ~{format_time(estimated_remaining)}"
+
+    if status == 'downloading':
+        p = state['percent_str']
+        s = state['speed_str']
+        eta = state['eta_str']
+        downloaded = state['downloaded_bytes']
+        total = state['total_bytes']
+
+        # Format downloaded size
+        size_str = ""
+        if downloaded and total:
+            downloaded_mb = downloaded / 1024 / 1024
+            total_mb = total / 1024 / 1024
+            size_str = f" [{downloaded_mb:.1f}MB/{total_mb:.1f}MB]"
+
+        # Create status text
+        if in_playlist and len(active) > 1:
+            speed = sum(app_state.playlist_item_speed.get(index, 0) for index in active)
+            status_text = (f"Downloading {len(active)} at once, {done_count}{of_total} done"
+                           f"{percent_str} @ {speed / 1024 / 1024:.1f}MiB/s{elapsed_time_str}")
+
+            if app_state.progress_var:
+                app_state.progress_var.set(int(progress_percent))
+
+            button_text = f"Playlist: {int(progress_percent)}%" if total_count else f"Playlist: {done_count} done"
+        elif in_playlist:
+            status_text = f"Downloading {playlist_index}{of_total}{percent_str}"
+            if display_title:
+                status_text += f" - {display_title}"
+            status_text += f"{size_str} - {p} @ {s} (ETA: {eta}){elapsed_time_str}"
+
+            if app_state.progress_var:
+                app_state.progress_var.set(int(progress_percent))
+
+            button_text = f"Playlist: {int(progress_percent)}%" if total_count else f"Playlist: {done_count} done"
         else:
-            # Video format handling
-            format_string = get_format_string(quality, format_type)
-
-            # Basic video options
-            ydl_opts.update({
-                'format': format_string,
-                'merge_output_format': format_type,
-                'postprocessors': []
-            })
-
-            # For YouTube, always set merge_output_format
-            if "youtube.com" in netloc or "youtu.be" in netloc:
-                if format_type == 'mp4' and premiere_compatible:
-                    # Store paths for post-processing
-                    ydl_opts['_ffmpeg_path'] = ffmpeg_path
-                    ydl_opts['_ffprobe_path'] = ffprobe_path
-                    ydl_opts['_check_codec'] = True
-
-                elif format_type == 'webm':
-                    ydl_opts['postprocessors'].append({
-                        'key': 'FFmpegVideoRemuxer',
-                        'preferedformat': 'webm'
-                    })
-                    ydl_opts['postprocessor_args'] = {
-                        'FFmpegVideoRemuxer': [
-                            '-c:v', 'libvpx-vp9',
-                            '-crf', '30',
-                            '-b:v', '0',
-                            '-c:a', 'libopus',
-                            '-b:a', '128k'
-                        ]
-                    }
-                elif format_type == 'avi':
-                    ydl_opts['postprocessors'].append({
-                        'key': 'FFmpegVideoRemuxer',
-                        'preferedformat': 'avi'
-                    })
-                    ydl_opts['postprocessor_args'] = {
-                        'FFmpegVideoRemuxer': [
-                            '-c:v', 'mpeg4',
-                            '-c:a', 'mp3',
-                            '-q:v', '6',
-                            '-b:a', '192k'
-                        ]
-                    }
-            else:
-                # For non-YouTube sites
-                ydl_opts.update({
-                    'format': format_string,
-                    'merge_output_format': format_type,
-                    'postprocessors': [{
-                        'key': 'FFmpegVideoRemuxer',
-                        'preferedformat': format_type
-                    }]
-                })
-
-        # Improved error handling
-        ydl_opts['ignoreerrors'] = False  # Don't ignore errors so we can see what's wrong
-        ydl_opts['verbose'] = False  # Less verbose output
-
-        return ydl_opts
+            status_text = f"Downloading... {p} @ {s} (ETA: {eta})"
+            button_text = "CONVERT"
 
-    except Exception as e:
-        logging.error(f"Error in modify_download_options: {e}", exc_info=True)
-        # Return basic options as fallback
-        return {
-            'format': 'bestvideo+bestaudio/best',
-            'merge_output_format': format_type,
-            'outtmpl': '%(title)s.%(ext)s',
-            'noplaylist': True if playlist_action == 'single' else False,
-            'ffmpeg_location': ffmpeg_path,
-            'progress_hooks': ydl_opts.get('progress_hooks', [])
-        }
-
-
-def check_and_convert_codec(filepath: str, ffmpeg_path: str, ffprobe_path: str) -> bool:
-    """Check if video needs H.264 conversion for Premiere compatibility"""
-    try:
-        if not os.path.exists(filepath):
-            return False
+        app_state.youtube_status_label.config(text=status_text)
+        app_state.convert_button.config(text=button_text, fg="white", bg="#9370DB")
 
-        # Check codec using ffprobe
-        probe_cmd = [ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
-                     '-show_entries', 'stream=codec_name', '-of',
-                     'default=noprint_wrappers=1:nokey=1', filepath]
+    elif status == 'finished':
+        if in_playlist:
+            status_text = f"Processed {done_count}{of_total}{percent_str}"
+            if display_title:
+                status_text += f" - {display_title}"
+            status_text += elapsed_time_str
 
-        if sys.platform == 'win32':
-            result = subprocess.run(probe_cmd, capture_output=True, text=True,
-                                    creationflags=subprocess.CREATE_NO_WINDOW)
+            if app_state.progress_var:
+                app_state.progress_var.set(int(progress_percent))
         else:
-            result = subprocess.run(probe_cmd, capture_output=True, text=True)
-
-        codec = result.stdout.strip().lower()
-
-        # Check if conversion is needed
-        if codec in ['vp9', 'vp09', 'av01', 'vp8']:
-            logging.info(f"Converting {codec} to H.264 for Premiere compatibility")
-
-            # Create temp file
-            temp_output = filepath + '.temp.mp4'
-
-            # Conversion command
-            convert_cmd = [
-                ffmpeg_path, '-i', filepath,
-                '-c:v', 'libx264',  # H.264 codec
-                '-preset', 'fast',  # Faster conversion
-                '-crf', '18',  # Higher quality
-                '-c:a', 'aac',  # AAC audio
-                '-b:a', '256k',  # Higher audio bitrate
-                '-movflags', '+faststart',
-                '-y', temp_output
-            ]
-
-            if sys.platform == 'win32':
-                subprocess.run(convert_cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                subprocess.run(convert_cmd, check=True)
+            status_text = f"Big brain flex o.o: {display_title}" if display_title else "Processing complete..."
 
-            # Replace original with converted file
-            os.replace(temp_output, filepath)
-            logging.info(f"Successfully converted to H.264: {filepath}")
-            return True
+        app_state.youtube_status_label.config(text=status_text)
 
-    except Exception as e:
-        logging.error(f"Error during codec conversion: {e}")
-        # Clean up temp file if it exists
-        temp_file = filepath + '.temp.mp4'
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-    return False
-
-
-def yt_dlp_progress_hook(d: Dict[str, Any]) -> None:
-    """Progress hook for yt-dlp downloads"""
-
-    def update():
-        info_dict = d.get('info_dict', {})
-        video_title = info_dict.get('title', '').strip()
-
-        # Format title for display
-        display_title = ""
-        if video_title:
-            if len(video_title) > 30:
-                display_title = video_title[:27] + "..."
-            else:
-                display_title = video_title
-
-        # Get playlist information
-        playlist_index = info_dict.get('playlist_index')
-        playlist_count = info_dict.get('n_entries')
-
-        # Update tracking variables if we have valid playlist info
-        if playlist_index and playlist_count:
-            app_state.playlist_current_index = playlist_index
-            app_state.playlist_total_count = playlist_count
-
-            # Initialize start time
-            if playlist_index == 1 and d['status'] == 'downloading' and not app_state.download_started_time:
-                app_state.download_started_time = time.time()
-
-        # Calculate elapsed time
-        elapsed_time_str = ""
-        if app_state.playlist_current_index > 1 and app_state.playlist_total_count > 0 and app_state.download_started_time:
-            elapsed_time = time.time() - app_state.download_started_time
-            elapsed_time_str = format_time(elapsed_time)
-
-            # Estimate remaining time
-            if app_state.playlist_current_index > 1:
-                avg_time_per_video = elapsed_time / (app_state.playlist_current_index - 1)
-                remaining_videos = app_state.playlist_total_count - app_state.playlist_current_index + 1
-                estimated_remaining = avg_time_per_video * remaining_videos
-                elapsed_time_str = f" | Elapsed: {elapsed_time_str}, Remaining: ~{format_time(estimated_remaining)}"
-
-        if d['status'] == 'downloading':
-            p = d.get('_percent_str', '').strip()
-            s = d.get('_speed_str', '').strip()
-            eta = d.get('_eta_str', '').strip()
-            downloaded = d.get('downloaded_bytes', 0)
-            total = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
-
-            # Format downloaded size
-            size_str = ""
-            if downloaded and total:
-                downloaded_mb = downloaded / 1024 / 1024
-                total_mb = total / 1024 / 1024
-                size_str = f" [{downloaded_mb:.1f}MB/{total_mb:.1f}MB]"
-
-            # Create status text
-            if app_state.playlist_current_index and app_state.playlist_total_count:
-                progress_percent = (app_state.playlist_current_index - 1 +
-                                    (d.get('downloaded_bytes', 0) / (d.get('total_bytes', 1) or
-                                                                     d.get('total_bytes_estimate',
-                                                                           1)))) / app_state.playlist_total_count * 100
-
-                status_text = f"Downloading {app_state.playlist_current_index}/{app_state.playlist_total_count} ({progress_percent:.1f}%)"
-                if display_title:
-                    status_text += f" - {display_title}"
-                status_text += f"{size_str} - {p} @ {s} (ETA: {eta}){elapsed_time_str}"
-
-                if app_state.progress_var:
-                    app_state.progress_var.set(int(progress_percent))
-
-                button_text = f"Playlist: {int(progress_percent)}%"
-            else:
-                status_text = f"Downloading... {p} @ {s} (ETA: {eta})"
-                button_text = "CONVERT"
-
-            app_state.youtube_status_label.config(text=status_text)
-            app_state.convert_button.config(text=button_text, fg="white", bg="#9370DB")
-
-        elif d['status'] == 'finished':
-            if app_state.playlist_current_index and app_state.playlist_total_count:
-                progress_percent = app_state.playlist_current_index / app_state.playlist_total_count * 100
-                status_text = f"Processed {app_state.playlist_current_index}/{app_state.playlist_total_count} ({progress_percent:.1f}%)"
-                if display_title:
-                    status_text += f" - {display_title}"
-                status_text += elapsed_time_str
-
-                if app_state.progress_var:
-                    app_state.progress_var.set(int(progress_percent))
-            else:
-                status_text = f"Big brain flex o.o: {display_title}" if display_title else "Processing complete..."
-
-            app_state.youtube_status_label.config(text=status_text)
-
-        elif d['status'] == 'error':
-            error_msg = d.get('error', 'Unknown error')
-            app_state.youtube_status_label.config(text=f"Error: {error_msg}")
-            app_state.convert_button.config(text="CONVERT", fg="white")
-            logging.error(f"Download error: {error_msg}")
-
-    safe_update_ui(update)
+    elif status == 'error':
+        error_msg = state['error'] or 'Unknown error'
+        app_state.youtube_status_label.config(text=f"Error: {error_msg}")
+        app_state.convert_button.config(text="CONVERT", fg="white")
+        logging.error(f"Download error: {error_msg}")
 
 
 def handle_download_error(error: Exception):
@@ -1628,12 +1253,20 @@ def create_or_update_progress_bar():
         app_state.app.update_idletasks()
 
 
+def notify_format_changed(new_format: str) -> None:
+    """Tell the user a site forced a different download format"""
+    safe_update_ui(lambda: app_state.youtube_format_var.set(new_format))
+    safe_update_ui(lambda: messagebox.showinfo("Format Changed",
+                                               f"That website only supports audio files, so defaulting to {new_format}",
+                                               parent=app_state.app))
+
 
 def download_thread(input_url: str, output_folder: str, format_type: str,
-                    quality: str, playlist_action: str):
-    """Thread function for downloading videos"""
+                    quality: str, playlist_action: str, resume_batch=None):
+    """Thread function for downloading videos (resume_batch: interrupted JournalBatch to finish)"""
     app_state.reset_download_tracking()
     app_state.download_manager.start_download(input_url)
+    job = new_job_id('download')
 
     try:
         ffmpeg_path = get_ffmpeg_path()
@@ -1643,38 +1276,14 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
         if playlist_action == 'playlist':
             safe_update_ui(lambda: create_or_update_progress_bar())
 
-        # Parse URL for site-specific optimizations
-        parsed_url = urlparse(input_url)
-        netloc = parsed_url.netloc.lower()
-
-        # Determine site type
-        is_youtube = any(domain in netloc for domain in ['youtube.com', 'youtu.be', 'music.youtube.com'])
-        is_twitter = any(domain in netloc for domain in ['twitter.com', 'x.com'])
-        is_tiktok = 'tiktok.com' in netloc
-        is_instagram = 'instagram.com' in netloc
-        is_audio_only = any(domain in netloc for domain in ['soundcloud.com', 'snd.sc', 'bandcamp.com'])
-
-        # Base yt-dlp options
-        ydl_opts = {
-            'paths': {'home': output_folder, 'temp': output_folder},
-            'progress_hooks': [yt_dlp_progress_hook],
-            'ignoreerrors': False,  # Changed to False to see errors
-            'overwrites': True,
-            'max_sleep_interval': 1,
-            'min_sleep_interval': 1,
-            'extractor_retries': 5,
-            'webpage_url': input_url,
-            'verbose': False,
-            'socket_timeout': 15,
-            'retries': 3,
-            'fragment_retries': 3,
-        }
+        # Base yt-dlp options with site-specific optimizations
+        ydl_opts = get_site_download_options(input_url, output_folder)
+        ydl_opts['progress_hooks'] = [yt_dlp_progress_hook]
 
         # Show initial status
         safe_update_ui(lambda: app_state.youtube_status_label.config(text="Analyzing video information..."))
 
-        # Apply site-specific optimizations
-        if is_audio_only:
+        if is_audio_only_site(input_url):
             if format_type not in AUDIO_FORMATS:
                 format_type = 'mp3'
                 safe_update_ui(lambda: app_state.youtube_format_var.set('mp3'))
@@ -1683,29 +1292,12 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
                 safe_update_ui(lambda: messagebox.showinfo("Format Changed",
                                                            "This site only supports audio files. Defaulting to mp3",
                                                            parent=app_state.app))
-        elif is_youtube:
-            ydl_opts.update({
-                'retries': 10,
-                'fragment_retries': 10,
-                'external_downloader_args': {'ffmpeg_i': ['-timeout', '60000000', '-thread_queue_size', '10000']},
-            })
-        elif is_twitter or is_instagram:
-            ydl_opts.update({
-                'retries': 5,
-                'fragment_retries': 10,
-                'external_downloader_args': {'ffmpeg_i': ['-timeout', '30000000']},
-            })
-        elif is_tiktok:
-            ydl_opts.update({
-                'retries': 8,
-                'fragment_retries': 8,
-                'external_downloader_args': {'ffmpeg_i': ['-timeout', '30000000']},
-            })
 
-        # Get basic information
+        # Get basic information (cached, so the download itself doesn't extract again)
         try:
-            with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}) as ydl_pre:
-                info = ydl_pre.extract_info(input_url, download=False, process=False)
+            pre_opts = {'quiet': True, 'skip_download': True, 'noplaylist': playlist_action == 'single'}
+            with yt_dlp.YoutubeDL(pre_opts) as ydl_pre, job_scope(job):
+                info = extract_info_cached(ydl_pre, input_url)
 
                 # Check for Easter Egg
                 title = info.get('title', '').lower()
@@ -1715,7 +1307,8 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
                 # Set download status message
                 if playlist_action == 'playlist':
                     if info.get('_type') == 'playlist':
-                        playlist_count = info.get('playlist_count') or len(info.get('entries', []))
+                        entries = info.get('entries')
+                        playlist_count = info.get('playlist_count') or (len(entries) if isinstance(entries, list) else 0)
                         playlist_title = info.get('title', 'playlist')
 
                         if playlist_count > 0:
@@ -1730,23 +1323,43 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
                             text=f"Preparing to download playlist videos... This might take a while."))
 
                     # Add playlist-specific options
-                    ydl_opts.update({
-                        'socket_timeout': 30,
-                        'retries': 10,
-                        'fragment_retries': 10,
-                        'retry_sleep_functions': {'fragment': lambda n: 5},
-                        'concurrent_fragment_downloads': 1,
-                        'logger': logging.getLogger('yt-dlp'),
-                        'progress_with_newline': True,
-                        'noprogress': False
-                    })
+                    ydl_opts.update(get_playlist_download_options())
         except Exception as e:
             logging.error(f"Error extracting info: {e}")
             safe_update_ui(lambda: app_state.youtube_status_label.config(
                 text=f"Proceeding with limited information... (Error: {str(e)[:50]}...)"))
 
         # Configure download options
-        ydl_opts = modify_download_options(ydl_opts, quality, format_type, playlist_action)
+        ydl_opts = modify_download_options(ydl_opts, quality, format_type, playlist_action,
+                                           on_format_change=notify_format_changed)
+
+        # Journal every item so a crash mid-playlist can be resumed
+        journal_batch = resume_batch
+        journal = open_job_journal()
+        if journal_batch is None and journal is not None:
+            journal_batch = journal.start_batch('download', {
+                'url': input_url,
+                'output_folder': output_folder,
+                'format_type': format_type,
+                'quality': quality,
+                'playlist_action': playlist_action
+            })
+        if journal_batch is not None:
+            ydl_opts = attach_download_journal(ydl_opts, journal_batch, resume=resume_batch is not None)
+
+        # Premiere compatibility pass runs per item while the rest of the playlist downloads
+        def show_compatibility_status(filepath):
+            filename = os.path.basename(filepath)
+            safe_update_ui(lambda: app_state.youtube_status_label.config(
+                text=f"Ensuring compatibility: {filename[:40]}..."))
+
+        attach_stage_timing(ydl_opts, job)
+        codec_pipeline = attach_codec_pipeline(ydl_opts, input_url, show_compatibility_status)
+
+        # Playlist re-runs only fetch items that are new since the last run
+        download_archive = None
+        if playlist_action == 'playlist' and app_state.settings_manager.get("download_archive", True):
+            download_archive = attach_download_archive(ydl_opts, output_folder, format_type, quality)
 
         # Initialize download start time
         app_state.download_started_time = time.time()
@@ -1756,36 +1369,25 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
         downloaded_files = []
 
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Add a hook to track downloaded files
-                original_hooks = ydl_opts.get('progress_hooks', [])
-
-                def track_downloads(d):
-                    if d['status'] == 'finished':
-                        filename = d.get('filename', '')
-                        if filename and os.path.exists(filename):
-                            downloaded_files.append(filename)
-                    # Call original hooks
-                    for hook in original_hooks:
-                        hook(d)
+            workers = 1
+            if playlist_action == 'playlist':
+                workers = app_state.settings_manager.get("playlist_download_workers", DEFAULT_PLAYLIST_DOWNLOAD_WORKERS)
+            # Streamed playlists report their length once enumeration reaches the end
+            def set_playlist_count(count):
+                safe_update_ui(lambda: setattr(app_state, 'playlist_total_count', count))
+
+            with job_scope(job), span('download_batch', url=input_url, playlist_action=playlist_action):
+                download_info, downloaded_files = submit_download(ydl_opts, input_url, workers=workers,
+                                                                  on_playlist_count=set_playlist_count).result()
+
+            # Check if download was successful
+            if download_info == 0:
+                download_successful = True
+                logging.info("Download completed successfully")
 
-                ydl.add_progress_hook(track_downloads)
-
-                # Download
-                download_info = ydl.download([input_url])
-
-                # Check if download was successful
-                if download_info == 0:
-                    download_successful = True
-                    logging.info("Download completed successfully")
-
-                    # Post-process for Premiere compatibility if needed
-                    if format_type == 'mp4' and ydl_opts.get('_check_codec'):
-                        post_process_downloads(output_folder, format_type, ydl_opts)
-
-                else:
-                    download_successful = False
-                    logging.error(f"Download failed with return code: {download_info}")
+            else:
+                download_successful = False
+                logging.error(f"Download failed with return code: {download_info}")
 
         except yt_dlp.utils.DownloadError as e:
             download_successful = False
@@ -1804,6 +1406,19 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
             show_error("Error", f"An unexpected error occurred: {str(e)}\n\nPlease check logs for details.")
 
         finally:
+            # Items that finished before an error are still made compatible
+            if codec_pipeline is not None:
+                with job_scope(job), span('finalize', url=input_url):
+                    converted = codec_pipeline.wait(downloaded_files)
+                if converted:
+                    logging.info(f"Converted {len(converted)} downloads to H.264")
+            if journal_batch is not None:
+                finish_download_journal(journal_batch, download_successful)
+            if download_archive is not None:
+                download_archive.save()
+                if download_archive.skipped:
+                    logging.info(f"Skipped {len(download_archive.skipped)} items already in {output_folder}")
+            flush_timings()
             safe_update_ui(lambda: toggle_interface(True))
             safe_update_ui(lambda: app_state.convert_button.config(text="CONVERT", fg="white"))
             app_state.download_manager.end_download()
@@ -1811,7 +1426,10 @@ def download_thread(input_url: str, output_folder: str, format_type: str,
         # Only show success prompt if download was successful
         if download_successful:
             def prompt_user():
-                safe_update_ui(lambda: app_state.youtube_status_label.config(text="Download Complete! ^.^"))
+                status = "Download Complete! ^.^"
+                if download_archive is not None and download_archive.skipped:
+                    status += f" ({len(download_archive.skipped)} already present, skipped)"
+                safe_update_ui(lambda: app_state.youtube_status_label.config(text=status))
 
                 # Play notification sound
                 play_notification()
@@ -1870,90 +1488,127 @@ def download_video():
 
     # Analyze URL for playlist
     is_playlist_page, is_video_in_playlist = analyze_playlist_url(input_url)
-    playlist_action = 'single'  # Default
+    if not (is_playlist_page or is_video_in_playlist):
+        start_download(input_url, output_folder, 'single')
+        return
 
-    # Handle playlist scenarios
-    if is_playlist_page or is_video_in_playlist:
-        safe_update_ui(lambda: app_state.youtube_status_label.config(text="Analyzing playlist..."))
-        app_state.app.update_idletasks()
+    # Extraction can take a long time on big playlists, so it runs on a worker
+    # and the playlist question is asked once the answer arrives
+    analysis = object()
+    app_state.url_analysis = analysis
+    set_url_analysis_state(True)
 
-        # Get playlist information
-        playlist_info = get_playlist_info(input_url)
-        playlist_count = playlist_info.get('count', 0)
-        playlist_title = playlist_info.get('title', 'Unknown Playlist')
-        current_index = playlist_info.get('current_index', 1)
-
-        # Format count text
-        count_text = f"with {playlist_count} videos" if playlist_count > 0 else "with multiple videos"
-        if playlist_count == -1:
-            count_text = "(YouTube limited playlist information)"
-
-        if is_playlist_page:
-            # Full playlist URL
-            playlist_choice = messagebox.askyesno(
-                "Hey look a playlist!",
-                f"This is a playlist: \"{playlist_title}\" {count_text}.\n\n"
-                f"Do you wanna download the entire playlist?",
-                parent=app_state.app
-            )
-
-            if playlist_choice:
-                playlist_action = 'playlist'
-            else:
-                safe_update_ui(lambda: app_state.youtube_status_label.config(text="Download Status: Idle"))
-                return
+    def on_analyzed(future):
+        playlist_info = future.result() if future.exception() is None else {}
+        safe_update_ui(lambda: finish_url_analysis(analysis, input_url, output_folder,
+                                                   is_playlist_page, playlist_info))
 
-        elif is_video_in_playlist:
-            # Video in playlist - create custom dialog
-            dialog = tk.Toplevel(app_state.app)
-            dialog.title("Video in Playlist")
-            dialog.geometry("400x200")
-            dialog.transient(app_state.app)
-            dialog.grab_set()
-            dialog.resizable(False, False)
-
-            # Center on parent window
-            x = app_state.app.winfo_x() + (app_state.app.winfo_width() // 2) - 200
-            y = app_state.app.winfo_y() + (app_state.app.winfo_height() // 2) - 100
-            dialog.geometry(f"+{x}+{y}")
-
-            # Message
-            message = f"This video is part of a playlist: \"{playlist_title}\" {count_text}.\n\n"
-            if current_index > 0:
-                message += f"This is video #{current_index} in the playlist.\n\n"
-            message += "What are we gonna do?"
-
-            tk.Label(dialog, text=message, wraplength=380, justify="left", padx=10, pady=10).pack()
-
-            # Result variable
-            result = [None]
-
-            def set_result(value):
-                result[0] = value
-                dialog.destroy()
-
-            # Buttons
-            button_frame = tk.Frame(dialog)
-            button_frame.pack(fill="x", padx=10, pady=10)
-
-            tk.Button(button_frame, text="Download This Video Only",
-                      command=lambda: set_result("single")).pack(side="left", fill="x", expand=True, padx=5)
-            tk.Button(button_frame, text="Download Entire Playlist",
-                      command=lambda: set_result("playlist")).pack(side="left", fill="x", expand=True, padx=5)
-            tk.Button(button_frame, text="Cancel",
-                      command=lambda: set_result("none")).pack(side="left", fill="x", expand=True, padx=5)
-
-            dialog.protocol("WM_DELETE_WINDOW", lambda: set_result("none"))
-
-            # Wait for dialog
-            app_state.app.wait_window(dialog)
-
-            if result[0] == "none" or result[0] is None:
-                safe_update_ui(lambda: app_state.youtube_status_label.config(text="Download Status: Idle"))
-                return
+    run_detached(RESOURCE_BACKGROUND, get_playlist_info, input_url,
+                 priority=PRIORITY_INTERACTIVE).add_done_callback(on_analyzed)
+
+
+def set_url_analysis_state(analyzing: bool) -> None:
+    """Turn the download button into a cancel button while a URL is being analyzed"""
+    if analyzing:
+        app_state.youtube_status_label.config(text="Analyzing playlist... (press CANCEL to stop)")
+        app_state.download_button.config(text="CANCEL", command=cancel_url_analysis)
+    else:
+        app_state.download_button.config(text="DOWNLOAD", command=download_video)
+
+
+def cancel_url_analysis() -> None:
+    """Forget the running URL analysis; its result is ignored when it arrives"""
+    app_state.url_analysis = None
+    set_url_analysis_state(False)
+    app_state.youtube_status_label.config(text="Download Status: Idle")
+
+
+def finish_url_analysis(analysis, input_url: str, output_folder: str, is_playlist_page: bool,
+                        playlist_info: Dict[str, Any]) -> None:
+    """Ask how to handle the playlist once its info is in (on the Tk thread)"""
+    if app_state.url_analysis is not analysis:
+        return  # cancelled, or a newer analysis replaced it
+    app_state.url_analysis = None
+    set_url_analysis_state(False)
+
+    playlist_action = choose_playlist_action(is_playlist_page, playlist_info)
+    if playlist_action is None:
+        app_state.youtube_status_label.config(text="Download Status: Idle")
+        return
+    start_download(input_url, output_folder, playlist_action)
+
+
+def choose_playlist_action(is_playlist_page: bool, playlist_info: Dict[str, Any]) -> Optional[str]:
+    """Ask whether to download the playlist; returns 'playlist', 'single' or None (cancelled)"""
+    playlist_count = playlist_info.get('count') or 0
+    playlist_title = playlist_info.get('title') or 'Unknown Playlist'
+    current_index = playlist_info.get('current_index') or 1
+
+    # Format count text
+    count_text = f"with {playlist_count} videos" if playlist_count > 0 else "with multiple videos"
+    if playlist_count == -1:
+        count_text = "(YouTube limited playlist information)"
+
+    if is_playlist_page:
+        # Full playlist URL
+        playlist_choice = messagebox.askyesno(
+            "Hey look a playlist!",
+            f"This is a playlist: \"{playlist_title}\" {count_text}.\n\n"
+            f"Do you wanna download the entire playlist?",
+            parent=app_state.app
+        )
+
+        return 'playlist' if playlist_choice else None
+    else:
+        # Video in playlist - create custom dialog
+        dialog = tk.Toplevel(app_state.app)
+        dialog.title("Video in Playlist")
+        dialog.geometry("400x200")
+        dialog.transient(app_state.app)
+        dialog.grab_set()
+        dialog.resizable(False, False)
+
+        # Center on parent window
+        x = app_state.app.winfo_x() + (app_state.app.winfo_width() // 2) - 200
+        y = app_state.app.winfo_y() + (app_state.app.winfo_height() // 2) - 100
+        dialog.geometry(f"+{x}+{y}")
+
+        # Message
+        message = f"This video is part of a playlist: \"{playlist_title}\" {count_text}.\n\n"
+        if current_index > 0:
+            message += f"This is video #{current_index} in the playlist.\n\n"
+        message += "What are we gonna do?"
+
+        tk.Label(dialog, text=message, wraplength=380, justify="left", padx=10, pady=10).pack()
+
+        # Result variable
+        result = [None]
 
-            playlist_action = result[0]
+        def set_result(value):
+            result[0] = value
+            dialog.destroy()
 
+        # Buttons
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill="x", padx=10, pady=10)
+
+        tk.Button(button_frame, text="Download This Video Only",
+                  command=lambda: set_result("single")).pack(side="left", fill="x", expand=True, padx=5)
+        tk.Button(button_frame, text="Download Entire Playlist",
+                  command=lambda: set_result("playlist")).pack(side="left", fill="x", expand=True, padx=5)
+        tk.Button(button_frame, text="Cancel",
+                  command=lambda: set_result("none")).pack(side="left", fill="x", expand=True, padx=5)
+
+        dialog.protocol("WM_DELETE_WINDOW", lambda: set_result("none"))
+
+        # Wait for dialog
+        app_state.app.wait_window(dialog)
+
+        return result[0] if result[0] in ('single', 'playlist') else None
+
+
+def start_download(input_url: str, output_folder: str, playlist_action: str) -> None:
+    """Start downloading with the current format and quality"""
     try:
         format_type = app_state.youtube_format_var.get()
         quality = app_state.youtube_quality_var.get()
@@ -1964,7 +1619,7 @@ def download_video():
             format_type = 'mp3'
             app_state.youtube_format_var.set('mp3')
             messagebox.showinfo("Format Changed",
-                                'YouTube Music detected - defaulting to mp3. This may take a while, the program is not crashing even if it says "not responding" lol')
+                                'YouTube Music detected - defaulting to mp3. This may take a while lol')
     except Exception:
         show_error("Error", "Failed to get format or quality settings. Please try again.")
         return
@@ -1973,49 +1628,13 @@ def download_video():
     toggle_interface(False)
     if 'list=' not in input_url:
         safe_update_ui(lambda: app_state.youtube_status_label.config(text="Processing URL..."))
-    app_state.app.update_idletasks()
 
-    thread = threading.Thread(target=download_thread,
-                              args=(input_url, output_folder, format_type, quality, playlist_action),
-                              daemon=True)
-    thread.start()
+    # Orchestration only; the download itself is queued on the network budget
+    run_detached(RESOURCE_BACKGROUND, download_thread,
+                 input_url, output_folder, format_type, quality, playlist_action,
+                 priority=PRIORITY_INTERACTIVE)
 
 
-def post_process_downloads(output_folder: str, format_type: str, ydl_opts: Dict[str, Any]):
-    """Post-process downloaded files for codec compatibility"""
-    if format_type == 'mp4' and ydl_opts.get('_check_codec'):
-        try:
-            ffmpeg_path = ydl_opts.get('_ffmpeg_path')
-            ffprobe_path = ydl_opts.get('_ffprobe_path')
-
-            if ffmpeg_path and ffprobe_path:
-                safe_update_ui(lambda: app_state.youtube_status_label.config(
-                    text="Checking video compatibility..."))
-
-                # Find recently downloaded MP4 files
-                import glob
-                pattern = os.path.join(output_folder, "**", "*.mp4")
-                mp4_files = glob.glob(pattern, recursive=True)
-
-                # Check files downloaded in the last 10 minutes
-                current_time = time.time()
-                for filepath in mp4_files:
-                    try:
-                        if os.path.getmtime(filepath) > (current_time - 600):  # 10 minutes
-                            filename = os.path.basename(filepath)
-                            safe_update_ui(lambda: app_state.youtube_status_label.config(
-                                text=f"Ensuring compatibility: {filename[:40]}..."))
-
-                            # Check and convert if needed
-                            if check_and_convert_codec(filepath, ffmpeg_path, ffprobe_path):
-                                logging.info(f"Converted {filename} to H.264")
-
-                    except Exception as e:
-                        logging.error(f"Error processing {filepath}: {e}")
-
-        except Exception as e:
-            logging.error(f"Error in post-processing: {e}")
-
 # UI Event Handlers
 def on_drop(event) -> None:
     """Handle file drop event"""
@@ -2064,19 +1683,26 @@ def start_conversion() -> None:
     if not output_folder:
         show_error("Error", MSG_SELECT_OUTPUT)
         return
-    if not output_format or output_format not in AUDIO_FORMATS + VIDEO_FORMATS:
+    output_formats = parse_output_formats(output_format)
+    if not output_formats or any(fmt not in AUDIO_FORMATS + VIDEO_FORMATS for fmt in output_formats):
         show_error("Error", MSG_INVALID_FORMAT)
         return
+    output_format = "+".join(output_formats)
 
     use_gpu = app_state.gpu_var.get()
+    incremental = app_state.incremental_var.get()
+    max_workers = app_state.settings_manager.get("conversion_workers", 0)
+    cache_max_mb = 0
+    if app_state.settings_manager.get("conversion_cache", False):
+        cache_max_mb = app_state.settings_manager.get("conversion_cache_max_mb", 10240)
     app_state.progress_var.set(0)
 
-    # Start conversion in thread
-    thread = threading.Thread(target=convert_audio,
-                              args=(input_paths, output_folder, output_format,
-                                    app_state.progress_var, app_state.convert_button, use_gpu),
-                              daemon=True)
-    thread.start()
+    # Orchestration only; probes and encodes are queued on their own resource budgets
+    run_detached(RESOURCE_BACKGROUND, convert_audio,
+                 input_paths, output_folder, output_format,
+                 app_state.progress_var, app_state.convert_button, use_gpu,
+                 max_workers, incremental, cache_max_mb,
+                 priority=PRIORITY_INTERACTIVE)
 
 
 def toggle_interface(enabled: bool = True) -> None:
@@ -2084,7 +1710,7 @@ def toggle_interface(enabled: bool = True) -> None:
     widgets = [
         app_state.input_entry, app_state.output_folder_entry,
         app_state.youtube_link_entry, app_state.format_dropdown,
-        app_state.convert_button, app_state.gpu_checkbox
+        app_state.convert_button, app_state.gpu_checkbox, app_state.incremental_checkbox
     ]
     state = 'normal' if enabled else 'disabled'
     for widget in widgets:
@@ -2324,8 +1950,9 @@ def create_ui_components() -> None:
     app_state.youtube_quality_dropdown.grid(row=0, column=3, padx=10, sticky="ew")
     on_youtube_format_change()
 
-    tk.Button(video_frame, text="DOWNLOAD", command=download_video, bg="#9370DB",
-              fg="white", font=app_state.regular_font).grid(row=3, column=0, columnspan=3, pady=10, sticky="ew")
+    app_state.download_button = tk.Button(video_frame, text="DOWNLOAD", command=download_video, bg="#9370DB",
+                                          fg="white", font=app_state.regular_font)
+    app_state.download_button.grid(row=3, column=0, columnspan=3, pady=10, sticky="ew")
 
     # File Conversion Frame (row 2)
     conversion_frame = tk.LabelFrame(main_frame, text="File Conversion", bg="#E6E6FA",
@@ -2343,8 +1970,8 @@ def create_ui_components() -> None:
     tk.Label(conversion_frame, text="Output Format:", bg="#E6E6FA",
              font=app_state.regular_font).grid(row=1, column=0, padx=10, pady=5, sticky="w")
     app_state.format_dropdown = ttk.Combobox(conversion_frame, textvariable=app_state.format_var,
-                                             values=AUDIO_FORMATS + VIDEO_FORMATS,
-                                             font=app_state.regular_font, state="readonly")
+                                             values=AUDIO_FORMATS + VIDEO_FORMATS + FORMAT_COMBINATIONS,
+                                             font=app_state.regular_font)
     app_state.format_dropdown.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
 
     app_state.convert_button = tk.Button(conversion_frame, text="CONVERT", command=start_conversion,
@@ -2377,9 +2004,14 @@ def create_ui_components() -> None:
                                             variable=app_state.gpu_var)
     app_state.gpu_checkbox.grid(row=0, column=0, pady=5, sticky="ew")
 
+    app_state.incremental_checkbox = tk.Checkbutton(bottom_frame, text="Skip Files Already Converted",
+                                                    bg="#E6E6FA", font=app_state.regular_font,
+                                                    variable=app_state.incremental_var)
+    app_state.incremental_checkbox.grid(row=1, column=0, pady=5, sticky="ew")
+
     app_state.youtube_status_label = tk.Label(bottom_frame, text="Download Status: Idle",
                                               bg="#E6E6FA", font=app_state.regular_font)
-    app_state.youtube_status_label.grid(row=1, column=0, pady=5, sticky="ew")
+    app_state.youtube_status_label.grid(row=2, column=0, pady=5, sticky="ew")
 
     # Configure grid weights
     app_state.app.grid_rowconfigure(0, weight=1)
@@ -2400,6 +2032,7 @@ def main():
         # Initialize variables with values from settings
         app_state.format_var = tk.StringVar(value=app_settings.get("default_format", "mp4"))
         app_state.gpu_var = tk.BooleanVar(value=app_settings.get("use_gpu", True))
+        app_state.incremental_var = tk.BooleanVar(value=app_settings.get("incremental_conversion", False))
         app_state.progress_var = tk.IntVar()
 
         # Initialize download manager
@@ -2419,6 +2052,16 @@ def main():
             messagebox.showerror("FFmpeg Error", str(e))
             sys.exit(1)
 
+        # Detect hardware encoders in the background while the UI loads
+        start_hw_capability_detection(ffmpeg_path)
+
+        # Local staging area for intermediates; also clears what a crashed run left there
+        configure_staging(app_settings.get("staging_dir", ""), app_settings.get("staging_enabled", True))
+
+        # Stage timings of downloads and conversions, optionally exported for Prometheus
+        configure_timings(get_absolute_path(TIMINGS_FILE), app_settings.get("prometheus_textfile", ""),
+                          app_settings.get("stage_timings", True))
+
         # Setup UI
         setup_main_window()
         create_ui_components()
@@ -2430,6 +2073,12 @@ def main():
         # Initialize audio system after UI is ready
         app_state.app.after(500, initialize_audio_system)
 
+        # Download progress is drawn at a fixed frame rate instead of per yt-dlp callback
+        app_state.app.after(int(PROGRESS_FRAME_INTERVAL * 1000), pump_progress_events)
+
+        # Offer to resume batches a crash left unfinished
+        app_state.app.after(1000, offer_resume_interrupted_batches)
+
         # Start the main loop
         app_state.app.mainloop()
 
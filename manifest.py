@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+# Per-output-folder record of what was converted from what, used by incremental
+# batches to skip jobs whose input, encoding arguments and output are unchanged.
+# One input can have several outputs (multi-format batches), so entries are kept
+# per input and, under it, per output path.
+
+MANIFEST_FILE = ".laces_manifest.json"
+MANIFEST_VERSION = 2
+MANIFEST_SAVE_INTERVAL = 10  # seconds between periodic saves during a batch
+
+
+def file_fingerprint(path: str) -> Optional[Dict[str, int]]:
+    """Cheap identity of a file version: size and modification time"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+class ConversionManifest:
+    """Incremental-conversion manifest stored as JSON in the output folder"""
+
+    def __init__(self, output_folder: str):
+        self.path = os.path.join(output_folder, MANIFEST_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.load()
+
+    def load(self) -> None:
+        """Read the manifest, starting empty if it is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self._entries = data.get('entries', {})
+            elif data.get('version') == 1:
+                # Version 1 kept a single output per input
+                self._entries = {key: {self._key(entry['output_path']): entry}
+                                 for key, entry in data.get('entries', {}).items() if entry.get('output_path')}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    def save(self) -> bool:
+        """Write the manifest atomically"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {'version': MANIFEST_VERSION,
+                    'entries': {key: dict(outputs) for key, outputs in self._entries.items()}}
+            self._dirty = False
+            self._last_save = time.time()
+
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+            return True
+        except OSError as e:
+            logging.error(f"Error saving manifest: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def maybe_save(self) -> None:
+        """Save if the last save is older than MANIFEST_SAVE_INTERVAL"""
+        if time.time() - self._last_save >= MANIFEST_SAVE_INTERVAL:
+            self.save()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def is_up_to_date(self, input_path: str, output_path: str, signature: Dict[str, Any]) -> bool:
+        """True when the recorded conversion still matches input, arguments and output"""
+        with self._lock:
+            entry = self._entries.get(self._key(input_path), {}).get(self._key(output_path))
+        if not entry:
+            return False
+        return (entry.get('signature') == signature
+                and entry.get('output_path') == os.path.abspath(output_path)
+                and entry.get('input') == file_fingerprint(input_path)
+                and entry.get('output') is not None
+                and entry.get('output') == file_fingerprint(output_path))
+
+    def record(self, input_path: str, output_path: str, signature: Dict[str, Any]) -> None:
+        """Remember a successful conversion"""
+        entry = {
+            'signature': signature,
+            'output_path': os.path.abspath(output_path),
+            'input': file_fingerprint(input_path),
+            'output': file_fingerprint(output_path),
+            'converted_at': time.time()
+        }
+        with self._lock:
+            self._entries.setdefault(self._key(input_path), {})[self._key(output_path)] = entry
+            self._dirty = True
+        self.maybe_save()
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+import subprocess
+from typing import Dict, Any, List, Optional
+
+# Structured ffprobe access with a persistent cache.
+# Stdlib only so converter.py can import it freely.
+
+PROBE_CACHE_MAX_ENTRIES = 20000
+
+
+class ProbeCache:
+    """
+    SQLite-backed store of ffprobe results keyed by (path, size, mtime).
+    Least recently used entries are evicted once max_entries is exceeded.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = PROBE_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                "data TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS probes_last_used ON probes (last_used)")
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[Dict[str, Any]]:
+        """Cached probe for this exact file version, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, size, mtime_ns)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE probes SET last_used = ? WHERE path = ?", (time.time(), path))
+        return json.loads(row[0])
+
+    def put(self, path: str, size: int, mtime_ns: int, data: Dict[str, Any]) -> None:
+        """Store a probe, replacing any older version of the same path"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data, last_used) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, json.dumps(data), time.time())
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM probes WHERE path IN "
+                    "(SELECT path FROM probes ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def clear(self) -> None:
+        """Drop every cached probe"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM probes")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process plus the number of stored entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache(db_path: Optional[str] = None,
+                    max_entries: int = PROBE_CACHE_MAX_ENTRIES) -> Optional[ProbeCache]:
+    """Shared cache instance, opened on first use; None if it cannot be opened"""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None and db_path:
+            try:
+                _probe_cache = ProbeCache(db_path, max_entries)
+            except sqlite3.Error as e:
+                logging.error(f"Could not open probe cache at {db_path}: {e}")
+        return _probe_cache
+
+
+def run_ffprobe(ffprobe_path: str, path: str) -> Optional[Dict[str, Any]]:
+    """Run ffprobe and return its parsed JSON (streams + format), or None on failure"""
+    probe_cmd = [ffprobe_path, '-v', 'error', '-show_streams', '-show_format', '-of', 'json', path]
+    kwargs = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+
+    try:
+        result = subprocess.run(probe_cmd, capture_output=True, text=True, **kwargs)
+    except OSError as e:
+        logging.error(f"Could not run ffprobe: {e}")
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"ffprobe failed for {path}: {result.stderr.strip()}")
+        return None
+
+    try:
+        return json.loads(result.stdout)
+    except ValueError as e:
+        logging.error(f"Invalid ffprobe output for {path}: {e}")
+        return None
+
+
+def probe_media(path: str, ffprobe_path: str, cache: Optional[ProbeCache] = None) -> Optional[Dict[str, Any]]:
+    """Probe a media file, answering from the cache when the file is unchanged"""
+    if cache is None:
+        return run_ffprobe(ffprobe_path, path)
+
+    try:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+    except OSError:
+        return run_ffprobe(ffprobe_path, path)
+
+    try:
+        cached = cache.get(path, stat.st_size, stat.st_mtime_ns)
+        if cached is not None:
+            return cached
+    except sqlite3.Error as e:
+        logging.error(f"Probe cache read failed: {e}")
+
+    probe = run_ffprobe(ffprobe_path, path)
+    if probe is not None:
+        try:
+            cache.put(path, stat.st_size, stat.st_mtime_ns, probe)
+        except sqlite3.Error as e:
+            logging.error(f"Probe cache write failed: {e}")
+    return probe
+
+
+def get_streams(probe: Optional[Dict[str, Any]], codec_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Streams from a probe result, optionally filtered by type (video/audio/subtitle)"""
+    if not probe:
+        return []
+    streams = probe.get('streams', [])
+    if codec_type is None:
+        return streams
+    return [s for s in streams if s.get('codec_type') == codec_type]
+
+
+def get_duration(probe: Optional[Dict[str, Any]]) -> float:
+    """Container duration in seconds, 0 if unknown"""
+    if not probe:
+        return 0.0
+    try:
+        return float(probe.get('format', {}).get('duration', 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,50 @@
+import threading
+from typing import Dict, Any, Hashable
+
+# Progress events between worker threads and the UI. Workers publish structured
+# state per job and never touch Tk; the UI drains at its own frame rate and only
+# sees the latest state of each job, however many updates arrived in between.
+# Stdlib only.
+
+PROGRESS_FRAME_INTERVAL = 0.1  # seconds between UI drains (10 Hz)
+
+
+class ProgressBus:
+    """Latest-state-per-job mailbox; publish() is a dict write under a lock"""
+
+    def __init__(self):
+        self._latest = {}  # job -> (event, state), most recently updated job last
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, job: Hashable, event: str, state: Dict[str, Any]) -> None:
+        """Replace the pending state of a job (event: e.g. 'downloading', 'finished')"""
+        with self._lock:
+            self._latest.pop(job, None)
+            self._latest[job] = (event, state)
+            self.published += 1
+
+    def drain(self) -> Dict[Hashable, Any]:
+        """Take everything published since the last drain: {job: (event, state)}"""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            self.delivered += len(latest)
+        return latest
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'published': self.published, 'delivered': self.delivered, 'pending': len(self._latest)}
+
+
+_progress_bus = None
+_progress_bus_lock = threading.Lock()
+
+
+def get_progress_bus() -> ProgressBus:
+    """Process-wide progress bus"""
+    global _progress_bus
+    with _progress_bus_lock:
+        if _progress_bus is None:
+            _progress_bus = ProgressBus()
+        return _progress_bus
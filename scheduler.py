@@ -0,0 +1,200 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Optional, Hashable
+
+# Central scheduler for background work. Every task belongs to a resource class
+# with its own concurrency budget, so e.g. downloads never wait behind CPU encodes
+# and the GPU's encode sessions are never oversubscribed. Within a class, tasks run
+# by priority, then fairly interleaved between batches (start-time fair queueing).
+# Stdlib only.
+
+RESOURCE_NETWORK = "network"        # downloads
+RESOURCE_CPU_ENCODE = "cpu_encode"  # software encodes
+RESOURCE_HW_ENCODE = "hw_encode"    # NVENC/QSV/AMF/VAAPI sessions
+RESOURCE_DISK = "disk"              # remux, probe, copy
+RESOURCE_BACKGROUND = "background"  # orchestration and housekeeping (mostly waiting)
+
+DEFAULT_BUDGETS = {
+    RESOURCE_NETWORK: 3,
+    RESOURCE_CPU_ENCODE: os.cpu_count() or 1,
+    # Consumer GPUs cap concurrent encode sessions (NVENC allows 3-5 depending on driver)
+    RESOURCE_HW_ENCODE: 2,
+    RESOURCE_DISK: 4,
+    RESOURCE_BACKGROUND: 16,
+}
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BULK = 20
+
+
+class _Task:
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'batch', 'enqueued')
+
+    def __init__(self, fn, args, kwargs, future, batch):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.batch = batch
+        self.enqueued = time.time()
+
+
+class _ResourceQueue:
+    """Priority queue and worker threads of one resource class"""
+
+    def __init__(self, name: str, budget: int):
+        self.name = name
+        self.budget = max(1, budget)
+        self.heap = []
+        self.workers = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.virtual_time = 0.0
+        self.batch_finish = {}  # batch -> virtual finish time of its last queued task
+        self.batch_depth = {}
+
+
+class Scheduler:
+    """
+    Runs callables on per-resource-class worker threads.
+    submit() returns a concurrent.futures.Future.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._sequence = itertools.count()
+        self._queues = {name: _ResourceQueue(name, budget)
+                        for name, budget in dict(DEFAULT_BUDGETS, **(budgets or {})).items()}
+
+    def set_budget(self, resource: str, budget: int) -> None:
+        """Change how many tasks of a resource class may run at once"""
+        with self._condition:
+            queue = self._queue(resource)
+            queue.budget = max(1, budget)
+            self._spawn_workers(queue)
+            self._condition.notify_all()
+
+    def _queue(self, resource: str) -> _ResourceQueue:
+        queue = self._queues.get(resource)
+        if queue is None:
+            queue = self._queues[resource] = _ResourceQueue(resource, DEFAULT_BUDGETS.get(resource, 1))
+        return queue
+
+    def submit(self, resource: str, fn: Callable, *args, priority: int = PRIORITY_NORMAL,
+               batch: Optional[Hashable] = None, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) on a resource class"""
+        future = Future()
+        task = _Task(fn, args, kwargs, future, batch)
+        with self._condition:
+            queue = self._queue(resource)
+            # Each batch's tasks get consecutive virtual start times, beginning no earlier
+            # than the class clock, so a new batch interleaves with a long-running one
+            start = max(queue.virtual_time, queue.batch_finish.get(batch, 0.0))
+            queue.batch_finish[batch] = start + 1.0
+            queue.batch_depth[batch] = queue.batch_depth.get(batch, 0) + 1
+            heapq.heappush(queue.heap, (priority, start, next(self._sequence), task))
+            self._spawn_workers(queue)
+            self._condition.notify_all()
+        return future
+
+    def _spawn_workers(self, queue: _ResourceQueue) -> None:
+        # Called with the lock held; workers are started lazily up to the budget
+        while queue.workers < min(queue.budget, queue.running + len(queue.heap)):
+            queue.workers += 1
+            threading.Thread(target=self._worker, args=(queue,), daemon=True,
+                             name=f"sched-{queue.name}-{queue.workers}").start()
+
+    def _worker(self, queue: _ResourceQueue) -> None:
+        while True:
+            with self._condition:
+                while not queue.heap or queue.running >= queue.budget:
+                    if queue.workers > queue.budget or not self._condition.wait(timeout=30):
+                        # Idle (or over budget after a decrease): let the thread go
+                        if not queue.heap or queue.workers > queue.budget:
+                            queue.workers -= 1
+                            return
+                _, start, _, task = heapq.heappop(queue.heap)
+                queue.virtual_time = max(queue.virtual_time, start)
+                queue.batch_depth[task.batch] -= 1
+                if not queue.batch_depth[task.batch]:
+                    del queue.batch_depth[task.batch]
+                    queue.batch_finish.pop(task.batch, None)
+                wait = time.time() - task.enqueued
+                queue.total_wait += wait
+                queue.max_wait = max(queue.max_wait, wait)
+                queue.running += 1
+
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.fn(*task.args, **task.kwargs))
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            except Exception as e:
+                logging.error(f"Scheduler task failed in {queue.name}: {e}")
+            finally:
+                with self._condition:
+                    queue.running -= 1
+                    queue.completed += 1
+                    self._condition.notify_all()
+
+    def occupancy(self, resource: str) -> int:
+        """Tasks of a resource class running or about to run (running + queued, at most its budget)"""
+        with self._lock:
+            queue = self._queue(resource)
+            return min(queue.budget, queue.running + len(queue.heap))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per resource class: budget, running, queue depth (total and per batch) and wait times"""
+        now = time.time()
+        with self._lock:
+            result = {}
+            for name, queue in self._queues.items():
+                oldest = min((entry[3].enqueued for entry in queue.heap), default=None)
+                result[name] = {
+                    'budget': queue.budget,
+                    'running': queue.running,
+                    'queued': len(queue.heap),
+                    'queued_by_batch': {str(batch): depth for batch, depth in queue.batch_depth.items()},
+                    'completed': queue.completed,
+                    'avg_wait': round(queue.total_wait / queue.completed, 3) if queue.completed else 0.0,
+                    'max_wait': round(queue.max_wait, 3),
+                    'oldest_wait': round(now - oldest, 3) if oldest else 0.0
+                }
+            return result
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Process-wide scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
+
+
+def run_detached(resource: str, fn: Callable, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> Future:
+    """Fire-and-forget submit; exceptions are logged since nobody waits on the result"""
+    def log_failure(future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            error = future.exception()
+            logging.error(f"Background task {getattr(fn, '__name__', fn)} failed: {error}",
+                          exc_info=(type(error), error, error.__traceback__))
+
+    future = get_scheduler().submit(resource, fn, *args, priority=priority, **kwargs)
+    future.add_done_callback(log_failure)
+    return future
@@ -0,0 +1,113 @@
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+from typing import Dict, Optional
+
+# Per-site connection caps and shared throttling backoff for parallel downloads.
+# Every worker talking to the same site shares one limiter entry, so a 429 seen by
+# one playlist item pauses new requests to that site for all of them. Stdlib only.
+
+DEFAULT_SITE_CONNECTION_LIMIT = 2
+SITE_CONNECTION_LIMITS = {
+    'youtube.com': 3,
+    'soundcloud.com': 3,
+    'instagram.com': 1,
+    'tiktok.com': 2,
+    'twitter.com': 2,
+}
+# Alternate domains that share a site's rate limits
+SITE_ALIASES = {
+    'youtu.be': 'youtube.com',
+    'x.com': 'twitter.com',
+    'fb.watch': 'facebook.com',
+    'snd.sc': 'soundcloud.com',
+    'dai.ly': 'dailymotion.com',
+}
+THROTTLE_BACKOFF_INITIAL = 10.0  # seconds
+THROTTLE_BACKOFF_MAX = 300.0
+# The rate-limit cases handle_download_error recognizes
+THROTTLE_MARKERS = ('429', 'too many requests', 'throttling', 'rate limit', 'rate-limit')
+
+
+def get_site_key(url: str, default: Optional[str] = None) -> Optional[str]:
+    """Site a URL belongs to for limiting purposes (e.g. music.youtube.com -> youtube.com)"""
+    netloc = urlparse(url).netloc.lower().split(':')[0] if '://' in (url or '') else ''
+    if not netloc:
+        return default
+    for alias, site in SITE_ALIASES.items():
+        if netloc == alias or netloc.endswith('.' + alias):
+            return site
+    return '.'.join(netloc.split('.')[-2:])
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Whether a download error is the site asking us to slow down"""
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class SiteLimiter:
+    """Connection slots and throttling backoff per site"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = DEFAULT_SITE_CONNECTION_LIMIT):
+        self.limits = dict(SITE_CONNECTION_LIMITS, **(limits or {}))
+        self.default_limit = default_limit
+        self._active = {}  # site -> connections in use
+        self._backoff = {}  # site -> (paused until, current delay)
+        self._lock = threading.Lock()
+
+    def limit(self, site: str) -> int:
+        return max(1, self.limits.get(site, self.default_limit))
+
+    def try_acquire(self, site: str) -> bool:
+        """Take a connection slot unless the site is at its cap or backing off"""
+        with self._lock:
+            if time.time() < self._backoff.get(site, (0.0, 0.0))[0]:
+                return False
+            if self._active.get(site, 0) >= self.limit(site):
+                return False
+            self._active[site] = self._active.get(site, 0) + 1
+            return True
+
+    def release(self, site: str) -> None:
+        with self._lock:
+            self._active[site] = max(self._active.get(site, 0) - 1, 0)
+
+    def backoff_remaining(self, site: str) -> float:
+        """Seconds until new requests to the site are allowed again"""
+        with self._lock:
+            return max(self._backoff.get(site, (0.0, 0.0))[0] - time.time(), 0.0)
+
+    def report_throttled(self, site: str) -> float:
+        """Pause the site, doubling the pause while it keeps throttling; returns the pause"""
+        with self._lock:
+            until, delay = self._backoff.get(site, (0.0, 0.0))
+            if time.time() < until:
+                # Another worker already backed off for this burst
+                return until - time.time()
+            delay = min(delay * 2, THROTTLE_BACKOFF_MAX) if delay else THROTTLE_BACKOFF_INITIAL
+            self._backoff[site] = (time.time() + delay, delay)
+        logging.warning(f"{site} is rate limiting, pausing new requests for {delay:.0f}s")
+        return delay
+
+    def report_success(self, site: str) -> None:
+        """A download went through, so the next throttle starts from the initial pause"""
+        with self._lock:
+            until, _ = self._backoff.get(site, (0.0, 0.0))
+            if until and time.time() >= until:
+                del self._backoff[site]
+
+
+_site_limiter = None
+_site_limiter_lock = threading.Lock()
+
+
+def get_site_limiter() -> SiteLimiter:
+    """Process-wide limiter shared by every download"""
+    global _site_limiter
+    with _site_limiter_lock:
+        if _site_limiter is None:
+            _site_limiter = SiteLimiter()
+        return _site_limiter
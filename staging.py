@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import errno
+import shutil
+import logging
+import tempfile
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+# Staging area for intermediate files (download fragments, pre-merge streams, encoder
+# output, chunked-encode segments). Intermediates are written to a fast local
+# directory and only finished files are moved to the (often network) destination,
+# with an atomic rename when both are on the same filesystem. Stdlib only.
+
+STAGING_DIR_NAME = "laces_staging"
+STAGING_MIN_FREE_BYTES = 512 * 1024 * 1024  # always leave this much free on the staging disk
+WORK_DIR_PREFIX = "job-"
+PUBLISH_SUFFIX = ".laces-part"
+
+
+def get_default_staging_root() -> str:
+    """System temp directory (tmpfs on many Linux setups, local disk elsewhere)"""
+    return os.path.join(tempfile.gettempdir(), STAGING_DIR_NAME)
+
+
+def is_process_alive(pid: int) -> bool:
+    """Whether a process with this id is still running"""
+    if pid == os.getpid():
+        return True
+    if sys.platform == 'win32':
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def move_into_place(staged_path: str, final_path: str) -> None:
+    """
+    Move a finished file to its destination. Same filesystem: one atomic rename.
+    Otherwise it is copied next to the destination under a temp name and renamed
+    there, so the destination never shows a half-copied file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(final_path)), exist_ok=True)
+    try:
+        os.replace(staged_path, final_path)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    temp_path = os.path.join(os.path.dirname(os.path.abspath(final_path)),
+                             f".{os.path.basename(final_path)}{PUBLISH_SUFFIX}")
+    try:
+        shutil.copyfile(staged_path, temp_path)
+        os.replace(temp_path, final_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.remove(staged_path)
+
+
+class StagingArea:
+    """
+    Per-job work directories under one root. Directory names carry the owning
+    process id, so leftovers of crashed runs can be told apart from live jobs.
+    """
+
+    def __init__(self, root: str, min_free_bytes: int = STAGING_MIN_FREE_BYTES):
+        self.root = os.path.abspath(root)
+        self.min_free_bytes = min_free_bytes
+        self._counter = itertools.count(1)
+        os.makedirs(self.root, exist_ok=True)
+
+    def free_bytes(self) -> int:
+        """Free space on the staging filesystem"""
+        return shutil.disk_usage(self.root).free
+
+    def has_space(self, required_bytes: int = 0) -> bool:
+        """True when required_bytes fit while keeping the minimum free"""
+        try:
+            return self.free_bytes() - max(required_bytes, 0) >= self.min_free_bytes
+        except OSError:
+            return False
+
+    def cleanup_orphans(self) -> int:
+        """Remove work directories whose process is gone; returns how many were removed"""
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return 0
+        for name in names:
+            parts = name.split("-")
+            if not name.startswith(WORK_DIR_PREFIX) or len(parts) < 3 or not parts[1].isdigit():
+                continue
+            if is_process_alive(int(parts[1])):
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            removed += 1
+        if removed:
+            logging.info(f"Removed {removed} orphaned staging directories from {self.root}")
+        return removed
+
+    def create_work_dir(self) -> str:
+        """A fresh, empty work directory owned by this process"""
+        path = os.path.join(self.root, f"{WORK_DIR_PREFIX}{os.getpid()}-{next(self._counter)}-{int(time.time())}")
+        os.makedirs(path)
+        return path
+
+    @contextmanager
+    def work_dir(self, required_bytes: int = 0):
+        """Work directory for one job, removed afterwards; yields None when there is not enough space"""
+        if not self.has_space(required_bytes):
+            logging.info(f"Staging area {self.root} is short on space for "
+                         f"{required_bytes // 1024 // 1024} MB, writing next to the output instead")
+            yield None
+            return
+        path = self.create_work_dir()
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+_staging_area = None
+_staging_configured = False
+_staging_lock = threading.Lock()
+
+
+def configure_staging(root: Optional[str] = None, enabled: bool = True) -> Optional[StagingArea]:
+    """
+    Set up the process-wide staging area (empty root = system temp directory)
+    and clean up what crashed runs left behind. Returns None when disabled or unusable.
+    """
+    global _staging_area, _staging_configured
+    with _staging_lock:
+        _staging_configured = True
+        _staging_area = None
+        if not enabled:
+            return None
+        root = root or get_default_staging_root()
+        try:
+            _staging_area = StagingArea(root)
+        except OSError as e:
+            logging.error(f"Could not use staging directory {root}: {e}")
+            return None
+    _staging_area.cleanup_orphans()
+    return _staging_area
+
+
+def get_staging_area() -> Optional[StagingArea]:
+    """Process-wide staging area (configured with defaults on first use)"""
+    if not _staging_configured:
+        configure_staging()
+    return _staging_area
+
+
+@contextmanager
+def staging_work_dir(required_bytes: int = 0):
+    """Work directory in the staging area, or None when staging is off or full"""
+    staging = get_staging_area()
+    if staging is None:
+        yield None
+        return
+    with staging.work_dir(required_bytes) as path:
+        yield path
+
+
+@contextmanager
+def stage_outputs(output_paths: List[str], required_bytes: int = 0, fallback_suffix: Optional[str] = None):
+    """
+    Yields {final path: path to write instead}. If the block succeeds, every staged
+    file that was written is moved into place; if it raises, they are discarded.
+    Without staging, files are written to final path + fallback_suffix (or directly
+    to the final path when no suffix is given).
+    """
+    with staging_work_dir(required_bytes) as work_dir:
+        staged = {}
+        for index, output_path in enumerate(output_paths):
+            if work_dir is not None:
+                staged[output_path] = os.path.join(work_dir, f"{index}_{os.path.basename(output_path)}")
+            else:
+                staged[output_path] = output_path + (fallback_suffix or "")
+        try:
+            yield staged
+        except BaseException:
+            for output_path, staged_path in staged.items():
+                if staged_path != output_path and os.path.exists(staged_path):
+                    os.remove(staged_path)
+            raise
+        for output_path, staged_path in staged.items():
+            if staged_path != output_path and os.path.exists(staged_path):
+                move_into_place(staged_path, output_path)
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import converter
+from converter import MediaConverter, build_conversion_jobs, run_conversion_batch, run_conversion_group
+
+
+def fake_plan(converter_, input_path, output_path, input_format, output_format, use_gpu):
+    return [("cpu", ["ffmpeg", "-i", input_path, "-c:a", "copy", "-y", output_path])]
+
+
+def make_jobs(tmp_path, names, formats):
+    inputs = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"audio")
+        inputs.append(str(path))
+    return build_conversion_jobs(inputs, str(tmp_path / "out"), formats)
+
+
+def test_fanout_environment_error_falls_back_to_per_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaConverter, "plan_commands", fake_plan)
+
+    def out_of_space(*args):
+        raise OSError(28, "No space left on device")
+
+    converted = []
+
+    def convert_single_file(self, input_path, output_path, *args):
+        converted.append(os.path.basename(output_path))
+
+    monkeypatch.setattr(converter, "build_fanout_command", out_of_space)
+    monkeypatch.setattr(MediaConverter, "convert_single_file", convert_single_file)
+    jobs = make_jobs(tmp_path, ["song.wav"], ["mp3", "ogg"])
+
+    results = run_conversion_group(MediaConverter("ffmpeg"), jobs, False)
+    assert [r['success'] for r in results] == [True, True]
+    assert sorted(converted) == ["song.mp3", "song.ogg"]
+
+
+def test_unexpected_group_error_fails_only_that_group(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaConverter, "plan_commands", fake_plan)
+    monkeypatch.setattr(converter, "probe_file", lambda *args: None)
+
+    def run_group(converter_, jobs, *args):
+        if os.path.basename(jobs[0]['input_path']) == "bad.wav":
+            raise RuntimeError("worker blew up")
+        return [dict(converter.new_job_result(job), success=True) for job in jobs]
+
+    monkeypatch.setattr(converter, "run_conversion_group", run_group)
+    jobs = make_jobs(tmp_path, ["bad.wav", "good.wav"], ["mp3"])
+
+    results = run_conversion_batch(MediaConverter("ffmpeg"), jobs, False, 2)
+    by_input = {os.path.basename(r['input_path']): r for r in results}
+    assert by_input["good.wav"]['success']
+    assert not by_input["bad.wav"]['success']
+    assert "worker blew up" in by_input["bad.wav"]['error']
+
+
+def test_encoding_starts_before_slow_probes_finish(tmp_path, monkeypatch):
+    monkeypatch.setattr(MediaConverter, "plan_commands", fake_plan)
+    encoding = threading.Event()
+    probes_waited = []
+
+    def slow_probe(*args):
+        probes_waited.append(encoding.wait(5))
+        return {'format': {'duration': '10.0'}}
+
+    def run_group(converter_, jobs, use_gpu, progress_callback, *args):
+        encoding.set()
+        progress_callback({'fraction': 0.5})
+        return [dict(converter.new_job_result(job), success=True) for job in jobs]
+
+    monkeypatch.setattr(converter, "probe_file", slow_probe)
+    monkeypatch.setattr(converter, "run_conversion_group", run_group)
+    jobs = make_jobs(tmp_path, ["a.wav", "b.wav"], ["mp3"])
+    fractions = []
+
+    results = run_conversion_batch(MediaConverter("ffmpeg"), jobs, False, 2,
+                                   fraction_callback=lambda fraction, snapshot: fractions.append(fraction))
+    assert all(r['success'] for r in results)
+    assert probes_waited and all(probes_waited)
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
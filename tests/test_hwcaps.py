@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+
+import pytest
+
+from hwcaps import load_capabilities, select_video_encoder, hash_binary
+
+# A fake ffmpeg build with only Intel Quick Sync: lists h264_qsv and libx264, and
+# test encodes succeed. Every call is appended to calls.log next to the script.
+STUB_FFMPEG = r"""#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.log"
+case "$*" in
+  *-encoders*)
+    echo "Encoders:"
+    echo " V..... = Video"
+    echo " ------"
+    echo " V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC"
+    echo " V....D h264_qsv             H.264 (Intel Quick Sync Video acceleration)"
+    ;;
+  *-hwaccels*)
+    echo "Hardware acceleration methods:"
+    echo "qsv"
+    ;;
+  *h264_qsv*) exit 0 ;;
+  *) exit 1 ;;
+esac
+"""
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="the stub ffmpeg is a shell script")
+
+
+@pytest.fixture
+def stub_ffmpeg(tmp_path):
+    path = tmp_path / "ffmpeg"
+    path.write_text(STUB_FFMPEG)
+    path.chmod(0o755)
+    return str(path)
+
+
+def calls(ffmpeg_path):
+    log = os.path.join(os.path.dirname(ffmpeg_path), "calls.log")
+    with open(log) as f:
+        return f.read().splitlines()
+
+
+def test_detects_qsv_and_caches_by_binary_hash(stub_ffmpeg, tmp_path):
+    cache_file = str(tmp_path / "hw_capabilities.json")
+
+    capabilities = load_capabilities(stub_ffmpeg, cache_file)
+    assert capabilities['hw_encoders'] == {'qsv': True}
+    assert capabilities['hwaccels'] == ['qsv']
+    assert select_video_encoder(capabilities) == {'backend': 'qsv', 'encoder': 'h264_qsv'}
+    assert select_video_encoder(capabilities, use_gpu=False)['backend'] == 'software'
+
+    with open(cache_file) as f:
+        cache = json.load(f)
+    assert list(cache) == [hash_binary(stub_ffmpeg)]
+
+    # Same bytes: answered from the cache without running ffmpeg again
+    probed = len(calls(stub_ffmpeg))
+    assert load_capabilities(stub_ffmpeg, cache_file)['hw_encoders'] == {'qsv': True}
+    assert len(calls(stub_ffmpeg)) == probed
+
+
+def test_changed_binary_is_detected_again(stub_ffmpeg, tmp_path):
+    cache_file = str(tmp_path / "hw_capabilities.json")
+    load_capabilities(stub_ffmpeg, cache_file)
+    old_hash = hash_binary(stub_ffmpeg)
+    probed = len(calls(stub_ffmpeg))
+
+    # An ffmpeg update: same path, different bytes
+    with open(stub_ffmpeg, 'a') as f:
+        f.write("# rebuilt\n")
+    new_hash = hash_binary(stub_ffmpeg)
+    assert new_hash != old_hash
+
+    capabilities = load_capabilities(stub_ffmpeg, cache_file)
+    assert len(calls(stub_ffmpeg)) > probed
+    assert select_video_encoder(capabilities)['backend'] == 'qsv'
+    with open(cache_file) as f:
+        assert set(json.load(f)) == {old_hash, new_hash}
@@ -0,0 +1,47 @@
+import pytest
+
+from infocache import InfoCache, info_cache_variant
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLstub"
+ANALYSIS_OPTS = {'quiet': True, 'extract_flat': 'in_playlist', 'playlist_items': '1-1', 'ignoreerrors': True}
+DOWNLOAD_OPTS = {'quiet': True, 'playlist_items': '2-5', 'ignoreerrors': False}
+
+
+class FakeYoutubeDL:
+    """Counts extractions and returns entries as its playlist_items would select them"""
+
+    def __init__(self, params):
+        self.params = params
+        self.extractions = 0
+
+    def extract_info(self, url, download=False, ie_key=None, process=True):
+        self.extractions += 1
+        return {'_type': 'playlist', 'webpage_url': url, 'playlist_items': self.params.get('playlist_items'),
+                'entries': [{'id': 'entry'}]}
+
+
+def test_variant_covers_options_baked_into_an_extraction():
+    assert info_cache_variant({'quiet': True, 'ignoreerrors': False}) == ''
+    assert info_cache_variant({'noplaylist': True}) == 'noplaylist=True'
+    assert info_cache_variant(ANALYSIS_OPTS) != info_cache_variant(DOWNLOAD_OPTS)
+    assert info_cache_variant(DOWNLOAD_OPTS) == info_cache_variant(dict(DOWNLOAD_OPTS, socket_timeout=30))
+
+    cache = InfoCache()
+    cache.put(PLAYLIST_URL, {'playlist_items': '1-1'}, info_cache_variant(ANALYSIS_OPTS))
+    assert cache.get(PLAYLIST_URL, info_cache_variant(DOWNLOAD_OPTS)) is None
+
+
+def test_download_does_not_reuse_the_analysis_extraction(monkeypatch):
+    pytest.importorskip("yt_dlp")
+    import downloader
+    cache = InfoCache()
+    monkeypatch.setattr(downloader, "get_info_cache", lambda: cache)
+
+    analysis = FakeYoutubeDL(ANALYSIS_OPTS)
+    assert downloader.extract_info_cached(analysis, PLAYLIST_URL)['playlist_items'] == '1-1'
+    assert downloader.extract_info_cached(analysis, PLAYLIST_URL)['playlist_items'] == '1-1'
+    assert analysis.extractions == 1
+
+    download = FakeYoutubeDL(DOWNLOAD_OPTS)
+    assert downloader.extract_info_cached(download, PLAYLIST_URL)['playlist_items'] == '2-5'
+    assert download.extractions == 1
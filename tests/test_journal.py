@@ -0,0 +1,46 @@
+import sqlite3
+
+from journal import JobJournal, JOB_QUEUED
+
+
+def write(path, text="data"):
+    path.write_text(text)
+    return str(path)
+
+
+def test_resume_keeps_good_outputs_of_failed_jobs(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.sqlite3"))
+    failed_output = write(tmp_path / "failed.mp3", "earlier good output")
+    write(tmp_path / "failed.mp3.part")
+    staged_output = write(tmp_path / "staged.mp3", "earlier good output")
+    crashed_output = write(tmp_path / "crashed.mp3", "truncated")
+    batch = journal.start_batch('convert', {}, [{'key': path, 'output_path': path}
+                                                for path in (failed_output, staged_output, crashed_output)])
+
+    batch.running(failed_output, in_place=True)
+    batch.failed(failed_output, "probe failed")
+    batch.running(staged_output)
+    batch.running(crashed_output, in_place=True)
+
+    pending = journal.prepare_resume(batch.id)
+
+    assert [job['key'] for job in pending] == [failed_output, staged_output, crashed_output]
+    assert all(job['state'] == JOB_QUEUED and not job['in_place'] for job in pending)
+    assert (tmp_path / "failed.mp3").read_text() == "earlier good output"
+    assert not (tmp_path / "failed.mp3.part").exists()
+    assert (tmp_path / "staged.mp3").read_text() == "earlier good output"
+    assert not (tmp_path / "crashed.mp3").exists()
+
+
+def test_journal_without_in_place_column_is_migrated(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE jobs (batch_id INTEGER NOT NULL, job_key TEXT NOT NULL, state TEXT NOT NULL, "
+                     "input_path TEXT, output_path TEXT, data TEXT, started REAL, finished REAL, "
+                     "elapsed REAL, error TEXT, PRIMARY KEY (batch_id, job_key))")
+    conn.close()
+
+    journal = JobJournal(db_path)
+    batch = journal.start_batch('convert', {}, [{'key': 'a', 'output_path': str(tmp_path / "a.mp3")}])
+    batch.running('a', in_place=True)
+    assert journal.jobs(batch.id)[0]['in_place'] is True
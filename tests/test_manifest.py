@@ -0,0 +1,67 @@
+import os
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import converter
+from converter import MediaConverter, build_conversion_jobs, run_conversion_batch
+from manifest import ConversionManifest, MANIFEST_FILE
+
+SIGNATURE = {'encoder_settings': 1}
+
+
+def write(path, data=b"data"):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_every_output_of_an_input_is_remembered(tmp_path):
+    source = write(tmp_path / "song.wav")
+    outputs = [write(tmp_path / "song.mp3"), write(tmp_path / "song.ogg")]
+    manifest = ConversionManifest(str(tmp_path))
+    for output in outputs:
+        manifest.record(source, output, SIGNATURE)
+    manifest.save()
+
+    reloaded = ConversionManifest(str(tmp_path))
+    assert all(reloaded.is_up_to_date(source, output, SIGNATURE) for output in outputs)
+    assert not reloaded.is_up_to_date(source, str(tmp_path / "song.flac"), SIGNATURE)
+
+
+def test_version_1_manifest_is_migrated(tmp_path):
+    source = write(tmp_path / "song.wav")
+    output = write(tmp_path / "song.mp3")
+    manifest = ConversionManifest(str(tmp_path))
+    manifest.record(source, output, SIGNATURE)
+    entry = next(iter(next(iter(manifest._entries.values())).values()))
+    with open(tmp_path / MANIFEST_FILE, 'w') as f:
+        json.dump({'version': 1, 'entries': {os.path.normcase(os.path.abspath(source)): entry}}, f)
+
+    assert ConversionManifest(str(tmp_path)).is_up_to_date(source, output, SIGNATURE)
+
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_two_format_incremental_rerun_skips_everything(tmp_path, monkeypatch):
+    # Probe cache, journal etc. go to the temp folder instead of next to the app
+    monkeypatch.setattr(converter, 'get_absolute_path', lambda name: str(tmp_path / name))
+    source = str(tmp_path / "tone.wav")
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=d=1", "-y", source], check=True)
+    output_folder = str(tmp_path / "out")
+    os.makedirs(output_folder)
+    media_converter = MediaConverter(shutil.which("ffmpeg"), shutil.which("ffprobe"))
+
+    def run_batch():
+        jobs = build_conversion_jobs([source], output_folder, ["mp3", "ogg"])
+        return run_conversion_batch(media_converter, jobs, False, 2,
+                                    manifest=ConversionManifest(output_folder))
+
+    first = run_batch()
+    assert [r['success'] for r in first] == [True, True]
+    assert not any(r.get('skipped') for r in first)
+
+    second = run_batch()
+    assert len(second) == 2
+    assert all(r['success'] and r.get('skipped') for r in second)
@@ -0,0 +1,27 @@
+from benchmark import benchmark_progress_bus
+from progressbus import ProgressBus, PROGRESS_FRAME_INTERVAL
+
+PUBLISHERS = 4
+EVENT_RATE = 10000
+
+
+def test_latest_state_per_job_wins():
+    bus = ProgressBus()
+    for downloaded in range(100):
+        bus.publish(('download', 1), 'downloading', {'downloaded_bytes': downloaded})
+    bus.publish(('download', 2), 'finished', {})
+    latest = bus.drain()
+    assert list(latest) == [('download', 1), ('download', 2)]
+    assert latest[('download', 1)] == ('downloading', {'downloaded_bytes': 99})
+    assert bus.drain() == {}
+    assert bus.stats() == {'published': 101, 'delivered': 2, 'pending': 0}
+
+
+def test_ui_work_stays_bounded_under_event_flood():
+    result = benchmark_progress_bus(rate=EVENT_RATE, seconds=1.5, publishers=PUBLISHERS)
+    # The flood actually happened...
+    assert result['events_per_second'] >= EVENT_RATE * 0.5
+    # ...yet the UI redrew at most at its frame rate, each time with at most one state per job
+    assert result['redraws_per_second'] <= 1 / PROGRESS_FRAME_INTERVAL + 1
+    assert result['max_states_per_redraw'] <= PUBLISHERS
+    assert result['states_delivered'] <= result['redraws'] * PUBLISHERS
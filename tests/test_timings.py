@@ -0,0 +1,44 @@
+import pytest
+
+from timings import configure_timings, flush_timings, span, job_scope, load_spans
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = configure_timings(str(tmp_path / "timings.jsonl"), str(tmp_path / "laces.prom"))
+    yield recorder
+    configure_timings(None)
+
+
+def test_spans_are_appended_with_job_and_parent(recorder):
+    with job_scope('job-1'):
+        with span('encode', file='a.mp4') as encode:
+            with span('probe'):
+                pass
+            encode['path'] = 'remux'
+    with pytest.raises(ValueError):
+        with span('extract'):
+            raise ValueError("gone")
+
+    spans = load_spans(recorder.jsonl_path)
+    assert [(s['stage'], s['job'], s.get('parent')) for s in spans] == [
+        ('probe', 'job-1', 'encode'), ('encode', 'job-1', None), ('extract', None, None)]
+    assert spans[1]['path'] == 'remux'
+    assert spans[2]['status'] == 'error' and 'gone' in spans[2]['error']
+    assert len(load_spans(recorder.jsonl_path, job='job-1')) == 2
+
+
+def test_prometheus_textfile_is_throttled_until_flush(recorder, monkeypatch):
+    writes = []
+    original = recorder._write_prometheus
+    monkeypatch.setattr(recorder, '_write_prometheus', lambda: writes.append(1) or original())
+
+    for _ in range(200):
+        with span('probe'):
+            pass
+    assert len(writes) == 1  # only the first span found the textfile due
+
+    flush_timings()
+    assert len(writes) == 2
+    with open(recorder.prometheus_path) as f:
+        assert 'laces_stage_runs_total{stage="probe"} 200' in f.read()
@@ -0,0 +1,29 @@
+import json
+
+import converter
+from tuning import save_encoder_tuning, reset_encoder_tuning
+
+
+def tuning_result(output_format, crf):
+    chosen = {'settings': {'preset': 'fast', 'crf': crf}, 'ssim': 0.99, 'psnr': 45.0, 'fps': 120.0}
+    return {'min_ssim': 0.98, 'formats': {output_format: {'encoder': 'libx264', 'chosen': chosen}}}
+
+
+def test_custom_tuning_file_is_merged_and_used(tmp_path, monkeypatch):
+    default_file = tmp_path / "default.json"
+    default_file.write_text(json.dumps({'formats': {'mkv': {'encoder': 'libx264', 'settings': {}}}}))
+    monkeypatch.setattr(converter, "get_absolute_path", lambda path: str(default_file))
+    monkeypatch.setattr(converter, "_encoder_tuning", None)
+    tuning_file = str(tmp_path / "custom.json")
+
+    save_encoder_tuning(tuning_result('mp4', '23'), tuning_file)
+    in_effect = save_encoder_tuning(tuning_result('mov', '21'), tuning_file)
+
+    assert sorted(in_effect) == ['mov', 'mp4']
+    with open(tuning_file) as f:
+        assert sorted(json.load(f)['formats']) == ['mov', 'mp4']
+    assert converter.get_cpu_video_settings('mp4') == {'preset': 'fast', 'crf': '23'}
+
+    reset_encoder_tuning(tuning_file)
+    assert converter.load_encoder_tuning() == {}
+    assert default_file.exists()
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+# main.py is the GUI; skip where its toolkit and media libraries are not installed
+tk = pytest.importorskip("tkinter")
+for module in ("tkinterdnd2", "vlc", "pydub", "yt_dlp", "requests", "packaging"):
+    pytest.importorskip(module)
+
+import main  # noqa: E402
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLslowstub"
+SLOW_ANALYSIS_SECONDS = 2.0
+TICK_MS = 10
+
+
+class FakeWidget:
+    """Stands in for the entries, label and button download_video talks to"""
+
+    def __init__(self, value=""):
+        self.value = value
+        self.options = {}
+
+    def get(self):
+        return self.value
+
+    def config(self, **options):
+        self.options.update(options)
+
+
+class FakeSettings:
+    def add_recent_folder(self, folder):
+        return True
+
+
+@pytest.fixture
+def gui(monkeypatch, tmp_path):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"no display: {e}")
+    root.withdraw()
+    state = main.app_state
+    monkeypatch.setattr(state, "app", root)
+    monkeypatch.setattr(state, "youtube_link_entry", FakeWidget(PLAYLIST_URL))
+    monkeypatch.setattr(state, "output_folder_entry", FakeWidget(str(tmp_path)))
+    monkeypatch.setattr(state, "youtube_status_label", FakeWidget())
+    monkeypatch.setattr(state, "download_button", FakeWidget())
+    monkeypatch.setattr(state, "settings_manager", FakeSettings())
+    monkeypatch.setattr(state, "url_analysis", None)
+
+    chosen = []
+
+    def record_choice(is_playlist_page, playlist_info):
+        chosen.append((time.perf_counter(), playlist_info))
+        return None  # as if the user closed the dialog
+
+    monkeypatch.setattr(main, "choose_playlist_action", record_choice)
+    monkeypatch.setattr(main, "start_download", lambda *args: pytest.fail("nothing should be downloaded"))
+    yield root, chosen
+    root.destroy()
+
+
+def slow_playlist_info(seconds):
+    def get_playlist_info(url):
+        time.sleep(seconds)
+        return {'count': 3, 'title': 'Slow playlist', 'current_index': 1}
+    return get_playlist_info
+
+
+def pump(root, seconds, until=None):
+    """Run the Tk event loop with a TICK_MS timer; returns when each tick fired"""
+    ticks = []
+
+    def tick():
+        ticks.append(time.perf_counter())
+        root.after(TICK_MS, tick)
+
+    root.after(TICK_MS, tick)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not (until and until()):
+        root.update()
+        time.sleep(0.002)
+    return ticks
+
+
+def test_main_thread_stays_responsive_during_slow_analysis(gui, monkeypatch):
+    root, chosen = gui
+    monkeypatch.setattr(main, "get_playlist_info", slow_playlist_info(SLOW_ANALYSIS_SECONDS))
+
+    started = time.perf_counter()
+    main.download_video()
+    assert time.perf_counter() - started < 0.05
+    assert main.app_state.download_button.options["text"] == "CANCEL"
+    assert not chosen
+
+    ticks = pump(root, SLOW_ANALYSIS_SECONDS + 5, until=lambda: chosen)
+    assert chosen, "the playlist question never came"
+    chosen_at, playlist_info = chosen[0]
+    assert playlist_info["title"] == "Slow playlist"
+    # The dialog only opens once the analysis is done
+    assert chosen_at - started >= SLOW_ANALYSIS_SECONDS * 0.95
+
+    # Timers kept firing the whole time the extractor was busy
+    during = [started] + [t for t in ticks if t < chosen_at]
+    assert len(during) > SLOW_ANALYSIS_SECONDS * 1000 / TICK_MS / 4
+    assert max(later - earlier for earlier, later in zip(during, during[1:])) < 0.25
+    assert main.app_state.download_button.options["text"] == "DOWNLOAD"
+
+
+def test_cancel_ignores_late_analysis_result(gui, monkeypatch):
+    root, chosen = gui
+    monkeypatch.setattr(main, "get_playlist_info", slow_playlist_info(0.5))
+
+    main.download_video()
+    assert main.app_state.download_button.options["text"] == "CANCEL"
+    main.cancel_url_analysis()
+    assert main.app_state.download_button.options["text"] == "DOWNLOAD"
+
+    pump(root, 1.5)
+    assert not chosen
+    assert main.app_state.url_analysis is None
+    assert main.app_state.youtube_status_label.options["text"] == "Download Status: Idle"
@@ -0,0 +1,113 @@
+import os
+import math
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+from scheduler import get_scheduler, RESOURCE_CPU_ENCODE
+
+# Divides the machine's cores between the ffmpeg processes running at the same time.
+# Left alone, every libx264/libvpx instance starts a thread per core, so N parallel
+# encodes run N x cores threads and spend their time context switching.
+# Stdlib only so converter.py and chunked.py can import it freely.
+
+# Encoders that are not CPU bound (or ignore -threads)
+HW_ENCODER_SUFFIXES = ("_nvenc", "_qsv", "_amf", "_vaapi", "_videotoolbox", "_mf")
+MAX_VP9_TILE_COLUMNS = 6  # log2; libvpx lowers it further for narrow frames
+
+
+def get_video_encoders(cmd: List[str]) -> List[str]:
+    """Software video encoders a command runs (one per -c:v output)"""
+    encoders = []
+    for option, value in zip(cmd, cmd[1:]):
+        if option in ("-c:v", "-vcodec") and value != "copy" and not value.endswith(HW_ENCODER_SUFFIXES):
+            encoders.append(value)
+    return encoders
+
+
+def encoder_thread_args(encoder: str, threads: int) -> List[str]:
+    """Options that cap one encoder instance at `threads` threads"""
+    args = ["-threads", str(threads)]
+    if encoder == "libx264":
+        args += ["-x264-params", f"threads={threads}"]
+    elif encoder == "libvpx-vp9":
+        # Row multithreading plus tile columns are what let VP9 use its threads at all
+        args += ["-row-mt", "1", "-tile-columns", str(min(int(math.log2(threads)), MAX_VP9_TILE_COLUMNS))]
+    return args
+
+
+def apply_thread_args(cmd: List[str], threads: int) -> List[str]:
+    """
+    Copy of an ffmpeg command with decoder and encoder thread counts set.
+    Video encoders sharing the process (fan-out) split the threads between them.
+    Commands without a software video encoder are returned unchanged.
+    """
+    encoders = get_video_encoders(cmd)
+    if not encoders:
+        return list(cmd)
+    per_encoder = max(1, threads // len(encoders))
+    has_x264_params = "-x264-params" in cmd
+
+    result = [cmd[0]]
+    index = 1
+    decoder_threads_set = False
+    while index < len(cmd):
+        option = cmd[index]
+        if option == "-i" and not decoder_threads_set:
+            result += ["-threads", str(threads)]
+            decoder_threads_set = True
+        if option in ("-c:v", "-vcodec") and index + 1 < len(cmd) and cmd[index + 1] in encoders:
+            encoder = cmd[index + 1]
+            thread_args = encoder_thread_args(encoder, per_encoder)
+            if has_x264_params and encoder == "libx264":
+                thread_args = thread_args[:2]
+            result += [option, encoder] + thread_args
+            index += 2
+            continue
+        result.append(option)
+        index += 1
+    return result
+
+
+class ThreadBudget:
+    """
+    Hands out per-process thread counts. A process gets an equal share of the cores
+    among everything currently encoding on the CPU: the scheduler's cpu_encode tasks
+    (running and queued, up to the class budget) and the processes holding a lease.
+    """
+
+    def __init__(self, total_threads: Optional[int] = None):
+        self.total_threads = total_threads or os.cpu_count() or 1
+        # Off = ffmpeg's own defaults (every process sizes itself to all cores)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._leased = 0
+
+    def share(self, processes: int = 1) -> int:
+        """Threads per process for `processes` more processes starting now"""
+        with self._lock:
+            concurrency = max(self._leased + processes, get_scheduler().occupancy(RESOURCE_CPU_ENCODE))
+        return max(1, self.total_threads // concurrency)
+
+    @contextmanager
+    def lease(self, processes: int = 1):
+        """Reserve a share for `processes` processes while they run; yields threads per process (None when disabled)"""
+        if not self.enabled:
+            yield None
+            return
+        threads = self.share(processes)
+        with self._lock:
+            self._leased += processes
+        try:
+            yield threads
+        finally:
+            with self._lock:
+                self._leased -= processes
+
+
+_thread_budget = ThreadBudget()
+
+
+def get_thread_budget() -> ThreadBudget:
+    """Process-wide thread budget"""
+    return _thread_budget
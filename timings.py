@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+# Stage timing spans (probe, extract, download, merge, codec check, encode, ...).
+# Each finished span is appended as one JSON line, so "where did the time go" for a
+# job is a grep away, and per-stage totals can optionally be written in Prometheus
+# text format for a node_exporter textfile collector. The JSON-lines file stays
+# open (line buffered); the textfile is rewritten at most every
+# PROMETHEUS_WRITE_INTERVAL and whenever a batch ends (flush_timings). Stdlib only.
+
+TIMINGS_FILE = "stage_timings.jsonl"
+TIMINGS_MAX_BYTES = 20 * 1024 * 1024  # rotated to <file>.1 beyond this
+PROMETHEUS_METRIC_PREFIX = "laces_stage"
+PROMETHEUS_WRITE_INTERVAL = 15.0  # seconds; node_exporter scrapes about this often
+
+_local = threading.local()
+_job_counter = itertools.count(1)
+
+
+def new_job_id(kind: str) -> str:
+    """Id that ties the spans of one download or conversion batch together"""
+    return f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_job_counter)}"
+
+
+def current_job() -> Optional[str]:
+    return getattr(_local, 'job', None)
+
+
+@contextmanager
+def job_scope(job: Optional[str]):
+    """Attribute the spans this thread records inside the block to job"""
+    previous = current_job()
+    _local.job = job if job is not None else previous
+    try:
+        yield
+    finally:
+        _local.job = previous
+
+
+def _prometheus_escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class SpanRecorder:
+    """Appends spans to a JSON-lines file and keeps per-stage totals for Prometheus"""
+
+    def __init__(self, jsonl_path: str, prometheus_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path or None
+        self._totals = {}  # stage -> {'count', 'seconds', 'failures'}
+        self._file = None
+        self._last_prometheus_write = 0.0
+        self._lock = threading.Lock()
+        self._prometheus_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+
+    def record(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            totals = self._totals.setdefault(span['stage'], {'count': 0, 'seconds': 0.0, 'failures': 0})
+            totals['count'] += 1
+            totals['seconds'] += span['duration']
+            if span['status'] != 'ok':
+                totals['failures'] += 1
+            self._append(line)
+            prometheus_due = bool(self.prometheus_path) and \
+                time.time() - self._last_prometheus_write >= PROMETHEUS_WRITE_INTERVAL
+            if prometheus_due:
+                self._last_prometheus_write = time.time()
+        if prometheus_due:
+            self._write_prometheus()
+
+    def _append(self, line: str) -> None:
+        """Write one line to the open JSON-lines file, rotating it when too big (lock held)"""
+        try:
+            if self._file is not None and self._file.tell() > TIMINGS_MAX_BYTES:
+                self._file.close()
+                self._file = None
+                os.replace(self.jsonl_path, self.jsonl_path + '.1')
+            if self._file is None:
+                self._file = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+            self._file.write(line)
+        except OSError as e:
+            logging.debug(f"Could not write stage timing to {self.jsonl_path}: {e}")
+            self._file = None
+
+    def flush(self) -> None:
+        """Write the Prometheus textfile now, e.g. at the end of a batch"""
+        if self.prometheus_path:
+            with self._lock:
+                self._last_prometheus_write = time.time()
+            self._write_prometheus()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write_prometheus(self) -> None:
+        """Write the textfile atomically so the collector never reads half of it"""
+        totals_by_stage = self.totals()
+        lines = []
+        metrics = (
+            ('seconds_total', 'counter', 'Seconds spent in each job stage', 'seconds'),
+            ('runs_total', 'counter', 'Finished spans per job stage', 'count'),
+            ('failures_total', 'counter', 'Spans per job stage that raised', 'failures'),
+        )
+        for suffix, metric_type, help_text, field in metrics:
+            name = f"{PROMETHEUS_METRIC_PREFIX}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for stage, totals in sorted(totals_by_stage.items()):
+                value = round(totals[field], 6) if field == 'seconds' else totals[field]
+                lines.append(f'{name}{{stage="{_prometheus_escape(stage)}"}} {value}')
+        lines.append(f"# HELP {PROMETHEUS_METRIC_PREFIX}_last_update_timestamp_seconds "
+                     f"When this file was last written")
+        lines.append(f"# TYPE {PROMETHEUS_METRIC_PREFIX}_last_update_timestamp_seconds gauge")
+        lines.append(f"{PROMETHEUS_METRIC_PREFIX}_last_update_timestamp_seconds {time.time():.3f}")
+
+        temp_path = self.prometheus_path + '.tmp'
+        with self._prometheus_lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+                os.replace(temp_path, self.prometheus_path)
+            except OSError as e:
+                logging.debug(f"Could not write Prometheus textfile {self.prometheus_path}: {e}")
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {stage: dict(totals) for stage, totals in self._totals.items()}
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def configure_timings(jsonl_path: Optional[str], prometheus_path: Optional[str] = None,
+                      enabled: bool = True) -> Optional[SpanRecorder]:
+    """Set up the process-wide recorder; until then (or when disabled) spans cost next to nothing"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.close()
+        _recorder = None
+        if enabled and jsonl_path:
+            try:
+                _recorder = SpanRecorder(jsonl_path, prometheus_path)
+            except OSError as e:
+                logging.error(f"Could not record stage timings to {jsonl_path}: {e}")
+        return _recorder
+
+
+def get_span_recorder() -> Optional[SpanRecorder]:
+    return _recorder
+
+
+def flush_timings() -> None:
+    """End of a batch: bring the Prometheus textfile up to date"""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.flush()
+
+
+def record_span(stage: str, started: float, duration: float, status: str = 'ok',
+                job: Optional[str] = None, **labels) -> None:
+    """Record a span measured elsewhere, e.g. between two yt-dlp hook calls"""
+    recorder = _recorder
+    if recorder is None:
+        return
+    span = {'ts': round(started, 3), 'stage': stage, 'duration': round(duration, 4), 'status': status,
+            'job': job if job is not None else current_job(), 'thread': threading.current_thread().name}
+    span.update({key: value for key, value in labels.items() if value is not None})
+    recorder.record(span)
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Time the block as one stage. Yields a dict; labels added to it inside the block
+    (e.g. which encode path won) are recorded with the span. Exceptions propagate
+    and mark the span as failed.
+    """
+    extra = {}
+    started = time.time()
+    start = time.perf_counter()
+    parent = getattr(_local, 'stage', None)
+    _local.stage = stage
+    status = 'ok'
+    error = None
+    try:
+        yield extra
+    except BaseException as e:
+        status = 'error'
+        error = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        _local.stage = parent
+        labels.update(extra)
+        record_span(stage, started, time.perf_counter() - start, status, parent=parent, error=error, **labels)
+
+
+def load_spans(jsonl_path: str, job: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Spans from a timings file (and its rotated predecessor), optionally of one job"""
+    spans = []
+    for path in (jsonl_path + '.1', jsonl_path):
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if job is None or record.get('job') == job:
+                    spans.append(record)
+    return spans
+
+
+def summarize_spans(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per stage: count, total/mean/max seconds and failures, largest total first"""
+    stages = {}
+    for record in spans:
+        summary = stages.setdefault(record['stage'], {'count': 0, 'total': 0.0, 'max': 0.0, 'failures': 0})
+        summary['count'] += 1
+        summary['total'] += record['duration']
+        summary['max'] = max(summary['max'], record['duration'])
+        if record.get('status') != 'ok':
+            summary['failures'] += 1
+    for summary in stages.values():
+        summary['mean'] = round(summary['total'] / summary['count'], 4)
+        summary['total'] = round(summary['total'], 4)
+    return dict(sorted(stages.items(), key=lambda item: -item[1]['total']))
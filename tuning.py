@@ -0,0 +1,227 @@
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+import subprocess
+from typing import Dict, Any, List, Optional
+
+from converter import (
+    VIDEO_FORMATS, CPU_VIDEO_ENCODERS, ENCODER_TUNING_FILE, MediaConverter, build_cpu_video_command,
+    get_absolute_path, get_subprocess_kwargs, load_encoder_tuning, probe_file
+)
+from probe import get_duration, get_streams
+from ffmpeg_progress import run_ffmpeg_with_progress
+
+# Encoder preset auto-tuner: encodes short clips of the user's own videos with a grid
+# of speed/quality settings, scores each with ffmpeg's ssim/psnr filters, and keeps the
+# fastest setting per output format that meets the quality floor. The choice is saved
+# to ENCODER_TUNING_FILE, which build_cpu_video_command picks up automatically.
+# Headless like cli.py: no GUI imports.
+
+TUNING_CANDIDATES = {
+    "libx264": [{"-preset": preset, "-crf": crf}
+                for preset in ("superfast", "veryfast", "faster", "fast", "medium", "slow")
+                for crf in ("20", "23", "26")],
+    "libvpx-vp9": [{"-deadline": "good", "-cpu-used": cpu_used, "-crf": crf, "-b:v": "0"}
+                   for cpu_used in ("1", "2", "3", "4", "5")
+                   for crf in ("27", "30", "33")],
+    "mpeg4": [{"-q:v": q} for q in ("3", "4", "5", "6", "7")],
+}
+DEFAULT_MIN_SSIM = 0.98
+DEFAULT_SAMPLE_COUNT = 3
+DEFAULT_SAMPLE_SECONDS = 5.0
+TUNING_VERSION = 1
+
+SSIM_PATTERN = re.compile(r"SSIM .*All:([\d.]+)")
+PSNR_PATTERN = re.compile(r"PSNR .*average:([\d.]+|inf)")
+# Both sides are normalized so only the encode itself is measured
+QUALITY_FILTER = ("[0:v]settb=AVTB,setpts=PTS-STARTPTS,format=yuv420p,split[d1][d2];"
+                  "[1:v]settb=AVTB,setpts=PTS-STARTPTS,format=yuv420p,split[r1][r2];"
+                  "[d1][r1]ssim;[d2][r2]psnr")
+
+
+def pick_sample_inputs(input_paths: List[str], count: int) -> List[str]:
+    """Up to `count` video inputs spread evenly over the list"""
+    videos = [path for path in input_paths if os.path.splitext(path)[1][1:].lower() in VIDEO_FORMATS]
+    if len(videos) <= count:
+        return videos
+    step = len(videos) / count
+    return [videos[int(i * step)] for i in range(count)]
+
+
+def extract_reference_clip(ffmpeg_path: str, input_path: str, output_path: str,
+                           sample_seconds: float, ffprobe_path: Optional[str] = None) -> Optional[str]:
+    """Lossless video-only clip from a third of the way in (past intros); None if there is no video"""
+    probe = probe_file(input_path, ffprobe_path)
+    if probe is not None and not get_streams(probe, "video"):
+        return None
+    duration = get_duration(probe)
+    start = max(duration / 3 - sample_seconds / 2, 0.0) if duration > sample_seconds else 0.0
+    cmd = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-ss", f"{start:.3f}", "-i", input_path,
+           "-t", str(sample_seconds), "-map", "0:v:0", "-an", "-sn",
+           "-c:v", "libx264", "-qp", "0", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-y", output_path]
+    subprocess.run(cmd, capture_output=True, text=True, check=True, **get_subprocess_kwargs())
+    return output_path
+
+
+def measure_quality(ffmpeg_path: str, distorted_path: str, reference_path: str) -> Dict[str, Optional[float]]:
+    """SSIM (All) and average PSNR of an encode against its reference"""
+    cmd = [ffmpeg_path, "-hide_banner", "-nostats", "-i", distorted_path, "-i", reference_path,
+           "-lavfi", QUALITY_FILTER, "-f", "null", "-"]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True, **get_subprocess_kwargs())
+    ssim = SSIM_PATTERN.search(result.stderr)
+    psnr = PSNR_PATTERN.search(result.stderr)
+    return {
+        'ssim': float(ssim.group(1)) if ssim else None,
+        'psnr': float(psnr.group(1)) if psnr else None
+    }
+
+
+def score_candidate(ffmpeg_path: str, references: List[str], output_format: str, settings: Dict[str, str],
+                    work_dir: str, sample_seconds: float) -> Dict[str, Any]:
+    """
+    Encode every reference clip with one setting. Quality is the worst clip's
+    (the floor has to hold for all content), speed is frames over total encode time.
+    """
+    ssims, psnrs = [], []
+    frames = 0
+    elapsed = 0.0
+    output_bytes = 0
+    for index, reference in enumerate(references):
+        output_path = os.path.join(work_dir, f"candidate_{index}.{output_format}")
+        cmd = build_cpu_video_command(ffmpeg_path, reference, output_path, output_format, settings)
+        stats = run_ffmpeg_with_progress(cmd, sample_seconds, None, get_subprocess_kwargs())
+        frames += stats['frames']
+        elapsed += stats['elapsed']
+        output_bytes += os.path.getsize(output_path)
+        quality = measure_quality(ffmpeg_path, output_path, reference)
+        ssims.append(quality['ssim'])
+        psnrs.append(quality['psnr'])
+        os.remove(output_path)
+
+    return {
+        'settings': settings,
+        'ssim': min(ssims) if None not in ssims else None,
+        'psnr': min(psnrs) if None not in psnrs else None,
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'encode_seconds': round(elapsed, 3),
+        'kbps': round(output_bytes * 8 / 1000 / (sample_seconds * len(references)), 1)
+    }
+
+
+def choose_candidate(scores: List[Dict[str, Any]], min_ssim: float,
+                     min_psnr: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Fastest candidate meeting the quality floor (ties go to the better SSIM)"""
+    passing = [score for score in scores
+               if score['ssim'] is not None and score['ssim'] >= min_ssim
+               and (min_psnr is None or (score['psnr'] is not None and score['psnr'] >= min_psnr))]
+    if not passing:
+        return None
+    return max(passing, key=lambda score: (score['fps'], score['ssim']))
+
+
+def tune_encoders(converter: MediaConverter, input_paths: List[str], output_formats: List[str],
+                  min_ssim: float = DEFAULT_MIN_SSIM, min_psnr: Optional[float] = None,
+                  sample_count: int = DEFAULT_SAMPLE_COUNT,
+                  sample_seconds: float = DEFAULT_SAMPLE_SECONDS) -> Dict[str, Any]:
+    """
+    Score the candidate grid of each output format's software encoder on clips of
+    the inputs. Formats sharing an encoder and options (mp4/mov/mkv) are scored once.
+    """
+    start_time = time.time()
+    samples = pick_sample_inputs(input_paths, sample_count)
+    if not samples:
+        raise ValueError("No video inputs to sample")
+
+    results = {}
+    scored = {}
+    with tempfile.TemporaryDirectory(prefix="laces_tune_") as work_dir:
+        references = []
+        for index, input_path in enumerate(samples):
+            try:
+                reference = extract_reference_clip(converter.ffmpeg_path, input_path,
+                                                   os.path.join(work_dir, f"reference_{index}.mkv"),
+                                                   sample_seconds, converter.ffprobe_path)
+            except subprocess.CalledProcessError as e:
+                logging.warning(f"Could not sample {os.path.basename(input_path)}: {(e.stderr or '').strip()[-200:]}")
+                continue
+            if reference:
+                references.append(reference)
+        if not references:
+            raise ValueError("None of the inputs could be sampled")
+
+        for output_format in output_formats:
+            encoder = CPU_VIDEO_ENCODERS.get(output_format)
+            if encoder is None:
+                continue
+            # flv adds profile/level constraints, so it is scored on its own
+            group = (encoder, output_format == "flv")
+            if group not in scored:
+                scores = []
+                for settings in TUNING_CANDIDATES[encoder]:
+                    try:
+                        score = score_candidate(converter.ffmpeg_path, references, output_format, settings,
+                                                work_dir, sample_seconds)
+                    except (subprocess.CalledProcessError, OSError) as e:
+                        logging.warning(f"{encoder} {settings} failed: {e}")
+                        continue
+                    logging.info(f"{output_format} {encoder} {' '.join(f'{k} {v}' for k, v in settings.items())}: "
+                                 f"SSIM {score['ssim']}, PSNR {score['psnr']}, {score['fps']} fps")
+                    scores.append(score)
+                scored[group] = scores
+
+            chosen = choose_candidate(scored[group], min_ssim, min_psnr)
+            if chosen is None:
+                logging.warning(f"No {encoder} setting reached SSIM {min_ssim} for {output_format}; "
+                                f"keeping the current settings")
+            else:
+                logging.info(f"{output_format}: chose {chosen['settings']} ({chosen['fps']} fps, SSIM {chosen['ssim']})")
+            results[output_format] = {
+                'encoder': encoder,
+                'chosen': chosen,
+                'candidates': scored[group]
+            }
+
+    return {
+        'samples': samples,
+        'sample_seconds': sample_seconds,
+        'min_ssim': min_ssim,
+        'min_psnr': min_psnr,
+        'tune_seconds': round(time.time() - start_time, 3),
+        'formats': results
+    }
+
+
+def save_encoder_tuning(tuning: Dict[str, Any], tuning_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Persist the chosen settings (merged with formats tuned earlier) and make the
+    converter use them right away. Returns the per-format choices now in effect.
+    """
+    tuning_file = tuning_file or get_absolute_path(ENCODER_TUNING_FILE)
+    formats = dict(load_encoder_tuning(refresh=True, tuning_file=tuning_file))
+    for output_format, result in tuning['formats'].items():
+        chosen = result['chosen']
+        if chosen is None:
+            continue
+        formats[output_format] = {
+            'encoder': result['encoder'],
+            'settings': chosen['settings'],
+            'ssim': chosen['ssim'],
+            'psnr': chosen['psnr'],
+            'fps': chosen['fps'],
+            'min_ssim': tuning['min_ssim'],
+            'tuned_at': time.time()
+        }
+    with open(tuning_file, 'w') as f:
+        json.dump({'version': TUNING_VERSION, 'formats': formats}, f, indent=4)
+    return load_encoder_tuning(refresh=True, tuning_file=tuning_file)
+
+
+def reset_encoder_tuning(tuning_file: Optional[str] = None) -> None:
+    """Forget all tuned settings and go back to the built-in defaults"""
+    tuning_file = tuning_file or get_absolute_path(ENCODER_TUNING_FILE)
+    if os.path.exists(tuning_file):
+        os.remove(tuning_file)
+    load_encoder_tuning(refresh=True, tuning_file=tuning_file)
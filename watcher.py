@@ -0,0 +1,316 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+from typing import List, Callable, Iterable, Tuple
+
+# Watch-folder support: notices new media files in input folders and reports them
+# once they have stopped changing. Uses inotify on Linux (via ctypes) and falls back
+# to polling, where only directories whose mtime changed are listed again.
+# Stdlib only.
+
+DEFAULT_SETTLE_SECONDS = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+# Names of files that are still being produced by common copy/download tools
+IGNORED_SUFFIXES = ('.part', '.tmp', '.crdownload', '.partial', '.ytdl', '.temp.mp4')
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_candidate(path: str, extensions: Tuple[str, ...]) -> bool:
+    """A finished-looking media file name (no temp suffix, not hidden)"""
+    name = os.path.basename(path)
+    lower = name.lower()
+    return (not name.startswith(('.', '~$'))
+            and not lower.endswith(IGNORED_SUFFIXES)
+            and lower.endswith(extensions))
+
+
+def walk_directories(root: str, recursive: bool) -> List[str]:
+    """root plus (when recursive) every directory below it"""
+    if not recursive:
+        return [root]
+    return [path for path, _, _ in os.walk(root)]
+
+
+def list_files(directory: str) -> List[str]:
+    """Regular files directly inside a directory"""
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries if entry.is_file()]
+    except OSError:
+        return []
+
+
+class StabilityTracker:
+    """Holds candidate files until their size and mtime have not changed for settle_seconds"""
+
+    def __init__(self, settle_seconds: float = DEFAULT_SETTLE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self._pending = {}  # path -> (size, mtime_ns, unchanged since)
+        self._lock = threading.Lock()
+
+    def touch(self, path: str) -> None:
+        """Note that a file appeared or changed"""
+        with self._lock:
+            self._pending[path] = (-1, -1, time.time())
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def collect_ready(self) -> List[str]:
+        """Files that have settled; only pending candidates are stat()ed"""
+        now = time.time()
+        ready = []
+        with self._lock:
+            paths = list(self._pending.items())
+        for path, (size, mtime_ns, since) in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                with self._lock:
+                    self._pending.pop(path, None)
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                with self._lock:
+                    self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+                continue
+            if now - since < self.settle_seconds or not self._readable(path):
+                continue
+            with self._lock:
+                self._pending.pop(path, None)
+            ready.append(path)
+        return ready
+
+    @staticmethod
+    def _readable(path: str) -> bool:
+        # Writers on Windows hold the file locked until they are done
+        try:
+            with open(path, 'rb'):
+                return True
+        except OSError:
+            return False
+
+
+class PollingWatcher:
+    """Change detection by polling directory mtimes"""
+
+    def __init__(self, roots: List[str], recursive: bool, on_file: Callable[[str], None],
+                 interval: float = DEFAULT_POLL_INTERVAL):
+        self.recursive = recursive
+        self.on_file = on_file
+        self.interval = interval
+        self._directories = {}  # directory -> mtime_ns
+        self._snapshots = {}  # directory -> {path: (size, mtime_ns)}
+        for root in roots:
+            for directory in walk_directories(root, recursive):
+                self._scan(directory, report=False)
+
+    def _scan(self, directory: str, report: bool = True) -> None:
+        try:
+            self._directories[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._forget(directory)
+            return
+        old = self._snapshots.get(directory, {})
+        new = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if self.recursive and entry.path not in self._directories:
+                            self._scan(entry.path, report)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        new[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        if report and old.get(entry.path) != new[entry.path]:
+                            self.on_file(entry.path)
+        except OSError as e:
+            logging.warning(f"Could not list {directory}: {e}")
+        self._snapshots[directory] = new
+
+    def _forget(self, directory: str) -> None:
+        for known in [d for d in self._directories if d == directory or d.startswith(directory + os.sep)]:
+            self._directories.pop(known, None)
+            self._snapshots.pop(known, None)
+
+    def initial_files(self) -> List[str]:
+        """Files present when watching started"""
+        return [path for snapshot in self._snapshots.values() for path in snapshot]
+
+    def poll(self, timeout: float) -> None:
+        """Wait up to timeout, then re-list only directories whose mtime moved"""
+        time.sleep(min(timeout, self.interval))
+        for directory, mtime_ns in list(self._directories.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._forget(directory)
+                continue
+            if current != mtime_ns:
+                self._scan(directory)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Change detection with Linux inotify (one watch per directory)"""
+
+    def __init__(self, roots: List[str], recursive: bool, on_file: Callable[[str], None]):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._ctypes = ctypes
+        self.recursive = recursive
+        self.on_file = on_file
+        self.roots = roots
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches = {}  # watch descriptor -> directory
+        for root in roots:
+            for directory in walk_directories(root, recursive):
+                self._add_watch(directory)
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = self._ctypes.get_errno()
+            if error == errno.ENOSPC:
+                logging.error("inotify watch limit reached; raise fs.inotify.max_user_watches")
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+        self._watches[wd] = directory
+
+    def initial_files(self) -> List[str]:
+        """Files present when watching started"""
+        return [path for directory in list(self._watches.values()) for path in list_files(directory)]
+
+    def poll(self, timeout: float) -> None:
+        """Wait up to timeout for events and report the files they touch"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return
+            raise
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; one full listing catches up
+                logging.warning("inotify queue overflowed, rescanning watched folders")
+                for path in self.initial_files():
+                    self.on_file(path)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if not name:
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land before the watch exists, so list the new tree once
+                    for new_directory in walk_directories(path, True):
+                        try:
+                            self._add_watch(new_directory)
+                        except OSError as e:
+                            logging.error(str(e))
+                        for file_path in list_files(new_directory):
+                            self.on_file(file_path)
+            else:
+                self.on_file(path)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def create_watcher(roots: List[str], recursive: bool, on_file: Callable[[str], None],
+                   force_polling: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """inotify where available, polling otherwise (and on request, e.g. for network shares)"""
+    if sys.platform.startswith('linux') and not force_polling:
+        try:
+            return InotifyWatcher(roots, recursive, on_file)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(roots, recursive, on_file, poll_interval)
+
+
+class FolderWatcher:
+    """
+    Watches input folders and hands settled media files to on_ready in batches.
+    Inotify/polling only ever report touched paths, so work per tick is proportional
+    to what changed, not to the size of the tree.
+    """
+
+    def __init__(self, roots: List[str], extensions: Iterable[str], on_ready: Callable[[List[str]], None],
+                 recursive: bool = False, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                 force_polling: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 include_existing: bool = True):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.extensions = tuple(f".{ext.lower().lstrip('.')}" for ext in extensions)
+        self.on_ready = on_ready
+        self.tracker = StabilityTracker(settle_seconds)
+        self.tick = min(1.0, max(settle_seconds / 2, 0.1))
+        self.stop_event = threading.Event()
+        self.files_seen = 0
+        self.files_ready = 0
+        self._watcher = create_watcher(self.roots, recursive, self._on_file, force_polling, poll_interval)
+        if include_existing:
+            for path in self._watcher.initial_files():
+                self._on_file(path)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if isinstance(self._watcher, InotifyWatcher) else "polling"
+
+    def _on_file(self, path: str) -> None:
+        if is_candidate(path, self.extensions):
+            self.files_seen += 1
+            self.tracker.touch(path)
+
+    def run(self) -> None:
+        """Watch until stop() is called"""
+        logging.info(f"Watching {', '.join(self.roots)} ({self.mode})")
+        try:
+            while not self.stop_event.is_set():
+                self._watcher.poll(self.tick)
+                ready = self.tracker.collect_ready()
+                if ready:
+                    self.files_ready += len(ready)
+                    try:
+                        self.on_ready(ready)
+                    except Exception as e:
+                        logging.error(f"Watch handler failed: {e}", exc_info=True)
+        finally:
+            self._watcher.close()
+
+    def stop(self) -> None:
+        self.stop_event.set()